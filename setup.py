@@ -28,5 +28,8 @@ setup(
     extras_require={"develop": [
         "ipdb",
         "ipython"
+    ],
+    "msgpack": [
+        "msgpack"
     ]},
 )
\ No newline at end of file
@@ -0,0 +1,39 @@
+# Modules
+import click
+
+from ._utils import completeProject
+
+
+# ------------------------------------------------------------------------------
+@click.command('build', short_help='Build several Vivado projects concurrently.')
+@click.argument('projects', nargs=-1, autocompletion=completeProject)
+@click.option(
+    '-S', '--step', 'aSteps', multiple=True,
+    type=click.Choice(['generate-project', 'check-syntax', 'synth', 'impl', 'bitfile', 'debug-probes', 'memcfg', 'package']),
+    help="Vivado step to execute, repeat to execute several in order. Default: generate-project, synth, impl, bitfile, package"
+)
+@click.option(
+    '-s', '--sessions', 'aSessions', type=click.IntRange(min=1), default=None,
+    help="Maximum number of concurrent builds. Default: number of cores divided by the number of jobs"
+)
+@click.option('-j', '--jobs', 'aNumJobs', type=click.IntRange(min=1), default=4, help="Number of parallel launch_runs jobs of each build")
+@click.option('-c', '--cpus', 'aCpus', type=click.IntRange(min=1), default=None, help="Number of cores available to the builds. Default: all")
+@click.option(
+    '-m', '--max-memory', 'aMaxMemory', type=float, default=None,
+    help="Memory available to the builds, in GiB. Default: memory available at start"
+)
+@click.option(
+    '--session-memory', 'aSessionMemory', type=float, default=4.,
+    help="Initial memory estimate of a build, in GiB, replaced by the peak of completed builds"
+)
+@click.option('--enable-ip-cache/--disable-ip-cache', 'aEnableIPCache', default=True, help="Share the IP cache of the work area between the projects")
+@click.option('-o', '--summary', 'aSummary', type=click.Path(), default=None, help="Summary JSON file. Default: var/build_summary.json in the work area")
+@click.pass_obj
+def build(ictx, projects, aSteps, aSessions, aNumJobs, aCpus, aMaxMemory, aSessionMemory, aEnableIPCache, aSummary):
+    '''Build Vivado projects of the work area concurrently, within a CPU and memory budget.
+
+    PROJECTS are project names or shell-style patterns, all the Vivado projects by default.
+    The steps of a project are chained in a single ipbb vivado command, its output is written to ipbb_build.log in the project area.
+    '''
+    from ..cmds.build import build, kDefaultSteps
+    build(ictx, projects, aSteps if aSteps else kDefaultSteps, aSessions, aNumJobs, aCpus, aMaxMemory, aSessionMemory, aEnableIPCache, aSummary)
@@ -3,17 +3,21 @@
 # Modules
 import click
 from ._utils import completeProject
-from ..depparser import dep_command_types
+from ..depparser import dep_command_types, DepParserProfiler
 
 
 # ------------------------------------------------------------------------------
 @click.group()
 @click.pass_obj
 @click.option('-p', '--proj', default=None, autocompletion=completeProject)
-def dep(ictx, proj):
+@click.option('-j', '--jobs', type=int, default=0, help='Number of threads reading dep files ahead of the parser.')
+@click.option('--profile', is_flag=True, help='Profile the dep files parsing and report timings per dep file.')
+@click.option('--profile-sort', type=click.Choice(DepParserProfiler.kColumns), default='total', help='Column to sort the profiling report by. Default: total')
+@click.option('--profile-dump', default=None, help='Write the profiling statistics to a JSON file.')
+def dep(ictx, proj, jobs, profile, profile_sort, profile_dump):
     '''Dependencies command group'''
     from ..cmds.dep import dep
-    dep(ictx, proj)
+    dep(ictx, proj, jobs, profile, profile_sort, profile_dump)
 # ------------------------------------------------------------------------------
 
 
@@ -58,6 +62,17 @@ def components(ictx, output):
     components(ictx, output)
 
 
+# ------------------------------------------------------------------------------
+@dep.command('export', short_help="Export the resolved dependency tree")
+@click.option('-f', '--format', 'fmt', type=click.Choice(['json', 'msgpack']), default='json', help="Output format. Default: json")
+@click.option('-o', '--output', default=None, help="Destination of the command output. Default: stdout")
+@click.pass_obj
+def export(ictx, fmt, output):
+    '''Export the resolved dependency tree (commands, packages, libraries, settings, include graph, errors) in a machine-readable format'''
+    from ..cmds.dep import export
+    export(ictx, fmt, output)
+
+
 # ------------------------------------------------------------------------------
 @dep.command()
 @click.pass_obj
@@ -3,6 +3,7 @@ import click
 
 from ..utils import validateComponent, validateMultiplePackageOrComponents
 from ._utils import completeComponent, completeDepFile
+from ..depparser import DepParserProfiler
 
 
 # ------------------------------------------------------------------------------
@@ -20,11 +21,14 @@ def toolbox(env):
 @click.argument('toolset', type=click.Choice(['vivado', 'sim']))
 @click.argument('component', callback=validateComponent, autocompletion=completeComponent)
 @click.argument('depfile', required=False, default=None, autocompletion=completeDepFile('component'))
+@click.option('--profile', is_flag=True, help='Profile the dep files parsing and report timings per dep file.')
+@click.option('--profile-sort', type=click.Choice(DepParserProfiler.kColumns), default='total', help='Column to sort the profiling report by. Default: total')
+@click.option('--profile-dump', default=None, help='Write the profiling statistics to a JSON file.')
 @click.pass_obj
-def check_depfile(env, verbose, toolset, component, depfile):
+def check_depfile(env, verbose, toolset, component, depfile, profile, profile_sort, profile_dump):
     '''Perform basic checks on dependency files'''
     from ..cmds.toolbox import check_depfile
-    check_depfile(env, verbose, toolset, component, depfile)
+    check_depfile(env, verbose, toolset, component, depfile, profile, profile_sort, profile_dump)
 
 
 @toolbox.command('vhdl-beautify', help="Beautifies VHDL files in components within an ipbb work area or standalone files/directories")
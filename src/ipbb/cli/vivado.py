@@ -1,6 +1,7 @@
 
 # Modules
 import click
+import os
 import types
 import importlib
 
@@ -9,8 +10,9 @@ import importlib
 @click.group('vivado', short_help='Set up, syntesize, implement Vivado projects.', chain=True)
 @click.option('-p', '--proj', default=None, help="Selected project, if not current")
 @click.option('-v', '--verbosity', type=click.Choice(['all', 'warnings-only', 'none']), default='all', help="Silence vivado messages")
+@click.option('-P', '--pool', 'aPool', is_flag=True, help="Start Vivado in the background while the dependencies are parsed, instead of when first needed.")
 @click.pass_obj
-def vivado(ictx, proj, verbosity):
+def vivado(ictx, proj, verbosity, aPool):
     '''Vivado command group
     
     \b
@@ -26,14 +28,26 @@ def vivado(ictx, proj, verbosity):
 # ------------------------------------------------------------------------------
 @vivado.resultcallback()
 @click.pass_obj
-def process_vivado(ictx, subcommands, proj, verbosity):
+def process_vivado(ictx, subcommands, proj, verbosity, aPool):
 
     from ..cmds.vivado import vivado
-    vivado(ictx, proj, verbosity, (name for name,_,_,_ in subcommands))
-
-    # Executed the chained commands
-    for name, cmd, args, kwargs in subcommands:
-        cmd(*args, **kwargs)
+    from ..defaults import kBuildStepMarker, kBuildStepMarkerVar
+    try:
+        vivado(ictx, proj, verbosity, aPool, [name for name,_,_,_ in subcommands])
+
+        # Executed the chained commands
+        try:
+            for name, cmd, args, kwargs in subcommands:
+                if os.environ.get(kBuildStepMarkerVar):
+                    # Start of the step, followed by ipbb build
+                    print(kBuildStepMarker, name, flush=True)
+                cmd(*args, **kwargs)
+        finally:
+            ictx.vivadoSessions.close()
+    finally:
+        if ictx.vivadoPool is not None:
+            ictx.vivadoPool.close()
+            ictx.vivadoPool = None
 
 # ------------------------------------------------------------------------------
 def vivado_get_command_aliases(self, ctx, cmd_name):
@@ -56,6 +70,7 @@ vivado.get_command = types.MethodType(vivado_get_command_aliases, vivado)
 @click.option('-1', '--single', 'aOptimise', is_flag=True, default=True, help="Disable project creation optimization. If present sources are added one at a time.")
 @click.option('-s', '--to-script', 'aToScript', default=None, help="Write Vivado tcl script to file and exit (dry run).")
 @click.option('-o', '--to-stdout', 'aToStdout', is_flag=True, help="Print Vivado tcl commands to screen and exit (dry run).")
+@click.option('-u', '--update', 'aUpdate', is_flag=True, help="Compare with the existing project: skip generation if up to date, only add and remove sources when possible.")
 @click.pass_obj
 @click.pass_context
 def genproject(ictx, *args, **kwargs):
@@ -79,6 +94,7 @@ def checksyntax(ictx, *args, **kwargs):
 @vivado.command('synth', short_help='Run the synthesis step on the current project.')
 @click.option('-j', '--jobs', 'aNumJobs', type=int, default=None, help="Number of parallel jobs")
 @click.option('-i', '--status-update-interval', 'aUpdateInt', type=int, default=1, help="Interal between status updates in minutes")
+@click.option('-s', '--schedule', 'aSchedule', is_flag=True, help="Launch the out-of-context runs in waves fitting the cores and memory available, estimated from the previous runs. The number of jobs, if given, caps the runs of a wave")
 @click.pass_obj
 @click.pass_context
 def synth(ictx, *args, **kwargs):
@@ -91,6 +107,7 @@ def synth(ictx, *args, **kwargs):
 @vivado.command('impl', short_help='Run the implementation step on the current project.')
 @click.option('-j', '--jobs', 'aNumJobs', type=int, default=None, help="Number of parallel jobs")
 @click.option('-s/-c', '--stop-on-timing-failure/--continue-on-timing-failure', 'aStopOnTimingErr', default=True)
+@click.option('-i', '--status-update-interval', 'aUpdateInt', type=int, default=1, help="Interval between status updates in minutes")
 @click.pass_obj
 @click.pass_context
 def impl(ictx, *args, **kwargs):
@@ -193,6 +210,23 @@ def archive(ictx, *args, **kwargs):
     return (ictx.command.name, archive, args, kwargs)
 
 
+# ------------------------------------------------------------------------------
+@vivado.command('daemon', short_help='Start, stop or query the Vivado daemon of the project area.')
+@click.argument('action', type=click.Choice(['start', 'stop', 'status']), default='status')
+@click.option('-t', '--timeout', 'aTimeout', type=int, default=300, help="Time to wait for the daemon to start, in seconds")
+@click.pass_obj
+@click.pass_context
+def daemon(ictx, *args, **kwargs):
+    '''Manage a long-lived Vivado process serving the project area.
+
+    While the daemon is running, the other vivado commands execute in it instead
+    of starting Vivado, with the project already open, also across ipbb invocations.
+    Commands are executed one invocation at a time.
+    '''
+    from ..cmds.vivado import daemon
+    return (ictx.command.name, daemon, args, kwargs)
+
+
 # ------------------------------------------------------------------------------
 @vivado.command('ipy', short_help='Start an interactive IPython session.')
 @click.pass_obj
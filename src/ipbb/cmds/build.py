@@ -0,0 +1,441 @@
+# Modules
+import asyncio
+import click
+import collections
+import fnmatch
+import ipbb
+import json
+import os
+import psutil
+import subprocess
+import sys
+import time
+
+# Elements
+from os.path import join, abspath, dirname
+from rich.live import Live
+from rich.table import Table
+
+from ..console import cprint, console
+from ..context import ProjectInfo
+from ..defaults import kBuildLogFile, kBuildSummaryFile, kBuildStepMarker, kBuildStepMarkerVar
+from ..tools.pstree import ProcessTreeAnalyzer
+from ..utils import mkdir, raiseError
+
+# Vivado steps executed by default, in order
+kDefaultSteps = ('generate-project', 'synth', 'impl', 'bitfile', 'package')
+# Steps taking the number of parallel jobs of launch_runs
+kJobSteps = ('synth', 'impl')
+# ipbb command line, run with the current interpreter
+kIpbbCommand = (sys.executable, '-c', 'from ipbb.scripts.builder import main; main()')
+
+_statusStyles = {
+    'pending': 'white',
+    'running': 'cyan',
+    'done': 'green',
+    'failed': 'red',
+    'cancelled': 'yellow',
+}
+
+
+# ------------------------------------------------------------------------------
+def _formatTime(aSeconds):
+    return time.strftime('%H:%M:%S', time.gmtime(aSeconds))
+
+
+# ------------------------------------------------------------------------------
+def _formatMemory(aBytes):
+    return f'{aBytes / 2**30:.1f} GiB'
+
+
+# ------------------------------------------------------------------------------
+def _treeMemory(aProcess):
+    """
+    Resident memory of a process and of its children, in bytes
+    """
+    try:
+        lSummary = dict(ProcessTreeAnalyzer(aProcess, ['memory_info']).summary())
+    except psutil.Error:
+        return 0
+    return lSummary['memory_info'].rss if 'memory_info' in lSummary else 0
+
+
+# ------------------------------------------------------------------------------
+class BuildJob(object):
+    """
+    Build of a project area: a sequence of vivado steps, chained in a single ipbb process
+
+    Attributes:
+        name (str): Project name
+        path (str): Project area path
+        steps (list): Vivado steps
+        status (str): pending, running, done, failed or cancelled
+        step (int): Index of the current step
+        times (dict): Duration of the steps executed, by step name
+        rss (int): Current resident memory of the ipbb process and its children, in bytes
+        peak (int): Peak resident memory, in bytes
+        returncode (int): Exit code of the ipbb process
+    """
+
+    # ------------------------------------------------------------------------------
+    def __init__(self, aName, aPath, aSteps):
+        super().__init__()
+        self.name = aName
+        self.path = aPath
+        self.steps = list(aSteps)
+        self.status = 'pending'
+        self.step = None
+        self.times = {}
+        self.start = None
+        self.end = None
+        self.rss = 0
+        self.peak = 0
+        self.returncode = None
+        self.process = None
+
+    # ------------------------------------------------------------------------------
+    @property
+    def logpath(self):
+        return join(self.path, kBuildLogFile)
+
+    # ------------------------------------------------------------------------------
+    @property
+    def currentstep(self):
+        return self.steps[self.step] if self.step is not None else None
+
+    # ------------------------------------------------------------------------------
+    @property
+    def elapsed(self):
+        if self.start is None:
+            return 0
+        return (self.end if self.end is not None else time.time()) - self.start
+
+    # ------------------------------------------------------------------------------
+    def sample(self):
+        """
+        Updates the memory usage of the running step
+        """
+        if self.process is None:
+            self.rss = 0
+            return
+        self.rss = _treeMemory(self.process)
+        self.peak = max(self.peak, self.rss)
+
+    # ------------------------------------------------------------------------------
+    def todict(self):
+        return {
+            'name': self.name,
+            'status': self.status,
+            'step': self.currentstep if self.status != 'done' else None,
+            'returncode': self.returncode,
+            'start': self.start,
+            'elapsed': self.elapsed,
+            'times': self.times,
+            'peak_memory': self.peak,
+            'log': self.logpath,
+        }
+
+
+# ------------------------------------------------------------------------------
+class BuildScheduler(object):
+    """
+    Builds several projects concurrently, within a CPU and a memory budget.
+
+    Each build is an ipbb vivado command chaining all its steps, hence
+    Vivado is started once per project. The step being executed is followed
+    through the markers ipbb prints at the start of each step.
+
+    A pending build is started when a session is free, when the cores left by
+    the launch_runs jobs of the running builds are enough for its own jobs, and
+    when its memory estimate fits in the budget left by the running builds. Each
+    running build is accounted for the larger of its peak memory and of the estimate.
+    The estimate is the largest peak of the completed builds, the initial
+    estimate until one completes. A build is always started when none is running.
+
+    Attributes:
+        jobs (list): BuildJob objects, in start order
+        sessions (int): Maximum number of concurrent builds
+        numjobs (int): Number of launch_runs jobs of each build
+        cpus (int): Number of cores available
+        memory (int): Memory available to the builds, in bytes
+        interval (float): Memory sampling and display refresh interval, in seconds
+    """
+
+    # Time allowed to an interrupted ipbb process to exit, in seconds
+    kTerminateTimeout = 30
+
+    # ------------------------------------------------------------------------------
+    def __init__(self, aJobs, aSessions, aNumJobs, aCpus, aMemory, aSessionMemory, aEnableIPCache=True, aCommand=kIpbbCommand, aInterval=1):
+        super().__init__()
+        self.jobs = aJobs
+        self.sessions = aSessions
+        self.numjobs = aNumJobs
+        self.cpus = aCpus
+        self.memory = aMemory
+        self.interval = aInterval
+        self._sessionMemory = aSessionMemory
+        self._ipcache = aEnableIPCache
+        self._command = list(aCommand)
+
+        # Let the ipbb processes import this very ipbb, also when found through a relative path
+        self._env = dict(os.environ)
+        self._env[kBuildStepMarkerVar] = '1'
+        self._env['PYTHONPATH'] = os.pathsep.join(
+            p for p in (dirname(dirname(abspath(ipbb.__file__))), os.environ.get('PYTHONPATH')) if p
+        )
+
+    # ------------------------------------------------------------------------------
+    @property
+    def running(self):
+        return [j for j in self.jobs if j.status == 'running']
+
+    # ------------------------------------------------------------------------------
+    @property
+    def estimate(self):
+        """
+        Expected peak memory of a build, in bytes
+        """
+        lPeaks = [j.peak for j in self.jobs if j.status == 'done']
+        return max(lPeaks) if lPeaks else self._sessionMemory
+
+    # ------------------------------------------------------------------------------
+    def canStart(self):
+        lRunning = self.running
+        if not lRunning:
+            return True
+
+        if len(lRunning) >= self.sessions:
+            return False
+
+        if (len(lRunning) + 1) * self.numjobs > self.cpus:
+            return False
+
+        lEstimate = self.estimate
+        return sum(max(j.peak, lEstimate) for j in lRunning) + lEstimate <= self.memory
+
+    # ------------------------------------------------------------------------------
+    def buildCommand(self, aSteps):
+        """
+        ipbb command line chaining the vivado steps, Vivado being started while the dependencies are parsed
+        """
+        lCmd = self._command + ['vivado', '--pool']
+        for lStep in aSteps:
+            lCmd.append(lStep)
+            if lStep in kJobSteps:
+                lCmd += ['-j', str(self.numjobs)]
+            elif lStep == 'generate-project' and self._ipcache:
+                lCmd += ['--enable-ip-cache']
+        return lCmd
+
+    # ------------------------------------------------------------------------------
+    async def _follow(self, aStream, aLog, aStepCallback):
+        """
+        Copies the ipbb output to the log, calling aStepCallback with the name of each step started
+        """
+        lPartial = b''
+        while True:
+            lChunk = await aStream.read(2**16)
+            if not lChunk:
+                break
+            aLog.write(lChunk)
+            aLog.flush()
+
+            *lLines, lPartial = (lPartial + lChunk).split(b'\n')
+            for l in lLines:
+                if l.startswith(kBuildStepMarker.encode() + b' '):
+                    aStepCallback(l.split()[1].decode())
+
+    # ------------------------------------------------------------------------------
+    async def _execute(self, aJob, aCmd, aLog, aStepCallback):
+        lProcess = await asyncio.create_subprocess_exec(
+            *aCmd, cwd=aJob.path, env=self._env,
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+        )
+        try:
+            aJob.process = psutil.Process(lProcess.pid)
+        except psutil.NoSuchProcess:
+            pass
+
+        try:
+            await self._follow(lProcess.stdout, aLog, aStepCallback)
+            return await lProcess.wait()
+        except asyncio.CancelledError:
+            # Give ipbb the time to close Vivado
+            if lProcess.returncode is None:
+                lProcess.terminate()
+                try:
+                    await asyncio.wait_for(lProcess.wait(), self.kTerminateTimeout)
+                except asyncio.TimeoutError:
+                    lProcess.kill()
+            raise
+        finally:
+            aJob.process = None
+            aJob.rss = 0
+
+    # ------------------------------------------------------------------------------
+    async def _build(self, aJob):
+        lStepStart = time.time()
+
+        def startStep(aStep):
+            nonlocal lStepStart
+            if aStep == aJob.currentstep or aStep not in aJob.steps[aJob.step:]:
+                return
+            lNow = time.time()
+            aJob.times[aJob.currentstep] = lNow - lStepStart
+            aJob.step = aJob.steps.index(aStep, aJob.step)
+            lStepStart = lNow
+
+        with open(aJob.logpath, 'wb') as lLog:
+            try:
+                lCmd = self.buildCommand(aJob.steps)
+                lLog.write(('-- ' + ' '.join(lCmd) + '\n').encode())
+                lLog.flush()
+
+                aJob.step = 0
+                lStepStart = time.time()
+                try:
+                    aJob.returncode = await self._execute(aJob, lCmd, lLog, startStep)
+                except OSError as lExc:
+                    lLog.write(f'Failed to start ipbb: {lExc}\n'.encode())
+                    aJob.status = 'failed'
+                else:
+                    aJob.status = 'done' if aJob.returncode == 0 else 'failed'
+                finally:
+                    aJob.times[aJob.currentstep] = time.time() - lStepStart
+            except asyncio.CancelledError:
+                aJob.status = 'cancelled'
+                raise
+            finally:
+                aJob.end = time.time()
+
+    # ------------------------------------------------------------------------------
+    async def run(self, aRefresh=None):
+        """
+        Runs all the builds
+
+        Args:
+            aRefresh (callable, optional): Called at every scheduling pass, e.g. to refresh a display
+        """
+        lPending = collections.deque(j for j in self.jobs if j.status == 'pending')
+        lTasks = set()
+        try:
+            while lPending or lTasks:
+                for j in self.running:
+                    j.sample()
+
+                while lPending and self.canStart():
+                    lJob = lPending.popleft()
+                    lJob.status = 'running'
+                    lJob.start = time.time()
+                    lTasks.add(asyncio.ensure_future(self._build(lJob)))
+
+                if aRefresh is not None:
+                    aRefresh()
+
+                lDone, lTasks = await asyncio.wait(lTasks, timeout=self.interval, return_when=asyncio.FIRST_COMPLETED)
+                for t in lDone:
+                    t.result()
+        finally:
+            for t in lTasks:
+                t.cancel()
+            if lTasks:
+                await asyncio.wait(lTasks)
+            for j in lPending:
+                j.status = 'cancelled'
+
+        if aRefresh is not None:
+            aRefresh()
+
+    # ------------------------------------------------------------------------------
+    def table(self):
+        lTable = Table('project', 'status', 'step', 'elapsed', 'memory', 'peak', title='Build', title_style='blue')
+        for j in self.jobs:
+            lStep = f'{j.currentstep} ({j.step + 1}/{len(j.steps)})' if j.step is not None else ''
+            lTable.add_row(
+                j.name,
+                f"[{_statusStyles[j.status]}]{j.status}[/{_statusStyles[j.status]}]",
+                lStep,
+                _formatTime(j.elapsed),
+                _formatMemory(j.rss) if j.rss else '',
+                _formatMemory(j.peak) if j.peak else '',
+            )
+        lTable.caption = (
+            f'{len(self.running)}/{self.sessions} sessions, {self.numjobs} jobs each, {self.cpus} cores, '
+            f'estimate {_formatMemory(self.estimate)} of {_formatMemory(self.memory)}'
+        )
+        return lTable
+
+    # ------------------------------------------------------------------------------
+    def summary(self):
+        return {
+            'steps': self.jobs[0].steps if self.jobs else [],
+            'sessions': self.sessions,
+            'jobs': self.numjobs,
+            'cpus': self.cpus,
+            'memory': self.memory,
+            'projects': [j.todict() for j in self.jobs],
+        }
+
+
+# ------------------------------------------------------------------------------
+def build(ictx, aProjects, aSteps, aSessions, aNumJobs, aCpus, aMaxMemory, aSessionMemory, aEnableIPCache, aSummary):
+    '''Builds several Vivado projects concurrently'''
+
+    if ictx.work.path is None:
+        raiseError("Build area root directory not found")
+
+    lVivadoProjects = [
+        p for p in sorted(ictx.projects)
+        if ProjectInfo(join(ictx.projdir, p)).settings.get('toolset') == 'vivado'
+    ]
+
+    if aProjects:
+        lSelected = []
+        for lPattern in aProjects:
+            lMatches = fnmatch.filter(lVivadoProjects, lPattern)
+            if not lMatches:
+                raiseError(f"No Vivado project matching '{lPattern}'")
+            lSelected += [p for p in lMatches if p not in lSelected]
+    else:
+        lSelected = lVivadoProjects
+
+    if not lSelected:
+        raiseError("No Vivado project found in the work area")
+
+    lCpus = aCpus if aCpus else os.cpu_count()
+    lMemory = int(aMaxMemory * 2**30) if aMaxMemory else psutil.virtual_memory().available
+    lSessions = aSessions if aSessions else max(1, lCpus // aNumJobs)
+
+    if aEnableIPCache:
+        # Shared by all projects, see vivado generate-project
+        mkdir(join(ictx.work.path, 'var', 'vivado-ip-cache'))
+
+    lScheduler = BuildScheduler(
+        [BuildJob(p, join(ictx.projdir, p), aSteps) for p in lSelected],
+        lSessions, aNumJobs, lCpus, lMemory, int(aSessionMemory * 2**30), aEnableIPCache
+    )
+
+    cprint(f"Building {len(lSelected)} projects: {', '.join(aSteps)}", style='cyan')
+    lStart = time.time()
+    with Live(lScheduler.table(), console=console, refresh_per_second=1) as lLive:
+        try:
+            asyncio.run(lScheduler.run(lambda: lLive.update(lScheduler.table())))
+        finally:
+            lSummaryPath = aSummary if aSummary else join(ictx.work.path, 'var', kBuildSummaryFile)
+            mkdir(dirname(abspath(lSummaryPath)))
+            lSummary = lScheduler.summary()
+            lSummary.update(start=lStart, elapsed=time.time() - lStart)
+            with open(lSummaryPath, 'w') as f:
+                json.dump(lSummary, f, indent=2)
+
+    lFailed = [j for j in lScheduler.jobs if j.status != 'done']
+    cprint(
+        f"{len(lSelected) - len(lFailed)}/{len(lSelected)} projects built in {_formatTime(time.time() - lStart)}. "
+        f"Summary written to {lSummaryPath}",
+        style='green' if not lFailed else 'yellow'
+    )
+
+    if lFailed:
+        for j in lFailed:
+            cprint(f"  {j.name}: {j.status} at {j.currentstep}, see {j.logpath}", style='red')
+        raise click.ClickException(f"{len(lFailed)} project builds failed")
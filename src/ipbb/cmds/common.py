@@ -9,7 +9,7 @@ from rich.text import Text
 from os.path import join, split, exists, abspath, splitext, relpath, basename
 
 from ..console import cprint, console
-from ..defaults import kProjAreaFile, kProjUserFile
+from ..defaults import kProjAreaFile, kProjUserFile, kHashCacheFile
 from ..utils import DirSentry, formatDictTable
 from ..utils import which
 
@@ -55,6 +55,16 @@ def user_config(ictx, aList, aAdd, aUnset):
         cprint(formatDictTable(ictx.currentproj.usersettings))
 
 
+# ------------------------------------------------------------------------------
+def contentHasher(ictx, aAlgo='sha1'):
+    '''Returns a ContentHasher caching the file digests in the work area, when there is one'''
+
+    from ..tools.hashing import ContentHasher
+
+    lCachePath = join(ictx.work.path, 'var', kHashCacheFile) if ictx.work.path is not None else None
+    return ContentHasher(aAlgo, lCachePath)
+
+
 # ------------------------------------------------------------------------------
 def addrtab(ictx, aDest):
     '''Copy address table files into addrtab subfolder'''
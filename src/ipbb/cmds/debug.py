@@ -52,6 +52,7 @@ def test_vivado_formatter(ictx):
     out.write('WARNING: this is a warning message \n')
     out.write('CRITICAL WARNING: this is a critical warning message \n')
     out.write('ERROR: this is an error message \n')
+    out.flush(True)
 
 
 # ------------------------------------------------------------------------------
@@ -4,7 +4,6 @@
 import click
 import os
 import sh
-import hashlib
 import collections
 import contextlib
 import sys
@@ -18,21 +17,30 @@ from os.path import (
     abspath,
     splitext,
     relpath,
-    isfile,
-    isdir,
 )
 from ..console import cprint, console
 from ..utils import which, SmartOpen
 from ..depparser import DepFormatter, dep_command_types
+from .common import contentHasher
 from ..utils import DirSentry, printDictTable, printAlienTable, formatAlienTable
 from rich.table import Table, Column
 from rich.padding import Padding
 from rich.panel import Panel
 
 # ------------------------------------------------------------------------------
-def dep(ictx, proj):
+def dep(ictx, proj, jobs, profile, profile_sort, profile_dump):
     '''Dependencies command group'''
 
+    ictx.depThreads = jobs
+
+    if profile:
+        from ..depparser import DepParserProfiler
+        ictx.depProfiler = DepParserProfiler()
+        # Report once the subcommand has parsed the tree
+        click.get_current_context().call_on_close(
+            lambda: reportProfile(ictx.depProfiler, profile_sort, profile_dump, ictx.srcdir)
+        )
+
     lProj = proj if proj is not None else ictx.currentproj.name
     if lProj is not None:
         # Change directory before executing subcommand
@@ -50,6 +58,22 @@ def dep(ictx, proj):
 # ------------------------------------------------------------------------------
 
 
+# ------------------------------------------------------------------------------
+def reportProfile(aProfiler, aSortBy, aDumpPath, aRootDir):
+    '''Prints the dep parsing profile and optionally dumps it to file'''
+
+    if not aProfiler.files:
+        cprint('No dep file was parsed, nothing to profile', style='yellow')
+        return
+
+    cprint(aProfiler.table(aSortBy, aRootDir))
+
+    if aDumpPath is not None:
+        with open(aDumpPath, 'w') as lDumpFile:
+            aProfiler.dump(lDumpFile)
+        cprint(f"Profiling statistics written to {aDumpPath}")
+
+
 # ------------------------------------------------------------------------------
 def report(ictx, filters):
     '''Summarise the dependency tree of the current project'''
@@ -167,6 +191,9 @@ def ls(ictx, group: str, output: str):
     :rtype:     None
     '''
 
+    # Only one group is needed, leave the others unresolved
+    ictx.depLazy = True
+
     with SmartOpen(output) as lWriter:
         for f in ictx.depParser.commands[group]:
             lWriter(f.filepath)
@@ -194,6 +221,33 @@ def components(ictx, output: str):
 
 # ------------------------------------------------------------------------------
 
+# ------------------------------------------------------------------------------
+def export(ictx, fmt: str, output: str):
+    """
+    Export the resolved dependency tree
+
+    :param      ictx:    The ictx
+    :type       ictx:    { type_description }
+    :param      fmt:     The output format, json or msgpack
+    :type       fmt:     str
+    :param      output:  The output
+    :type       output:  str
+    """
+    from ..depparser import DepTreeExporter
+
+    lExporter = DepTreeExporter(ictx.depParser)
+
+    lBinary = (fmt == 'msgpack')
+    try:
+        if output is None:
+            lExporter.write(sys.stdout.buffer if lBinary else sys.stdout, fmt)
+        else:
+            with open(output, 'wb' if lBinary else 'w') as lFile:
+                lExporter.write(lFile, fmt)
+    except RuntimeError as lExc:
+        raise click.ClickException(str(lExc))
+
+
 # ------------------------------------------------------------------------------
 @contextlib.contextmanager
 def set_env(**environ):
@@ -220,64 +274,22 @@ def set_env(**environ):
 
 
 # ------------------------------------------------------------------------------
-# ----------------------------
-def hash_and_update0g(
-    aFilePath, aChunkSize=0x10000, aUpdateHashes=None, aAlgo=hashlib.sha1
-):
-
-    # New instance of the selected algorithm
-    lHash = aAlgo()
-
-    # Loop ovet the file content
-    with open(aFilePath, "rb") as f:
-        for lChunk in iter(lambda: f.read(aChunkSize), b''):
-            lHash.update(lChunk)
-
-            # Also update other hashes
-            for lUpHash in aUpdateHashes:
-                lUpHash.update(lChunk)
-
-    return lHash
-
-
-# ----------------------------
-
-
-# ----------------------------
-def hash_and_update(aPath, aChunkSize=0x10000, aUpdateHashes=None, aAlgo=hashlib.sha1):
-
-    # New instance of the selected algorithm
-    lHash = aAlgo()
-
-    if isfile(aPath):
-        # Loop ovet the file content
-        with open(aPath, "rb") as f:
-            for lChunk in iter(lambda: f.read(aChunkSize), b''):
-                lHash.update(lChunk)
-
-                # Also update other hashes
-                for lUpHash in aUpdateHashes:
-                    lUpHash.update(lChunk)
-    elif isdir(aPath):
-        for root, dirs, files in os.walk(aPath):
-            for f in files:
-                hash_and_update(f, aChunkSize, aUpdateHashes=aUpdateHashes, aAlgo=aAlgo)
-
-    return lHash
-
-
-# ----------------------------
-
-
 def hash(ictx, output, verbose):
 
     lAlgoName = 'sha1'
 
-    lAlgo = getattr(hashlib, lAlgoName, None)
+    lHasher = contentHasher(ictx, lAlgoName)
 
-    # Ensure that the selecte algorithm exists
-    if lAlgo is None:
-        raise AttributeError('Hashing algorithm {0} is not available'.format(lAlgoName))
+    lGrpDigests = collections.OrderedDict()
+    for lGrp, lCmds in ictx.depParser.commands.items():
+        lGrpDigests[lGrp] = list(zip(lCmds, lHasher.hashmany(c.filepath for c in lCmds)))
+
+    try:
+        lHasher.save()
+    except OSError as lExc:
+        cprint(f"WARNING: failed to update the hash cache: {lExc}", style='yellow')
+
+    lProjHash = lHasher.combine(d for l in lGrpDigests.values() for _, d in l)
 
     with SmartOpen(output) as lWriter:
 
@@ -290,32 +302,19 @@ def hash(ictx, output, verbose):
             lWriter("# " + "=" * len(lTitle))
             lWriter()
 
-        lProjHash = lAlgo()
-        lGrpHashes = collections.OrderedDict()
-        for lGrp, lCmds in ictx.depParser.commands.items():
-            lGrpHash = lAlgo()
-            if verbose:
+            for lGrp, lDigests in lGrpDigests.items():
                 lWriter("#" + "-" * 79)
                 lWriter("# " + lGrp)
                 lWriter("#" + "-" * 79)
-            for lCmd in lCmds:
-                lCmdHash = hash_and_update(
-                    lCmd.filepath, aUpdateHashes=[lProjHash, lGrpHash], aAlgo=lAlgo
-                ).hexdigest()
-                if verbose:
-                    lWriter(lCmdHash, lCmd.filepath)
-
-            lGrpHashes[lGrp] = lGrpHash
-
-            if verbose:
+                for lCmd, lDigest in lDigests:
+                    lWriter(lDigest, lCmd.filepath)
                 lWriter()
 
-        if verbose:
             lWriter("#" + "-" * 79)
             lWriter("# Per cmd-group hashes")
             lWriter("#" + "-" * 79)
-            for lGrp, lHash in lGrpHashes.items():
-                lWriter(lHash.hexdigest(), lGrp)
+            for lGrp, lDigests in lGrpDigests.items():
+                lWriter(lHasher.combine(d for _, d in lDigests).hexdigest(), lGrp)
             lWriter()
 
             lWriter("#" + "-" * 79)
@@ -22,6 +22,9 @@ def gendecoders(ictx, aCheckUpToDate, aForce):
 
     lDecodersDir = 'decoders'
 
+    # Only address tables are needed, leave the other groups unresolved
+    ictx.depLazy = True
+
     with DirSentry(ictx.currentproj.path):
         sh.rm('-rf', lDecodersDir)
         # Gather address tables
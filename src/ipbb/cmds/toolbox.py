@@ -10,7 +10,7 @@ from rich.prompt import Confirm
 from os.path import basename, dirname, relpath, abspath, exists, splitext, join, isabs, sep, isdir, isfile
 
 from ..console import cprint, console
-from ..depparser import Pathmaker, DepFileParser
+from ..depparser import Pathmaker, DepFileParser, DepParserProfiler
 from rich.table import Table, Column
 from rich.padding import Padding
 
@@ -26,7 +26,7 @@ def toolbox(env):
 
 
 # ------------------------------------------------------------------------------
-def check_depfile(env, verbose, toolset, component, depfile):
+def check_depfile(env, verbose, toolset, component, depfile, profile=False, profile_sort='total', profile_dump=None):
     '''Perform basic checks on dependency files'''
 
     lPackage, lComponent = component
@@ -35,12 +35,20 @@ def check_depfile(env, verbose, toolset, component, depfile):
 
     lPathMaker = Pathmaker(env.srcdir, env._verbosity)
 
+    lParser = DepFileParser(toolset, lPathMaker)
+    lProfiler = DepParserProfiler() if profile else None
+    if lProfiler is not None:
+        lProfiler.attach(lParser)
+
     try:
-        lParser = DepFileParser(toolset, lPathMaker)
         lParser.parse(lPackage, lComponent, depfile)
     except OSError as lExc:
         raise click.ClickException("Failed to parse dep file - '{}'".format(lExc))
 
+    if lProfiler is not None:
+        from .dep import reportProfile
+        reportProfile(lProfiler, profile_sort, profile_dump, env.srcdir)
+
     cprint()
 
     # N.B. Rest of this function is heavily based on implementation of 'dep report' command; assuming
@@ -1,5 +1,6 @@
 
 # Modules
+import asyncio
 import click
 import os
 import sys
@@ -10,23 +11,32 @@ import socket
 import yaml
 import re
 import cerberus
+import json
+import subprocess
+import psutil
 
 # Elements
 from os.path import join, split, exists, splitext, abspath, basename
 from collections import OrderedDict
+from contextlib import contextmanager
 from copy import deepcopy
 from rich.table import Table
 
 from .schema import project_schema, validate
 from .dep import hash
+from .common import contentHasher
 
 from ..console import cprint, console
 from ..utils import which, SmartOpen, mkdir
 from ..utils import ensureNoParsingErrors, ensureNoMissingFiles, logVivadoConsoleError
 
 from ..generators.vivadoproject import VivadoProjectGenerator
-from ..tools.xilinx import VivadoSession, VivadoSessionManager, VivadoConsoleError, VivadoSnoozer, VivadoProject
-from ..defaults import kTopEntity
+from ..tools.xilinx import VivadoSession, VivadoSessionManager, VivadoConsolePool, VivadoConsole, VivadoConsoleError, VivadoSnoozer, VivadoProject, VivadoCommandBatch
+from ..tools.xilinx import AsyncVivadoConsole, AsyncVivadoProject, isRunDone
+from ..tools.xilinx.vivado_server import VivadoClient, VivadoDaemonBusyError, daemonSocketPath
+from ..tools.xilinx.vivado_scheduler import RunMemoryHistory, RunMemorySampler, RunScheduler
+from ..tools.xilinx.vivado_common import VivadoOutputFormatter
+from ..defaults import kTopEntity, kProjFingerprintFile, kRunMemoryFile
 
 
 _toolset='vivado'
@@ -79,7 +89,57 @@ def ensureVivadoProjPath(aProjPath: str):
         raise click.ClickException("Vivado project %s does not exist" % aProjPath)
 
 # ------------------------------------------------------------------------------
-def vivado(ictx, proj, verbosity, cmdlist):
+@contextmanager
+def messageIndexDump(ictx, aConsole, aRuns):
+    """Context manager writing the message index of a console session to the products folder on exit.
+
+    The messages of the session are completed with those found in the logs of
+    the runs, executed in separate Vivado processes.
+
+    Args:
+        ictx (ipbb.Context): Context object
+        aConsole (VivadoConsole): Console object
+        aRuns (list): Names of the runs
+    """
+    try:
+        yield
+    finally:
+        try:
+            lIndex = aConsole.messages
+            for lRun in aRuns:
+                lLogPath = join(ictx.vivadoProjPath, ictx.currentproj.name + '.runs', lRun, 'runme.log')
+                if exists(lLogPath):
+                    with open(lLogPath, errors='replace') as lLog:
+                        lIndex.scan(lLog, VivadoOutputFormatter.classify, lRun + ' runme.log')
+
+            mkdir(ictx.vivadoProdPath)
+            lPath = f'{ictx.vivadoProdFileBase}_{lIndex.session}_messages.json'
+            lIndex.dump(lPath)
+            cprint(
+                f"Messages: {lIndex.count('ERROR')} errors, {lIndex.count('CRITICAL WARNING')} critical warnings, "
+                f"{lIndex.count('WARNING')} warnings. Index written to {lPath}"
+            )
+        except (OSError, RuntimeError) as lExc:
+            cprint(f"Failed to write the message index: {lExc}", style='yellow')
+
+
+# ------------------------------------------------------------------------------
+def runMemorySampler(ictx, aConsole):
+    """Returns a RunMemorySampler recording the memory of the project runs in the project area history.
+
+    Args:
+        ictx (ipbb.Context): Context object
+        aConsole (VivadoConsole): Console object
+    """
+    return RunMemorySampler(
+        aConsole.processinfo,
+        join(ictx.vivadoProjPath, ictx.currentproj.name + '.runs'),
+        RunMemoryHistory(join(ictx.currentproj.path, kRunMemoryFile)),
+    )
+
+
+# ------------------------------------------------------------------------------
+def vivado(ictx, proj, verbosity, aPool, cmdlist):
     '''Vivado command group
     
     Args:
@@ -87,6 +147,8 @@ def vivado(ictx, proj, verbosity, cmdlist):
         ictx (ipbb.Context): Context object
         proj (str): Project name
         verbosity (str): Verbosity level
+        aPool (bool): Start Vivado in the background, taken by the first session
+        cmdlist (list): Names of the chained subcommands
     
     Raises:
         click.ClickException: Undefined project area
@@ -94,6 +156,15 @@ def vivado(ictx, proj, verbosity, cmdlist):
 
     ictx.vivadoEcho = (verbosity == 'all')
 
+    lKeep = True
+    lLogLabel = None if not lKeep else '_'.join( cmdlist )
+
+    # Start Vivado while the dep tree is parsed
+    # The chained commands share one console, hence a pool of one
+    if aPool:
+        ictx.vivadoPool = VivadoConsolePool(1, echo=ictx.vivadoEcho, loglabel=lLogLabel + '_pool')
+        ictx.vivadoPool.warm()
+
     # lProj = proj if proj is not None else ictx.currentproj.name
     if proj is not None:
         # Change directory before executing subcommand
@@ -108,23 +179,23 @@ def vivado(ictx, proj, verbosity, cmdlist):
     
     validate(_schema, ictx.depParser.settings, _toolset)
 
-    lKeep = True
-    lLogLabel = None if not lKeep else '_'.join( cmdlist )
-
     # Command-specific ictx variables
     ictx.vivadoProjPath = join(ictx.currentproj.path, ictx.currentproj.name)
     ictx.vivadoProjFile = join(ictx.vivadoProjPath, ictx.currentproj.name +'.xpr')
     ictx.vivadoProdPath = join(ictx.currentproj.path, 'products')
     ictx.vivadoProdFileBase = join(ictx.vivadoProdPath, ictx.currentproj.name)
 
-    ictx.vivadoSessions = VivadoSessionManager(keep=lKeep, loglabel=lLogLabel)
+    # Use the project area daemon, if running
+    ictx.vivadoSessions = VivadoSessionManager(
+        keep=lKeep, loglabel=lLogLabel, socket=daemonSocketPath(ictx.currentproj.path), pool=ictx.vivadoPool
+    )
 
     ensureVivado(ictx)
 
 
 
 # ------------------------------------------------------------------------------
-def genproject(ictx, aEnableIPCache, aOptimise, aToScript, aToStdout):
+def genproject(ictx, aEnableIPCache, aOptimise, aToScript, aToStdout, aUpdate=False):
     '''Make the Vivado project from sources described by dependency files.'''
 
     lSessionId = 'generate-project'
@@ -143,21 +214,68 @@ def genproject(ictx, aEnableIPCache, aOptimise, aToScript, aToStdout):
     lVivadoIPCache = join(ictx.work.path, 'var', 'vivado-ip-cache') if aEnableIPCache else None
     lVivadoGen = VivadoProjectGenerator(ictx.currentproj, lVivadoIPCache, aOptimise)
 
-    if aToScript or aToStdout:
+    # Fingerprint of the project inputs, round-tripped to compare with the stored one
+    lHasher = contentHasher(ictx)
+    lFingerprint = json.loads(json.dumps(
+        lVivadoGen.fingerprint(lDepFileParser.settings, lDepFileParser.commands, lHasher.hashmany),
+        default=str
+    ))
+    try:
+        lHasher.save()
+    except OSError:
+        pass
+
+    lFingerprintPath = join(ictx.vivadoProjPath, kProjFingerprintFile)
+    lOldFingerprint = None
+    if aUpdate and exists(ictx.vivadoProjFile) and exists(lFingerprintPath):
+        try:
+            with open(lFingerprintPath) as lFile:
+                lOldFingerprint = json.load(lFile)
+        except (OSError, ValueError):
+            pass
+
+    if lOldFingerprint == lFingerprint:
+        console.log(
+            f"{ictx.currentproj.name}: Project up to date, nothing to do.",
+            style='green',
+        )
+        return
+
+    # Changes limited to design and simulation sources can be applied to the existing project
+    lDelta = lOldFingerprint is not None and lOldFingerprint['project'] == lFingerprint['project']
+
+    lDryRun = aToScript or aToStdout
+    if lDryRun:
         # Dry run
         lConsoleCtx = SmartOpen(aToScript if not aToStdout else None)
     else:
         lConsoleCtx = ictx.vivadoSessions.getctx(lSessionId)
+        # The stored fingerprint is valid only once the project is generated
+        if exists(lFingerprintPath):
+            os.remove(lFingerprintPath)
 
     try:
         with lConsoleCtx as lConsole:
-            lVivadoGen.write(
-                lConsole,
-                lDepFileParser.settings,
-                lDepFileParser.packages,
-                lDepFileParser.commands,
-                lDepFileParser.libs,
-            )
+            # A long-lived console, such as the daemon's, may still have the project open
+            if not lDryRun:
+                lProject = VivadoProject(lConsole)
+                if lProject.current():
+                    lProject.close()
+
+            # Send the project commands to Vivado in a single block
+            lOutput = lConsole if lDryRun else VivadoCommandBatch(lConsole)
+            if lDelta:
+                lVivadoGen.writeDelta(lOutput, lOldFingerprint, lFingerprint, lDepFileParser.commands)
+            else:
+                lVivadoGen.write(
+                    lOutput,
+                    lDepFileParser.settings,
+                    lDepFileParser.packages,
+                    lDepFileParser.commands,
+                    lDepFileParser.libs,
+                )
+            if not lDryRun:
+                lOutput.flush()
 
     except VivadoConsoleError as lExc:
         logVivadoConsoleError(lExc)
@@ -169,9 +287,15 @@ def genproject(ictx, aEnableIPCache, aOptimise, aToScript, aToStdout):
         )
         cprint(lExc)
         raise click.Abort()
-    
+
+    if lDryRun:
+        return
+
+    with open(lFingerprintPath, 'w') as lFile:
+        json.dump(lFingerprint, lFile, indent=1)
+
     console.log(
-        f"{ictx.currentproj.name}: Project created successfully.",
+        f"{ictx.currentproj.name}: Project {'updated' if lDelta else 'created'} successfully.",
         style='green',
     )
     # -------------------------------------------------------------------------
@@ -210,8 +334,135 @@ def checksyntax(ictx):
         style='green',
     )
 
+# ------------------------------------------------------------------------------
+def makeScheduleTable(aWaves, aScheduler):
+    lTable = Table('Wave', 'Runs', 'Estimated memory', title='OOC runs schedule')
+    for i, lWave in enumerate(aWaves):
+        lMemory = sum(aScheduler.history.estimate(r) for r in lWave)
+        lTable.add_row(str(i + 1), ' '.join(lWave), f'{lMemory / 2**30:.1f} GiB')
+    lTable.caption = f'{aScheduler.cpus} cores, {aScheduler.memory / 2**30:.1f} GiB available'
+    return lTable
+
+
+# ------------------------------------------------------------------------------
+def launchOOCWaves(ictx, aConsole, aProject, aSampler, aNumJobs):
+    '''Runs the out-of-date OOC runs in waves fitting the cores and memory available
+
+    The remaining runs are scheduled again after each wave, with the memory
+    measured meanwhile.
+
+    Args:
+        ictx (ipbb.Context): Context object
+        aConsole (VivadoConsole): Console object
+        aProject (VivadoProject): Project object
+        aSampler (RunMemorySampler): Sampler of the project runs memory
+        aNumJobs (int): Maximum number of runs in a wave, None for the number of cores
+
+    Returns:
+        int: Number of cores used by the scheduler
+
+    Raises:
+        RuntimeError: An OOC run failed
+    '''
+    lOOCRegex = re.compile(r'.*_synth_\d+')
+    lCpus = min(aNumJobs, os.cpu_count()) if aNumJobs is not None else os.cpu_count()
+
+    with VivadoSnoozer(aConsole):
+        lRunProps = aProject.readRunInfo()
+    lPending = [
+        k for k, v in lRunProps.items()
+        if lOOCRegex.match(k) and (not v['STATUS'].startswith('synth_design Complete!') or v['NEEDS_REFRESH'] == '1')
+    ]
+
+    lWave = 0
+    lPlanned = None
+    while lPending:
+        lScheduler = RunScheduler(aSampler.history, lCpus, psutil.virtual_memory().available)
+        lWaves = lScheduler.plan(lPending)
+        if lWaves != lPlanned:
+            cprint(makeScheduleTable(lWaves, lScheduler), style='light_sky_blue1')
+
+        lWave += 1
+        # Complete runs are relaunched only once reset
+        for lRun in lWaves[0]:
+            if lRunProps[lRun]['STATUS'].startswith('synth_design Complete!'):
+                aConsole('reset_run {}'.format(lRun))
+
+        cprint(f"Launching OOC runs wave {lWave}: {' '.join(lWaves[0])}", style='cyan')
+        aConsole('launch_runs {} -jobs {}'.format(' '.join(lWaves[0]), len(lWaves[0])))
+        for lRun in lWaves[0]:
+            aConsole('wait_on_run {}'.format(lRun))
+
+        with VivadoSnoozer(aConsole):
+            lRunProps = aProject.readRunInfo()
+        lRunsInError = [k for k in lWaves[0] if lRunProps[k]['STATUS'] == 'synth_design ERROR']
+        if lRunsInError:
+            raise RuntimeError("Detected runs in ERROR {}. Exiting".format(', '.join(lRunsInError)))
+
+        lPending = [r for r in lPending if r not in lWaves[0]]
+        lPlanned = lWaves[1:]
+
+    return lCpus
+
+
+# Interval between the polls of the run status, in seconds
+kRunPollInterval = 10
+
+
+# ------------------------------------------------------------------------------
+def monitorRun(aConsole, aProject, aRun, aUpdateInt, aReport):
+    """
+    Waits for a run to be done, reporting the properties of the runs every aUpdateInt minutes
+
+    Local consoles are polled by an asynchronous console attached to the
+    Vivado process, which is never left blocked in wait_on_run and notices
+    the end of the run within kRunPollInterval. Daemon consoles wait in
+    wait_on_run with a timeout instead.
+
+    Args:
+        aConsole (VivadoConsole): Console object
+        aProject (VivadoProject): Project helper of the console
+        aRun (str): Name of the run
+        aUpdateInt (int): Interval between reports, in minutes
+        aReport (callable): Called with the run properties and the resource usage, None if not sampled
+    """
+
+    async def poll():
+        lProject = AsyncVivadoProject(AsyncVivadoConsole.attach(aConsole))
+        lNext = 0
+
+        def report(aRunProps, aUsage):
+            nonlocal lNext
+            if time.monotonic() >= lNext or isRunDone(aRunProps[aRun]):
+                aReport(aRunProps, aUsage)
+                lNext = time.monotonic() + aUpdateInt * 60
+
+        await lProject.monitorRun(aRun, min(kRunPollInterval, aUpdateInt * 60), report)
+
+    if isinstance(aConsole, VivadoConsole):
+        with VivadoSnoozer(aConsole):
+            asyncio.run(poll())
+    else:
+        while True:
+            with VivadoSnoozer(aConsole):
+                lRunProps = aProject.readRunInfo()
+            aReport(lRunProps, None)
+            if isRunDone(lRunProps[aRun]):
+                break
+            aConsole('wait_on_run {} -timeout {}'.format(aRun, aUpdateInt))
+
+    # Returns immediately, reporting the errors of the run as the console does
+    aConsole('wait_on_run {}'.format(aRun))
+
+
+# ------------------------------------------------------------------------------
+def printUsage(aUsage):
+    if aUsage is not None:
+        cprint(f"Vivado and runs: CPU {aUsage['cpu']:.0f}%, memory {aUsage['rss'] / 2**30:.1f} GiB", style='light_sky_blue1')
+
+
 # -------------------------------------
-def synth(ictx, aNumJobs, aUpdateInt):
+def synth(ictx, aNumJobs, aUpdateInt, aSchedule=False):
     '''Run synthesis'''
 
     lSessionId = 'synth'
@@ -231,12 +482,12 @@ def synth(ictx, aNumJobs, aUpdateInt):
     lSynthRun = 'synth_1'
 
     try:
-        with ictx.vivadoSessions.getctx(lSessionId) as lConsole:
+        with ictx.vivadoSessions.getctx(lSessionId) as lConsole, messageIndexDump(ictx, lConsole, [lSynthRun]), runMemorySampler(ictx, lConsole) as lSampler:
             # Open the project
             lProject = VivadoProject(lConsole, ictx.vivadoProjFile)
 
             with VivadoSnoozer(lConsole):
-                lRunProps = { k: v for k, v in readRunInfo(lConsole).items() if lOOCRegex.match(k) }
+                lRunProps = { k: v for k, v in lProject.readRunInfo().items() if lOOCRegex.match(k) }
 
             # Reset all OOC synthesis which might are stuck in a running state
             lIPRunsToReset = [
@@ -252,6 +503,9 @@ def synth(ictx, aNumJobs, aUpdateInt):
                 )
                 lConsole('reset_run {}'.format(run))
 
+            if aSchedule:
+                lArgs = ['-jobs {}'.format(launchOOCWaves(ictx, lConsole, lProject, lSampler, aNumJobs))]
+
             # Reset and launch synth_1
             lConsole('reset_run {}'.format(lSynthRun))
             lConsole('launch_runs {} {}'.format(lSynthRun, ' '.join(lArgs)))
@@ -262,12 +516,9 @@ def synth(ictx, aNumJobs, aUpdateInt):
                 lConsole('wait_on_run synth_1')
             else:
                 cprint(f"Starting run monitoring loop, update interval: {aUpdateInt} min(s)", style='cyan')
-                while True:
 
-                    with VivadoSnoozer(lConsole):
-                        lRunProps = readRunInfo(lConsole)
-
-                    lOOCRunProps = { k: v for k, v in lRunProps.items() if lOOCRegex.match(k) }
+                def report(aRunProps, aUsage):
+                    lOOCRunProps = { k: v for k, v in aRunProps.items() if lOOCRegex.match(k) }
                     # Reset all OOC synthesis which might are stuck in a running state
                     lPendingOOCRuns = [
                         k for k, v in lOOCRunProps.items()
@@ -279,19 +530,16 @@ def synth(ictx, aNumJobs, aUpdateInt):
                     else:
                         cprint(f"OOC runs: {len(lOOCRunProps)} completed.", style='light_sky_blue1')
 
-                    lSynthProps = { k: v for k, v in lRunProps.items() if k == lSynthRun }
+                    lSynthProps = { k: v for k, v in aRunProps.items() if k == lSynthRun }
 
                     cprint(makeRunsTable(lSynthProps), style='light_sky_blue1')
+                    printUsage(aUsage)
 
-                    lRunsInError = [ k for k, v in lRunProps.items() if v['STATUS'] == 'synth_design ERROR']
+                    lRunsInError = [ k for k, v in aRunProps.items() if v['STATUS'] == 'synth_design ERROR']
                     if lRunsInError:
                         raise RuntimeError("Detected runs in ERROR {}. Exiting".format(', '.join(lRunsInError)))
 
-                    # Synthesis finished, get out of there
-                    if lRunProps['synth_1']['PROGRESS'] == '100%':
-                        break
-
-                    lConsole('wait_on_run synth_1 -timeout {}'.format(aUpdateInt))
+                monitorRun(lConsole, lProject, lSynthRun, aUpdateInt, report)
 
     except VivadoConsoleError as lExc:
         logVivadoConsoleError(lExc)
@@ -314,7 +562,7 @@ def synth(ictx, aNumJobs, aUpdateInt):
 
 
 # ------------------------------------------------------------------------------
-def impl(ictx, aNumJobs, aStopOnTimingErr):
+def impl(ictx, aNumJobs, aStopOnTimingErr, aUpdateInt):
     '''
     Launch an implementation run
     '''
@@ -334,7 +582,7 @@ def impl(ictx, aNumJobs, aStopOnTimingErr):
         lStopOn = ['Timing 38-282']  # Force error when timing is not met
 
     try:
-        with ictx.vivadoSessions.getctx(lSessionId) as lConsole:
+        with ictx.vivadoSessions.getctx(lSessionId) as lConsole, messageIndexDump(ictx, lConsole, ['impl_1']), runMemorySampler(ictx, lConsole):
 
             # Open the project
             lProject = VivadoProject(lConsole, ictx.vivadoProjFile)
@@ -342,13 +590,21 @@ def impl(ictx, aNumJobs, aStopOnTimingErr):
             # Change message severity to ERROR for the isses we're interested in
             lConsole.changeMsgSeverity(lStopOn, "ERROR")
 
-            for c in (
-                    'reset_run impl_1',
-                    'launch_runs impl_1'
-                    + (' -jobs {}'.format(aNumJobs) if aNumJobs is not None else ''),
-                    'wait_on_run impl_1',
-                ):
-                lConsole(c)
+            lConsole('reset_run impl_1')
+            lConsole('launch_runs impl_1' + (' -jobs {}'.format(aNumJobs) if aNumJobs is not None else ''))
+
+            # Monitor the implementation run progress
+            if not aUpdateInt:
+                cprint("Run monitoring disabled", style='cyan')
+                lConsole('wait_on_run impl_1')
+            else:
+                cprint(f"Starting run monitoring loop, update interval: {aUpdateInt} min(s)", style='cyan')
+
+                def report(aRunProps, aUsage):
+                    cprint(makeRunsTable({ k: v for k, v in aRunProps.items() if k == 'impl_1' }), style='light_sky_blue1')
+                    printUsage(aUsage)
+
+                monitorRun(lConsole, lProject, 'impl_1', aUpdateInt, report)
 
     except VivadoConsoleError as lExc:
         logVivadoConsoleError(lExc)
@@ -528,37 +784,11 @@ def memcfg(ictx):
             style='green'
         )
 
-# ------------------------------------------------------------------------------
-def readRunInfo(aConsole, aProps=None):
-    lInfos = {}
-    lProps = aProps if aProps is not None else [
-        'STATUS',
-        'NEEDS_REFRESH',
-        'PROGRESS',
-        # 'IS_IMPLEMENTATION',
-        # 'IS_SYNTHESIS',
-        'STATS.ELAPSED',
-        # 'STATS.ELAPSED',
-    ]
-
-    # Gather data about existing runs
-    lRuns = aConsole('get_runs')[0].split()
-
-    for lRun in sorted(lRuns):
-
-        lValues = (
-                aConsole('get_property {0} [get_runs {1}]'.format(p, lRun))[0]
-                for p in lProps
-            )
-        lInfos[lRun] = OrderedDict(zip(lProps, lValues))
-
-    return lInfos
-
 # ------------------------------------------------------------------------------
 def makeRunsTable(aInfos, title=None):
-    lSummary = Table("Run", *list(next(iter(aInfos.values()))), title=title)
     if not aInfos:
-        return lSummary
+        return Table("Run", title=title)
+    lSummary = Table("Run", *list(next(iter(aInfos.values()))), title=title)
 
     for lRun in sorted(aInfos):
         lInfo = aInfos[lRun]
@@ -784,6 +1014,87 @@ def archive(ictx):
 
 # ------------------------------------------------------------------------------
 
+# ------------------------------------------------------------------------------
+def daemon(ictx, action, aTimeout):
+    '''Start, stop or query the Vivado daemon of the project area'''
+
+    lSessionId = 'daemon'
+    lSocketPath = daemonSocketPath(ictx.currentproj.path)
+    lLogPath = join(ictx.currentproj.path, 'ipbb_daemon.log')
+
+    try:
+        lClient = VivadoClient.connect(lSocketPath, sid=lSessionId, echo=ictx.vivadoEcho)
+    except VivadoDaemonBusyError:
+        if action == 'status':
+            cprint(f"{ictx.currentproj.name}: Vivado daemon running, busy serving another client.", style='yellow')
+            return
+        raise click.ClickException(f"{ictx.currentproj.name}: Vivado daemon busy serving another client, try again later")
+
+    if action == 'status':
+        if lClient is None:
+            cprint(f"{ictx.currentproj.name}: Vivado daemon not running.")
+            return
+        lProject = VivadoProject(lClient)
+        with VivadoSnoozer(lClient):
+            lCurrent = lProject.current()
+        cprint(
+            f"{ictx.currentproj.name}: Vivado daemon running, {lClient.variant} {lClient.version} "
+            f"(pid {lClient.processinfo.pid}), project {lCurrent if lCurrent else 'none'}."
+        )
+        lClient.close()
+
+    elif action == 'stop':
+        if lClient is None:
+            cprint(f"{ictx.currentproj.name}: Vivado daemon not running.")
+            return
+        lClient.quit()
+        console.log(f"{ictx.currentproj.name}: Vivado daemon stopped.", style='green')
+
+    elif action == 'start':
+        if lClient is not None:
+            lClient.close()
+            cprint(f"{ictx.currentproj.name}: Vivado daemon already running.", style='yellow')
+            return
+
+        ensureVivado(ictx)
+
+        # Detach the daemon from the terminal, so that it survives this ipbb invocation
+        with open(lLogPath, 'w') as lLog:
+            lProcess = subprocess.Popen(
+                [sys.executable, '-m', 'ipbb.tools.xilinx.vivado_server', lSocketPath],
+                cwd=ictx.currentproj.path,
+                stdin=subprocess.DEVNULL,
+                stdout=lLog,
+                stderr=subprocess.STDOUT,
+                start_new_session=True,
+            )
+
+        lStart = time.time()
+        while lClient is None:
+            if lProcess.poll() is not None:
+                raise click.ClickException(f"Vivado daemon failed to start, see {lLogPath}")
+            if time.time() - lStart > aTimeout:
+                lProcess.terminate()
+                raise click.ClickException(f"Vivado daemon not responding after {aTimeout}s, see {lLogPath}")
+            time.sleep(0.5)
+            lClient = VivadoClient.connect(lSocketPath, sid=lSessionId, echo=ictx.vivadoEcho)
+
+        try:
+            # Have the project ready for the next commands
+            if exists(ictx.vivadoProjFile):
+                VivadoProject(lClient, ictx.vivadoProjFile)
+        except VivadoConsoleError as lExc:
+            logVivadoConsoleError(lExc)
+            raise click.Abort()
+        finally:
+            lClient.close()
+
+        console.log(
+            f"{ictx.currentproj.name}: Vivado daemon started, {lClient.variant} {lClient.version} (pid {lClient.processinfo.pid}).",
+            style='green',
+        )
+
+
 # ------------------------------------------------------------------------------
 def ipy(ictx):
 
@@ -8,7 +8,7 @@ from .. import utils
 from os import walk, getcwd
 from os.path import join, split, exists, splitext, basename, dirname
 
-from ..defaults import kWorkAreaFile, kProjAreaFile, kProjUserFile, kSourceDir, kProjDir
+from ..defaults import kWorkAreaFile, kProjAreaFile, kProjUserFile, kSourceDir, kProjDir, kDepCacheFile
 from ..console import cprint
 
 
@@ -208,6 +208,16 @@ class Context(object):
 
     _verbosity = 0
     printExceptionStack = False
+    # Reuse the dep tree cached in the project area, when up to date
+    depCache = True
+    # Number of threads reading dep files ahead of the parser, 0 to disable
+    depThreads = 0
+    # Resolve the paths of each dep command group only when first accessed
+    depLazy = False
+    # If defined, DepParserProfiler instrumenting the dep parser
+    depProfiler = None
+    # If defined, VivadoConsolePool providing the consoles of the vivado commands
+    vivadoPool = None
 
     # ----------------------------------------------------------------------------
     def __init__(self, wd=getcwd()):
@@ -276,16 +286,33 @@ class Context(object):
     def depParser(self):
         if self._depParser is None:
 
-            from ..depparser import DepFileParser
+            from ..depparser import DepFileParser, DepTreeCache
 
             self._depParser = DepFileParser(
                 self.currentproj.settings['toolset'],
                 self.pathMaker,
                 aVerbosity=self._verbosity,
+                aThreads=self.depThreads,
+                aLazy=self.depLazy,
             )
 
+            lTop = (
+                self.currentproj.settings['topPkg'],
+                self.currentproj.settings['topCmp'],
+                self.currentproj.settings['topDep'],
+            )
+            if self.depProfiler is not None:
+                self.depProfiler.attach(self._depParser)
+
+            # Bypass the cache when profiling, the tree must be parsed
+            lUseCache = self.depCache and self.depProfiler is None
+            lCache = DepTreeCache(join(self.currentproj.path, kDepCacheFile)) if lUseCache else None
+
             try:
-                self._depParser.parse( self.currentproj.settings['topPkg'], self.currentproj.settings['topCmp'], self.currentproj.settings['topDep'],)
+                if lCache is None or not lCache.load(self._depParser, *lTop):
+                    self._depParser.parse(*lTop)
+                    if lCache is not None:
+                        lCache.save(self._depParser, *lTop)
             except OSError:
                 pass
 
@@ -3,7 +3,15 @@ kWorkAreaFile = '.ipbb_work.yml'
 kProjAreaFile = '.ipbb_proj.yml'
 kProjUserFile = '.ipbb_user.yml'
 kRepoSetupFile = '.ipbb_setup.yml'
+kDepCacheFile = '.ipbb_deptree.cache'
 kSourceDir = 'src'
 kProjDir = 'proj'
 kTopDep = 'top'
 kTopEntity = 'top'
+kHashCacheFile = 'hashes.json'
+kProjFingerprintFile = '.ipbb_fingerprint.json'
+kBuildLogFile = 'ipbb_build.log'
+kBuildSummaryFile = 'build_summary.json'
+kBuildStepMarker = '@ipbb@step'
+kBuildStepMarkerVar = 'IPBB_STEP_MARKERS'
+kRunMemoryFile = '.ipbb_run_memory.json'
@@ -1,6 +1,9 @@
 
 from ._fileparser import DepFileParser, DepFormatter, dep_file_types
 from ._pathmaker import Pathmaker
+from ._cache import DepTreeCache
+from ._exporter import DepTreeExporter
+from ._profiler import DepParserProfiler
 from ._definitions import *
 from ._formatters import *
 from ._definitions import dep_command_types
\ No newline at end of file
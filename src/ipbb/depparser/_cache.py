@@ -0,0 +1,171 @@
+import os
+import pickle
+
+from os.path import exists
+from .. import __version__
+
+
+# -----------------------------------------------------------------------------
+class DepTreeCache(object):
+    """
+    Persistent, on-disk, cache of the dependency tree resolved by DepFileParser.
+
+    The parser results are stored together with a manifest of everything the
+    parsing outcome depends on: the parser configuration (toolset, command-line
+    variables, top-level dep file), the size and modification time of every dep file
+    in the tree and the modification time of every directory glob expressions were
+    matched against. If the manifest no longer matches the work area, the cached
+    tree is restored and only the dep files affected by the changes are re-parsed.
+
+    Attributes:
+        path (str): Path of the cache file
+    """
+
+    # Bump whenever the layout of the cached objects changes
+    _kFormat = 5
+
+    # Parser attributes saved in and restored from the cache
+    _kStateAttrs = (
+        'depfile',
+        '_depregistry',
+        'settings',
+        'libs',
+        'packages',
+        'commands',
+        'unresolved',
+        'errors',
+        '_top',
+        '_assignlog',
+    )
+
+    # -----------------------------------------------------------------------------
+    def __init__(self, aPath):
+        super().__init__()
+        self.path = aPath
+
+    # -----------------------------------------------------------------------------
+    @staticmethod
+    def _statfile(aPath):
+        try:
+            s = os.stat(aPath)
+        except OSError:
+            return None
+        return (s.st_mtime_ns, s.st_size)
+
+    # -----------------------------------------------------------------------------
+    @staticmethod
+    def _statdir(aPath):
+        try:
+            return os.stat(aPath).st_mtime_ns
+        except OSError:
+            return None
+
+    # -----------------------------------------------------------------------------
+    def _key(self, aParser, aPackage, aComponent, aDepFileName):
+        return (
+            self._kFormat,
+            __version__,
+            aParser.rootdir,
+            aParser._toolset,
+            aParser._variables,
+            (aPackage, aComponent, aDepFileName),
+        )
+
+    # -----------------------------------------------------------------------------
+    def _manifest(self, aParser):
+        lDepFiles = {p: self._statfile(p) for p in aParser._depregistry}
+
+        lGlobDirs = set()
+        for f in aParser._depregistry.values():
+            lGlobDirs.update(f.globdirs)
+
+        return lDepFiles, {d: self._statdir(d) for d in lGlobDirs}
+
+    # -----------------------------------------------------------------------------
+    def _changes(self, aManifest):
+        lDepFiles, lGlobDirs = aManifest
+
+        lChangedFiles = [p for p, s in lDepFiles.items() if self._statfile(p) != s]
+        lChangedDirs = [d for d, s in lGlobDirs.items() if self._statdir(d) != s]
+
+        return lChangedFiles, lChangedDirs
+
+    # -----------------------------------------------------------------------------
+    def load(self, aParser, aPackage, aComponent, aDepFileName):
+        """
+        Restores the cached dependency tree into a freshly created parser.
+        Dep files affected by changes in the work area are re-parsed and the cache updated.
+
+        Args:
+            aParser (DepFileParser): Target parser
+            aPackage (str): Top-level package
+            aComponent (str): Top-level component
+            aDepFileName (str): Top-level dep file
+
+        Returns:
+            bool: True if the cached tree was restored, False otherwise
+        """
+        if not exists(self.path):
+            return False
+
+        try:
+            with open(self.path, 'rb') as lFile:
+                lKey, lManifest, lState = pickle.load(lFile)
+        except Exception:
+            # Unreadable or incompatible cache, ignore it
+            return False
+
+        if lKey != self._key(aParser, aPackage, aComponent, aDepFileName):
+            return False
+
+        for a, v in zip(self._kStateAttrs, lState):
+            setattr(aParser, a, v)
+
+        lChangedFiles, lChangedDirs = self._changes(lManifest)
+        if lChangedFiles or lChangedDirs:
+            aParser.reparse(lChangedFiles, lChangedDirs)
+            self.save(aParser, aPackage, aComponent, aDepFileName)
+
+        return True
+
+    # -----------------------------------------------------------------------------
+    def save(self, aParser, aPackage, aComponent, aDepFileName):
+        """
+        Stores the parser results in the cache file.
+        Trees with parsing errors or unresolved command groups are not cached.
+
+        Args:
+            aParser (DepFileParser): Parser holding the results of a complete parse
+            aPackage (str): Top-level package
+            aComponent (str): Top-level component
+            aDepFileName (str): Top-level dep file
+
+        Returns:
+            bool: True if the cache was written
+        """
+        if aParser.errors or aParser.pending:
+            return False
+
+        lKey = self._key(aParser, aPackage, aComponent, aDepFileName)
+        lState = tuple(getattr(aParser, a) for a in self._kStateAttrs)
+
+        # Write to a temporary file first, the cache is replaced only if pickling succeeds
+        lTmpPath = self.path + '.tmp'
+        try:
+            with open(lTmpPath, 'wb') as lFile:
+                pickle.dump((lKey, self._manifest(aParser), lState), lFile, pickle.HIGHEST_PROTOCOL)
+            os.replace(lTmpPath, self.path)
+        except (OSError, pickle.PicklingError, TypeError, AttributeError):
+            if exists(lTmpPath):
+                os.remove(lTmpPath)
+            return False
+
+        return True
+
+    # -----------------------------------------------------------------------------
+    def clear(self):
+        """
+        Removes the cache file, if present.
+        """
+        if exists(self.path):
+            os.remove(self.path)
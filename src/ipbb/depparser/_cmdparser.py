@@ -1,7 +1,39 @@
 
 import argparse
+import re
+import shlex
 from ._cmdtypes import Command, IncludeCommand, SrcCommand, HlsSrcCommand, SetupCommand, AddrtabCommand
 
+# -----------------------------------------------------------------------------
+# Characters requiring the full shlex tokenizer
+_kShlexChars = re.compile(r'[\'"\\]')
+_kWords = re.compile(r'[^ \t\r\n]+')
+
+
+def tokenize(aLine):
+    """
+    Splits a dep line into tokens, using shlex only when quotes or escapes are present
+    """
+    if _kShlexChars.search(aLine) is None:
+        return _kWords.findall(aLine)
+    return shlex.split(aLine)
+
+
+# -----------------------------------------------------------------------------
+def splitComponent(aValue):
+    """
+    Splits <module>:<component> into a (module, component) tuple.
+    Returns None if the value is malformed
+    """
+    if aValue.count(':') > 1:
+        return None
+
+    lTokenized = aValue.split(':')
+    if len(lTokenized) == 1:
+        lTokenized.insert(0, None)
+    return tuple(lTokenized)
+
+
 # -----------------------------------------------------------------------------
 class ComponentAction(argparse.Action):
     '''
@@ -13,17 +45,12 @@ class ComponentAction(argparse.Action):
 
     def __call__(self, parser, namespace, values, option_string=None):
 
-        lSeparators = values.count(':')
+        result = splitComponent(values)
         # Validate the format
-        if lSeparators > 1:
+        if result is None:
             raise argparse.ArgumentTypeError(
                 'Malformed component name : %s. Expected <module>:<component>' % values)
 
-        lTokenized = values.split(':')
-        if len(lTokenized) == 1:
-            lTokenized.insert(0, None)
-        result = tuple(lTokenized)
-
         if not self.append:
             setattr(namespace, self.dest, result)
         else:
@@ -44,11 +71,14 @@ class UseInAction(argparse.Action):
         self._choices = ['synth', 'sim']
         self.default = self._choices
 
+    def invalid(self, tokens):
+        return [t for t in tokens if t not in self._choices]
+
     def __call__(self, parser, namespace, values, option_string=None):
 
         tokens = values.split(',')
 
-        lInvalid = [t for t in tokens if t not in self._choices]
+        lInvalid = self.invalid(tokens)
         if lInvalid:
             raise ValueError('Invalid source types '+','.join(lInvalid))
 
@@ -136,12 +166,121 @@ class DepCmdParser(argparse.ArgumentParser):
             '*'       : lambda a : Command(a.cmd, a.file, a.component[0], a.component[1], a.cd),
         }
 
+        # Fast-path tables, derived from the sub-parsers definitions
+        self._fasttables = {
+            lName: self._mkFastTable(lSubParser)
+            for lName, lSubParser in parser_add.choices.items()
+        }
 
     # --------------------------------------------------------------
+    @staticmethod
+    def _mkFastTable(aSubParser):
+        """
+        Builds the lookup table of a sub-command for the fast-path parser
+
+        Returns:
+            tuple: (option string -> action, positional action, defaults) or None
+            if the sub-parser uses actions the fast-path does not know about.
+        """
+        lOptions = {}
+        lPositional = None
+        lDefaults = {}
+        for lAction in aSubParser._actions:
+            if isinstance(lAction, argparse._HelpAction):
+                # Leave -h to argparse
+                continue
+
+            if not isinstance(lAction, (argparse._StoreAction, argparse._StoreTrueAction, ComponentAction, UseInAction)):
+                return None
+
+            lDefaults[lAction.dest] = lAction.default
+            if lAction.option_strings:
+                for o in lAction.option_strings:
+                    lOptions[o] = lAction
+            else:
+                lPositional = lAction
+
+        return lOptions, lPositional, lDefaults
 
-    def parseLine(self, *args, **kwargs):
+    # --------------------------------------------------------------
+    def _fastParse(self, aTokens):
+        """
+        Table-driven parser for the common forms of dep commands.
+
+        Returns None whenever the line is not a plain sequence of known options
+        followed or preceded by the target files, leaving it to argparse to
+        produce the result or the error message.
+        """
+        if not aTokens:
+            return None
+
+        lTable = self._fasttables.get(aTokens[0])
+        if lTable is None:
+            return None
+        lOptions, lPositional, lDefaults = lTable
+
+        lArgs = dict(lDefaults)
+        lArgs['cmd'] = aTokens[0]
+        lFiles = []
+        lFilesDone = False
+
+        lIter = iter(aTokens[1:])
+        for lToken in lIter:
+            if lToken[:1] != '-' or lToken == '-':
+                if lFilesDone:
+                    # Positionals split by options
+                    return None
+                lFiles.append(lToken)
+                continue
+
+            # Close the positionals group, if any
+            lFilesDone = bool(lFiles)
+
+            lValue = None
+            if lToken.startswith('--') and '=' in lToken:
+                lToken, lValue = lToken.split('=', 1)
+
+            lAction = lOptions.get(lToken)
+            if lAction is None:
+                return None
+
+            if isinstance(lAction, argparse._StoreTrueAction):
+                if lValue is not None:
+                    return None
+                lArgs[lAction.dest] = True
+                continue
+
+            if lValue is None:
+                lValue = next(lIter, None)
+                if lValue is None or lValue[:1] == '-':
+                    return None
+
+            if isinstance(lAction, ComponentAction):
+                lValue = splitComponent(lValue)
+                if lValue is None:
+                    return None
+                if lAction.append:
+                    lArgs[lAction.dest] = (lArgs[lAction.dest] or []) + [lValue]
+                    continue
+            elif isinstance(lAction, UseInAction):
+                lValue = lValue.split(',')
+                if lAction.invalid(lValue):
+                    return None
+
+            lArgs[lAction.dest] = lValue
+
+        if lPositional.nargs == '+' and not lFiles:
+            return None
+        lArgs[lPositional.dest] = lFiles
+
+        return argparse.Namespace(**lArgs)
+
+    # --------------------------------------------------------------
+    def parseLine(self, aTokens):
 
-        args = self.parse_args(*args, **kwargs)
+        args = self._fastParse(aTokens)
+        if args is None:
+            args = self.parse_args(aTokens)
 
         cmd = args.cmd if args.cmd in self.callbacks else '*'
         return self.callbacks[cmd](args)
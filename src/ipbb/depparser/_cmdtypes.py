@@ -8,6 +8,9 @@ class Command(object):
         package   (str): package the target belongs to.
         component (str): component withon 'Package' the target belongs to
     """
+    __slots__ = ('cmd', 'filepath', 'package', 'component', 'cd')
+    # All the fields of the class, including the inherited ones
+    _kFields = __slots__
 
     # --------------------------------------------------------------
     def __init__(self, aCmd, aFilePath, aPackage, aComponent, aCd):
@@ -35,6 +38,15 @@ class Command(object):
     def __eq__(self, other):
         return (self.filepath == other.filepath)
 
+    # --------------------------------------------------------------
+    def __hash__(self):
+        # Consistent with __eq__. filepath is a list of expressions until resolved
+        return hash(self._hashablepath())
+
+    # --------------------------------------------------------------
+    def _hashablepath(self):
+        return tuple(self.filepath) if isinstance(self.filepath, list) else self.filepath
+
     # --------------------------------------------------------------
     def __lt__(self, other):
         return (self.filepath < other.filepath)
@@ -47,8 +59,24 @@ class Command(object):
     def extra(self):
         return None
 
+    # --------------------------------------------------------------
+    def replace(self, **kwargs):
+        """
+        Returns a shallow copy of the command, with the given fields replaced
+        """
+        lCmd = object.__new__(type(self))
+        for f in self._kFields:
+            setattr(lCmd, f, kwargs.pop(f) if f in kwargs else getattr(self, f))
+
+        if kwargs:
+            raise TypeError('Unknown {} fields: {}'.format(type(self).__name__, ', '.join(kwargs)))
+        return lCmd
+
+    # --------------------------------------------------------------
+    def todict(self):
+        return {f: getattr(self, f) for f in self._kFields}
+
     __repr__ = __str__
-    __hash__ = object.__hash__
 
 
 # -----------------------------------------------------------------------------
@@ -66,6 +94,9 @@ class SrcCommand(Command):
         useinsim   (bool): use this files in sim
         simflags   (str):  flags to be passed to Modelsim/Questasim
     """
+    __slots__ = ('lib', 'vhdl2008', 'useInSynth', 'useInSim', 'simflags')
+    _kFields = Command._kFields + __slots__
+
     # --------------------------------------------------------------
     def __init__(self, aCmd, aFilePath, aPackage, aComponent, aCd, aLib, aVhdl2008, aUseInSynth, aUseInSim, aSimflags):
         super().__init__(aCmd, aFilePath, aPackage, aComponent, aCd)
@@ -92,7 +123,9 @@ class SrcCommand(Command):
     def __eq__(self, other):
         return (self.filepath == other.filepath) and (self.lib == other.lib) and (self.simflags == other.simflags)
 
-    __hash__ = object.__hash__
+    # --------------------------------------------------------------
+    def __hash__(self):
+        return hash((self._hashablepath(), self.lib, self.simflags))
 
 # -----------------------------------------------------------------------------
 class HlsSrcCommand(Command):
@@ -107,6 +140,9 @@ class HlsSrcCommand(Command):
         csimflags  (str):  c compiler flags in simulation
         testbench  (bool): this file is a testbench
     """
+    __slots__ = ('cflags', 'csimflags', 'testbench', 'includeComponents')
+    _kFields = Command._kFields + __slots__
+
     def __init__(self, aCmd, aFilePath, aPackage, aComponent, aCd, aCFlags, aCSimFlags, aTestBench, aIncludeComps):
         super().__init__(aCmd, aFilePath, aPackage, aComponent, aCd)
         self.cflags = aCFlags
@@ -138,6 +174,9 @@ class SetupCommand(Command):
         component (str):  component withon 'Package' the target belongs to
         finalise  (bool): setup-only flag, identifies setup scripts to be executed at the end
     """
+    __slots__ = ('finalize',)
+    _kFields = Command._kFields + __slots__
+
     # --------------------------------------------------------------
     def __init__(self, aCmd, aFilePath, aPackage, aComponent, aCd, aFinalise):
         super().__init__(aCmd, aFilePath, aPackage, aComponent, aCd)
@@ -160,6 +199,9 @@ class AddrtabCommand(Command):
         component (str):  component withon 'Package' the target belongs to
         toplevel  (bool): addrtab-only flag, identifies address table as top-level
     """
+    __slots__ = ('toplevel',)
+    _kFields = Command._kFields + __slots__
+
     # --------------------------------------------------------------
     def __init__(self, aCmd, aFilePath, aPackage, aComponent, aCd, aTopLevel):
         super().__init__(aCmd, aFilePath, aPackage, aComponent, aCd)
@@ -178,6 +220,9 @@ class IncludeCommand(Command):
         package   (str):  package the target belongs to.
         component (str):  component withon 'Package' the target belongs to
     """
+    __slots__ = ('depfile',)
+    _kFields = Command._kFields + __slots__
+
     def __init__(self, aCmd, aFilePath, aPackage, aComponent, aCd, aDepFileObj=None):
         super().__init__(aCmd, aFilePath, aPackage, aComponent, aCd)
         self.depfile = aDepFileObj
@@ -0,0 +1,113 @@
+import json
+
+from ._cmdtypes import IncludeCommand
+
+
+# -----------------------------------------------------------------------------
+class DepTreeExporter(object):
+    """
+    Serializes the results of a DepFileParser in a single, machine-readable, document.
+
+    The document holds the top-level dep file, the settings, the include graph
+    (one node per dep file, with the paths of the files it includes), the
+    resolved commands by group, packages, libraries, errors and unresolved entries.
+    """
+
+    # Bump whenever the layout of the exported document changes
+    kVersion = 1
+    kFormats = ('json', 'msgpack')
+
+    # -----------------------------------------------------------------------------
+    def __init__(self, aParser):
+        super().__init__()
+        self.parser = aParser
+
+    # -----------------------------------------------------------------------------
+    @staticmethod
+    def _cmdtodict(aCmd):
+        d = aCmd.todict()
+        if isinstance(aCmd, IncludeCommand):
+            d['depfile'] = aCmd.depfile.path if aCmd.depfile is not None else None
+        d['flags'] = aCmd.flags()
+        return d
+
+    # -----------------------------------------------------------------------------
+    def todict(self):
+        lParser = self.parser
+
+        lTop = dict(zip(('package', 'component', 'depfile'), lParser._top)) if lParser._top else None
+
+        lDepFiles = [
+            {
+                'path': f.path,
+                'package': f.pkg,
+                'component': f.cmp,
+                'name': f.name,
+                'includes': [c.path for c in f.children],
+                'globdirs': sorted(f.globdirs),
+            }
+            for f in lParser._depregistry.values()
+        ]
+
+        lErrors = [
+            {
+                'package': pkg,
+                'component': cmp,
+                'name': name,
+                'depfile': path,
+                'line': lineNr,
+                'text': line,
+                'error': str(exc),
+            }
+            for pkg, cmp, name, path, lineNr, line, exc in lParser.errors
+        ]
+
+        lUnresolved = [
+            {
+                'expr': expr,
+                'cmd': cmd,
+                'package': pkg,
+                'component': cmp,
+                'deppackage': depPkg,
+                'depcomponent': depCmp,
+                'depfile': depPath,
+            }
+            for expr, cmd, pkg, cmp, depPkg, depCmp, depPath in lParser.unresolved
+        ]
+
+        return {
+            'version': self.kVersion,
+            'rootdir': lParser.rootdir,
+            'toolset': lParser._toolset,
+            'top': lTop,
+            'settings': lParser.settings.dict(),
+            'depfiles': lDepFiles,
+            'commands': {
+                g: [self._cmdtodict(c) for c in cmds]
+                for g, cmds in lParser.commands.items()
+            },
+            'packages': lParser.packages,
+            'libs': sorted(lParser.libs),
+            'errors': lErrors,
+            'unresolved': lUnresolved,
+        }
+
+    # -----------------------------------------------------------------------------
+    def write(self, aStream, aFormat='json'):
+        """
+        Writes the document to a stream
+
+        Args:
+            aStream (file): Destination, a text stream for json and a binary one for msgpack
+            aFormat (str): Output format, 'json' or 'msgpack'
+        """
+        if aFormat == 'json':
+            json.dump(self.todict(), aStream, indent=1, default=str)
+        elif aFormat == 'msgpack':
+            try:
+                import msgpack
+            except ImportError as lExc:
+                raise RuntimeError("Exporting to msgpack requires the 'msgpack' python package") from lExc
+            msgpack.pack(self.todict(), aStream, default=str)
+        else:
+            raise ValueError('Unknown export format ' + aFormat)
@@ -2,21 +2,56 @@
 import argparse
 import os
 import glob
-import copy
 import string
 import re
-import shlex
+import time
+import threading
 
 from ._definitions import dep_file_types, dep_command_types
-from ._pathmaker import Pathmaker
-from ._cmdparser import ComponentAction, DepCmdParser, DepCmdParserError
+from ._pathmaker import Pathmaker, NoDefaultExtension
+from ._cmdparser import ComponentAction, DepCmdParser, DepCmdParserError, tokenize
 from ._cmdtypes import SrcCommand, IncludeCommand
 
 from ..console import cprint, console
-from ..tools.alien import AlienTree, AlienTemplate
+from ..tools.alien import AlienTree, AlienTemplate, substituteTemplate
 
 from collections import OrderedDict
-from os.path import exists, splitext, sep
+from concurrent.futures import ThreadPoolExecutor
+from os.path import exists, splitext, sep, dirname, join, isdir
+
+
+# -----------------------------------------------------------------------------
+# Assignment directive
+# group 1: settings name
+# group 2: invalid setting name
+# group 3: rest of the line
+_kAssignPattern = re.compile(r'^(?:([a-zA-Z][a-zA-Z0-9_]*(?:\.[a-zA-Z][a-zA-Z0-9_]*)*)|([^=\n\s]*))\s*=\s*(.*)?$')
+
+# Builtins available to assignment and conditional expressions
+_kExprGlobals = {
+    '__builtins__': {
+        n: __builtins__[n] if isinstance(__builtins__, dict) else getattr(__builtins__, n)
+        for n in (
+            'abs', 'all', 'any', 'bool', 'dict', 'float', 'int', 'len', 'list', 'max', 'min',
+            'print', 'range', 'round', 'set', 'sorted', 'str', 'sum', 'tuple', 'zip',
+        )
+    }
+}
+
+
+# -----------------------------------------------------------------------------
+def _globDirs(aPathExpr):
+    """
+    Returns the directories listed when globbing a path expression: the deepest
+    directory not containing wildcards and the directories matching each wildcard level
+    """
+    lDirs = set()
+    lDir = dirname(aPathExpr)
+    while glob.has_magic(lDir):
+        lDirs.update(d for d in glob.glob(lDir) if isdir(d))
+        lDir = dirname(lDir)
+    lDirs.add(lDir)
+    return lDirs
 
 
 # -----------------------------------------------------------------------------
@@ -24,11 +59,7 @@ def _copyUpdateCommand(aCmd, aFilePath, aPkg, aCmp):
     """
     Utility function to update parsed commands
     """
-    cmd = copy.deepcopy(aCmd)
-    cmd.filepath = aFilePath
-    cmd.package = aPkg
-    cmd.component = aCmp
-    return cmd
+    return aCmd.replace(filepath=aFilePath, package=aPkg, component=aCmp)
 
 
 # -----------------------------------------------------------------------------
@@ -45,7 +76,15 @@ class DepFile(object):
         self.errors = list()
         self.unresolved = list()
         self.children = list()
+        # Number of settings assignments processed when each of the children was included
+        self.includemarks = list()
         self.parents = list()
+        # Directories whose listing determines the outcome of the glob expressions in this file
+        self.globdirs = set()
+        # Number of settings assignments processed before this file was parsed
+        self.mark = 0
+        # Number of settings assignments processed once this file and its includes were parsed
+        self.end = 0
 
     # -----------------------------------------------------------------------------
     def __str__(self):
@@ -99,11 +138,180 @@ class State(object):
 # -----------------------------------------------------------------------------
 
 
+# -----------------------------------------------------------------------------
+class PendingCommand(object):
+    """
+    Parsed dep command whose paths are resolved when its group is first accessed.
+    Placeholder for the resolved commands in the entries of lazily parsed dep files.
+    """
+    __slots__ = ('parsed', 'depfile', 'package', 'component', 'resolved')
+
+    def __init__(self, aParsedCmd, aDepFile, aPackage, aComponent):
+        self.parsed = aParsedCmd
+        self.depfile = aDepFile
+        self.package = aPackage
+        self.component = aComponent
+        # Resolved commands, None until resolved
+        self.resolved = None
+
+    @property
+    def cmd(self):
+        return self.parsed.cmd
+
+
+# -----------------------------------------------------------------------------
+class LazyCommandGroups(dict):
+    """
+    Dictionary of commands by group, resolving each group on first access
+    """
+
+    def __init__(self, aGroups, aResolve):
+        super().__init__((g, None) for g in aGroups)
+        self._resolve = aResolve
+
+    def __getitem__(self, aGroup):
+        lCmds = super().__getitem__(aGroup)
+        if lCmds is None:
+            lCmds = self._resolve(aGroup)
+            super().__setitem__(aGroup, lCmds)
+        return lCmds
+
+    def __iter__(self):
+        return iter(list(super().keys()))
+
+    def get(self, aGroup, aDefault=None):
+        return self[aGroup] if aGroup in self else aDefault
+
+    def values(self):
+        return [self[g] for g in self]
+
+    def items(self):
+        return [(g, self[g]) for g in self]
+
+
+# -----------------------------------------------------------------------------
+class Prefetcher(object):
+    """
+    Reads dep files in a pool of threads, ahead of the parser.
+
+    Every file read is tokenized and parsed line by line, the files the include
+    commands point to are in turn submitted for reading and the directories the
+    commands refer to are listed into the Pathmaker cache. Lines depending on
+    settings substitutions are neither parsed nor followed. The scan is only a
+    guess: the parser still processes the files serially and in order, taking
+    the contents and the parsed commands from here when available.
+    """
+    def __init__(self, aPathmaker, aParseLine, aThreads):
+        super().__init__()
+        self._pathMaker = aPathmaker
+        self._parseLine = aParseLine
+        self._pool = ThreadPoolExecutor(aThreads)
+        self._futures = {}
+        # Parsed commands, by stripped line
+        self._commands = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    # -----------------------------------------------------------------------------
+    def _submit(self, aFunc, *aArgs):
+        # Scans still running when the parser is done must not submit to the pool being shut down
+        with self._lock:
+            if self._closed:
+                return None
+            return self._pool.submit(aFunc, *aArgs)
+
+    # -----------------------------------------------------------------------------
+    def submit(self, aPackage, aComponent, aDepFileName):
+        lDepFilePath = self._pathMaker.getPath(aPackage, aComponent, 'include', aDepFileName)
+        with self._lock:
+            if self._closed or lDepFilePath in self._futures:
+                return
+            self._futures[lDepFilePath] = self._pool.submit(self._read, lDepFilePath, aPackage, aComponent)
+
+    # -----------------------------------------------------------------------------
+    def lines(self, aDepFilePath):
+        """
+        Returns the lines of a dep file, or None if the file was not prefetched
+        """
+        with self._lock:
+            lFuture = self._futures.get(aDepFilePath)
+        return lFuture.result() if lFuture is not None else None
+
+    # -----------------------------------------------------------------------------
+    def command(self, aLine):
+        """
+        Returns the command parsed from a line, or None if the line was not parsed ahead
+        """
+        return self._commands.get(aLine)
+
+    # -----------------------------------------------------------------------------
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+        self._pool.shutdown(wait=True)
+        self._futures = {}
+        self._commands = {}
+
+    # -----------------------------------------------------------------------------
+    def _read(self, aDepFilePath, aPackage, aComponent):
+        try:
+            with open(aDepFilePath) as lDepFile:
+                lLines = lDepFile.readlines()
+        except OSError:
+            return None
+
+        for lLine in lLines:
+            self._scan(lLine, aPackage, aComponent)
+        return lLines
+
+    # -----------------------------------------------------------------------------
+    def _scan(self, aLine, aPackage, aComponent):
+        lLine = aLine.strip()
+        if not lLine or lLine[0] in '#@' or '$' in lLine:
+            return
+
+        # Follow conditional lines, whatever the condition
+        if lLine[0] == '?':
+            lTokens = lLine.split('?', 2)
+            if len(lTokens) != 3:
+                return
+            lLine = lTokens[2].strip()
+
+        try:
+            lCmd = self._parseLine(tokenize(lLine))
+        except Exception:
+            return
+        self._commands[lLine] = lCmd
+
+        lPackage = lCmd.package if lCmd.package else aPackage
+        if lCmd.component:
+            lComponent = lCmd.component
+        else:
+            lComponent = aComponent if lPackage == aPackage else ''
+
+        try:
+            lNames = lCmd.filepath if lCmd.filepath else self._pathMaker.getDefNames(lCmd.cmd, lComponent.split(sep)[-1])
+        except NoDefaultExtension:
+            return
+
+        for lName in lNames:
+            lDir = dirname(self._pathMaker.getPath(lPackage, lComponent, lCmd.cmd, lName, cd=lCmd.cd))
+            if not glob.has_magic(lDir):
+                self._submit(self._pathMaker._listdir, lDir)
+
+            if lCmd.cmd == 'include' and not glob.has_magic(lName):
+                self.submit(lPackage, lComponent, join(lCmd.cd, lName) if lCmd.cd else lName)
+# -----------------------------------------------------------------------------
+
+
 # -----------------------------------------------------------------------------
 class DepFileParser(object):
     """
     Dependency file parser class
     """
+    # Code objects of the assignment and conditional expressions, shared by all parsers
+    _exprcache = {}
+
     # -----------------------------------------------------------------------------
     @staticmethod
     def forwardparsing(aDepFileName):
@@ -118,48 +326,122 @@ class DepFileParser(object):
         return self._pathMaker._rootdir
 
     # -----------------------------------------------------------------------------
-    def __init__(self, aToolSet, aPathmaker, aVariables={}, aVerbosity=0):
+    def __init__(self, aToolSet, aPathmaker, aVariables={}, aVerbosity=0, aThreads=0, aLazy=False):
         # --------------------------------------------------------------
         # Member variables
         self._toolset = aToolSet
+        self._variables = tuple(aVariables)
         self._verbosity = aVerbosity
+        # Number of threads reading dep files ahead of the parser, 0 to disable
+        self._threads = aThreads
+        # Defer path resolution of each command group until first accessed
+        self._lazy = aLazy
+        self._prefetcher = None
         # helper object to resolve files in the work area
         self._pathMaker = aPathmaker
-        # Helper object holding the parser state while traversing the dependency tree 
+        # Helper object holding the parser state while traversing the dependency tree
         self._state = None
-        # list of all known depfiles
-        self._depregistry = OrderedDict()
+        # Top-level dep file of the last parse
+        self._top = None
+        # Expression evaluation counters
+        self._exprstats = {'compiled': 0, 'cached': 0, 'time': 0.}
 
         # Results
-        self.settings = AlienTree()
-        self.libs = set()
-        self.packages = OrderedDict()
+        self._reset()
+        # --------------------------------------------------------------
 
-        self.commands = {c: [] for c in dep_command_types}
+        # --------------------------------------------------------------
+        # Set up the parser
+        parser = DepCmdParser(usage=argparse.SUPPRESS)
 
-        self.unresolved = list()
-        self.errors = list()
+        self.parseLine = parser.parseLine
         # --------------------------------------------------------------
+    # -----------------------------------------------------------------------------
+
+    # -----------------------------------------------------------------------------
+    def _mksettings(self):
+        """
+        Creates a settings tree holding the command-line variables and the toolset
+        """
+        lSettings = AlienTree()
 
         # --------------------------------------------------------------
         # Add to or override the Script Variables with user commandline
-        for lArgs in aVariables:
+        for lArgs in self._variables:
             lKey, lVal = lArgs.split('=')
-            self.settings[lKey] = lVal
+            lSettings[lKey] = lVal
         # --------------------------------------------------------------
 
         # --------------------------------------------------------------
         # Set the toolset
-        self.settings['toolset'] = self._toolset
+        lSettings['toolset'] = self._toolset
         # --------------------------------------------------------------
+        return lSettings
 
-        # --------------------------------------------------------------
-        # Set up the parser
-        parser = DepCmdParser(usage=argparse.SUPPRESS)
+    # -----------------------------------------------------------------------------
+    def _reset(self):
+        """
+        Clears the parsing results
+        """
+        # list of all known depfiles
+        self._depregistry = OrderedDict()
+        # Settings assignments (name, value, applied), in the order they were processed
+        self._assignlog = list()
+        # Assignment log of the previous parse, and the unchanged files it was replayed for, while re-parsing
+        self._replaylog = None
+        self._replayed = set()
+
+        # Pending commands in tree order, None when all groups are resolved
+        self._lazyentries = None
+
+        self.depfile = None
+        self.settings = self._mksettings()
+        self.libs = set()
+        self.packages = OrderedDict()
+
+        self.commands = {c: [] for c in dep_command_types}
+
+        self.unresolved = list()
+        self.errors = list()
+    # -----------------------------------------------------------------------------
 
-        self.parseLine = parser.parseLine
-        # --------------------------------------------------------------
     # -----------------------------------------------------------------------------
+    @property
+    def packages(self):
+        self.resolve()
+        return self._packages
+
+    @packages.setter
+    def packages(self, aPackages):
+        self._packages = aPackages
+
+    # -----------------------------------------------------------------------------
+    @property
+    def libs(self):
+        self.resolve()
+        return self._libs
+
+    @libs.setter
+    def libs(self, aLibs):
+        self._libs = aLibs
+
+    # -----------------------------------------------------------------------------
+    @property
+    def unresolved(self):
+        self.resolve()
+        return self._unresolved
+
+    @unresolved.setter
+    def unresolved(self, aUnresolved):
+        self._unresolved = aUnresolved
+
+    # -----------------------------------------------------------------------------
+    @property
+    def pending(self):
+        """
+        True if the paths of some commands are yet to be resolved
+        """
+        return self._lazyentries is not None
 
     # -----------------------------------------------------------------------------
     @property
@@ -229,15 +511,28 @@ class DepFileParser(object):
         # Return None (i.e. continue)
         return
 
+    # -------------------------------------------------------------------------
+    def _eval(self, aExpr):
+        """
+        Evaluates an expression against the settings tree, compiling it only
+        the first time it is encountered
+        """
+        lStart = time.perf_counter()
+        try:
+            lCode = self._exprcache[aExpr]
+            self._exprstats['cached'] += 1
+        except KeyError:
+            lCode = self._exprcache[aExpr] = compile(aExpr.strip(), '<dep expression>', 'eval')
+            self._exprstats['compiled'] += 1
+
+        try:
+            return eval(lCode, _kExprGlobals, self.settings)
+        finally:
+            self._exprstats['time'] += time.perf_counter() - lStart
+
     # -------------------------------------------------------------------------
     def _lineProcessAssignments(self, aLine: str):
         # Process the assignment directive
-        
-        pattern = re.compile(r'^([a-zA-Z][a-zA-Z0-9_]*(?:\.[a-zA-Z][a-zA-Z0-9_]*)*)?\s*=\s*(.*)$')
-        # group 1: settings name
-        # group 2: invalid setting name
-        # group 3: rest of the line
-        pattern = re.compile(r'^(?:([a-zA-Z][a-zA-Z0-9_]*(?:\.[a-zA-Z][a-zA-Z0-9_]*)*)|([^=\n\s]*))\s*=\s*(.*)?$')
 
         if aLine[0] != "@":
             return aLine
@@ -245,7 +540,7 @@ class DepFileParser(object):
         lLine = aLine[1:].strip()
 
         # Validate assignment structure
-        m = pattern.match(aLine[1:].strip())
+        m = _kAssignPattern.match(lLine)
 
         if m is None:
             raise DepAssignmentError(f"Assignment expression does not have the key = value form '{lLine}'")
@@ -261,17 +556,18 @@ class DepFileParser(object):
 
         if lPar in self.settings:
             console.log(f"WARNING: '{lPar.strip()}' is already defined with value '{self.settings[lPar.strip()]}'. New value will not be applied ({lExpr}).", style='yellow')
+            self._assignlog.append((lPar, lExpr, False))
         else:
             lOldLock = self.settings.locked
             self.settings.lock(True)
             try:
-                # exec(aLine[1:], None, self.settings)
-                x = eval(lExpr, None, self.settings)
+                x = self._eval(lExpr)
             except Exception as lExc:
                 cprint(lExc)
                 raise DepLineError("VariableAssignmentError") from lExc
             self.settings.lock(lOldLock)
             self.settings[lPar] = x
+            self._assignlog.append((lPar, x, True))
 
         if self._verbosity > 1:
             print(self._state.tab, ':', aLine)
@@ -284,17 +580,15 @@ class DepFileParser(object):
         if aLine[0] != "?":
             return aLine
 
-        lTokens = [i for i, letter in enumerate(
-            aLine) if letter == "?"]
-        if len(lTokens) != 2:
+        lNumTokens = aLine.count("?")
+        if lNumTokens != 2:
             raise DepLineError(
-                "There must be precisely two '?' tokens per line. Found {0}'".format(len(lTokens))
+                "There must be precisely two '?' tokens per line. Found {0}'".format(lNumTokens)
             )
+        lTokens = (0, aLine.index("?", 1))
 
         try:
-            lExprValue = eval(
-                aLine[lTokens[0] + 1: lTokens[1]], None, self.settings
-            )
+            lExprValue = self._eval(aLine[lTokens[0] + 1: lTokens[1]])
         except Exception as lExc:
             raise DepLineError("Parsing directive failed") from lExc
 
@@ -314,7 +608,7 @@ class DepFileParser(object):
     # -------------------------------------------------------------------------
     def _lineReplaceVars(self, aLine):
         try:
-            lLine = AlienTemplate(aLine).substitute(self.settings)
+            lLine = substituteTemplate(aLine, self.settings)
         except RuntimeError as lExc:
             raise DepLineError("Template substitution failed") from lExc
 
@@ -342,13 +636,15 @@ class DepFileParser(object):
         # --------------------------------------------------------------
         # Set the target file expression, whether specified explicitly
         # or not
+        lPathExprs = []
         if (not aParsedCmd.filepath):
             lComponentName = lComponent.split(sep)[-1]
 
             f, u = self._pathMaker.globall(
                 lPackage, lComponent, aParsedCmd.cmd, 
                 self._pathMaker.getDefNames(aParsedCmd.cmd, lComponentName),
-                cd=aParsedCmd.cd
+                cd=aParsedCmd.cd,
+                exprs=lPathExprs
             )
 
             if len(f) == 1:
@@ -367,9 +663,16 @@ class DepFileParser(object):
             lFileLists, lUnmatchedExprs = self._pathMaker.globall(
                 lPackage, lComponent, aParsedCmd.cmd, 
                 aParsedCmd.filepath,
-                cd=aParsedCmd.cd
+                cd=aParsedCmd.cd,
+                exprs=lPathExprs
             )
 
+        # Keep track of the directories the expressions were matched against
+        lGlobDirs = self._depregistry[aDepFilePath].globdirs
+        for e in lPathExprs:
+            lGlobDirs.update(_globDirs(e))
+        lGlobDirs.update(dirname(p) for l in lFileLists for _, p in l)
+
         lEntries = list()
 
         # --------------------------------------------------------------
@@ -385,13 +688,41 @@ class DepFileParser(object):
                 cmd = _copyUpdateCommand(aParsedCmd, lFilePath, lPackage, lComponent)
                 # If an include command, parse the sub-dep files
                 if aParsedCmd.cmd == "include":
+                    lMark = len(self._assignlog)
                     cmd.depfile = self._parseFile(lPackage, lComponent, lFile)
+                    self._depregistry[aDepFilePath].includemarks.append(lMark)
                 lEntries.append(cmd)
 
 
         return lEntries, (lUnmatchedExprs, lPackage, lComponent)
         # --------------------------------------------------------------
 
+    # -------------------------------------------------------------------------
+    def _resolveEntries(self, aDepFile, aParsedCmd, aPackage, aComponent):
+        """
+        Resolves the paths of a parsed command, logging the unmatched expressions in the dep file
+        """
+        lEntries, (lUnresolvedExpr, lParsedPackage, lParsedComponent) = self._resolvePaths(
+            aParsedCmd, aDepFile.path, aPackage, aComponent
+        )
+
+        aDepFile.unresolved += [
+            (lExpr, aParsedCmd.cmd, lParsedPackage, lParsedComponent, aPackage, aComponent, aDepFile.path)
+            for lExpr in lUnresolvedExpr
+        ]
+        return lEntries
+
+    # -------------------------------------------------------------------------
+    def _readDepFile(self, aDepFilePath):
+        """
+        Returns the lines of a dep file, from the prefetcher when available
+        """
+        lLines = self._prefetcher.lines(aDepFilePath) if self._prefetcher is not None else None
+        if lLines is None:
+            with open(aDepFilePath) as lDepFile:
+                lLines = lDepFile.readlines()
+        return lLines
+
     # -------------------------------------------------------------------------
     def _parseFile(self, aPackage, aComponent, aDepFileName):
         """
@@ -408,7 +739,12 @@ class DepFileParser(object):
             aPackage, aComponent, 'include', aDepFileName)
 
         if lDepFilePath in self._depregistry:
-            return self._depregistry[lDepFilePath]
+            lDepFile = self._depregistry[lDepFilePath]
+            # Unchanged files first included at the same point make the same assignments as when parsed
+            if self._replaylog is not None and lDepFile.mark == len(self._assignlog) and lDepFilePath not in self._replayed:
+                self._replayed.add(lDepFilePath)
+                self._replayAssignments(self._replaylog[lDepFile.mark:lDepFile.end])
+            return lDepFile
 
         if self._verbosity > 1:
             print('>' * self._state.depth, 'Parsing',
@@ -424,66 +760,70 @@ class DepFileParser(object):
         self._state.depth += 1
 
         lCurrentFile = DepFile(aPackage, aComponent, aDepFileName, lDepFilePath)
+        lCurrentFile.mark = len(self._assignlog)
         self._depregistry[lDepFilePath] = lCurrentFile
 
-        with open(lDepFilePath) as lDepFile:
-            for lLineNr, lLine in enumerate(lDepFile):
+        for lLineNr, lLine in enumerate(self._readDepFile(lDepFilePath)):
 
-                # --------------------------------------------------------------
-                # Pre-processing
-                try:
-                    # Sanitize/drop comments
-                    lLine = self._lineDropComments(lLine)
-                    if not lLine:
-                        continue
-
-                    # Process variable assignment directives
-                    lLine = self._lineProcessAssignments(lLine)
-                    if not lLine:
-                        continue
-
-                    # Process conditional directives
-                    lLine = self._lineProcessConditional(lLine)
-                    if not lLine:
-                        continue
-
-                    # Replace variables
-                    lLine = self._lineReplaceVars(lLine)
-
-                except DepLineError as lExc:
-                    lCurrentFile.errors.append((aPackage, aComponent, aDepFileName, lDepFilePath, lLineNr, lLine, lExc))
+            # --------------------------------------------------------------
+            # Pre-processing
+            try:
+                # Sanitize/drop comments
+                lLine = self._lineDropComments(lLine)
+                if not lLine:
                     continue
 
-                # --------------------------------------------------------------
-                # Parse the line using arg_parse
-                try:
-                    lParsedCmd = self.parseLine(shlex.split(lLine))
-                except DepCmdParserError as lExc:
-                    lCurrentFile.errors.append((aPackage, aComponent, aDepFileName, lDepFilePath, lLineNr, lLine, lExc))
+                # Process variable assignment directives
+                lLine = self._lineProcessAssignments(lLine)
+                if not lLine:
                     continue
 
-                if self._verbosity > 1:
-                    print(self._state.tab, '- Parsed line', vars(lParsedCmd))
+                # Process conditional directives
+                lLine = self._lineProcessConditional(lLine)
+                if not lLine:
+                    continue
 
-                # --------------------------------------------------------------
-                lEntries, (lUnresolvedExpr, lParsedPackage, lParsedComponent) = self._resolvePaths(lParsedCmd, lDepFilePath, aPackage, aComponent)
-                lCurrentFile.entries += lEntries
-                if lParsedCmd.cmd == 'include':
-                    for inc in lEntries:
-                        lCurrentFile.children.append(inc.depfile)
-
-                # Log unresolved entries
-                lCurrentFile.unresolved += [
-                    (lExpr, lParsedCmd.cmd, lParsedPackage, lParsedComponent, aPackage, aComponent, lDepFilePath)
-                    for lExpr in lUnresolvedExpr
-                ]
+                # Replace variables
+                lLine = self._lineReplaceVars(lLine)
 
-                if self._verbosity > 1:
-                    print(self._state.tab, '  -- Entries of', aDepFileName, ':', lEntries)
+            except DepLineError as lExc:
+                lCurrentFile.errors.append((aPackage, aComponent, aDepFileName, lDepFilePath, lLineNr, lLine, lExc))
+                continue
+
+            # --------------------------------------------------------------
+            # Parse the line
+            try:
+                lParsedCmd = self._prefetcher.command(lLine) if self._prefetcher is not None else None
+                if lParsedCmd is None:
+                    lParsedCmd = self.parseLine(tokenize(lLine))
+            except DepCmdParserError as lExc:
+                lCurrentFile.errors.append((aPackage, aComponent, aDepFileName, lDepFilePath, lLineNr, lLine, lExc))
+                continue
+
+            if self._verbosity > 1:
+                print(self._state.tab, '- Parsed line', lParsedCmd.todict())
+
+            # --------------------------------------------------------------
+            # Includes are always followed, other commands can wait until their group is needed
+            if self._lazy and lParsedCmd.cmd != 'include':
+                lCurrentFile.entries.append(PendingCommand(lParsedCmd, lCurrentFile, aPackage, aComponent))
+                continue
+
+            lEntries = self._resolveEntries(lCurrentFile, lParsedCmd, aPackage, aComponent)
+            lCurrentFile.entries += lEntries
+            if lParsedCmd.cmd == 'include':
+                for inc in lEntries:
+                    lCurrentFile.children.append(inc.depfile)
+                    inc.depfile.parents.append(lCurrentFile)
+
+            if self._verbosity > 1:
+                print(self._state.tab, '  -- Entries of', aDepFileName, ':', lEntries)
 
         if not self.forwardparsing(aDepFileName):
             lCurrentFile.entries.reverse()
 
+        lCurrentFile.end = len(self._assignlog)
+
         if self._verbosity > 1:
             print(self._state.tab, lCurrentFile)
 
@@ -497,11 +837,21 @@ class DepFileParser(object):
     # -------------------------------------------------------------------------
     def parse(self, aPackage, aComponent, aDepFileName):
 
-        # TODO: create a reset method
+        self._top = (aPackage, aComponent, aDepFileName)
         self._state = State()
+        self._pathMaker.clearCache()
+
+        if self._threads > 0:
+            self._prefetcher = Prefetcher(self._pathMaker, self.parseLine, self._threads)
+            self._prefetcher.submit(aPackage, aComponent, aDepFileName)
 
         # Do the parsing here
-        self.depfile = self._parseFile(aPackage, aComponent, aDepFileName)
+        try:
+            self.depfile = self._parseFile(aPackage, aComponent, aDepFileName)
+        finally:
+            if self._prefetcher is not None:
+                self._prefetcher.shutdown()
+                self._prefetcher = None
 
         # Lock the config variables tree
         self.settings.lock(True)
@@ -512,8 +862,38 @@ class DepFileParser(object):
             raise RuntimeError("Something went wrong")
         self._state = None
 
+        self._collect()
+
+        if self._verbosity > 0:
+            print('Expressions: {compiled} compiled, {cached} cached, {time:.3f}s evaluating'.format(**self._exprstats))
+
+    # -------------------------------------------------------------------------
+    def _collect(self):
+        """
+        Collects the summary information from the tree of parsed dep files
+        """
+        self._lazyentries = None
+        if self._lazy:
+            self.errors = [e for f in self._depregistry.values() for e in f.errors]
+            self._lazyentries = list(self.depfile.itercmd())
+            self.commands = LazyCommandGroups(dep_command_types, self._resolveGroup)
+            return
+
+        self._summarize(self.depfile.itercmd())
+
+    # -------------------------------------------------------------------------
+    def _summarize(self, aCmds):
+        """
+        Builds commands, packages, libraries, errors and unresolved lists from the commands in tree order
+        """
+        self.libs = set()
+        self.packages = OrderedDict()
+        self.commands = {c: [] for c in dep_command_types}
+        self.unresolved = list()
+        self.errors = list()
+
         # Collect summary information
-        for lCmd in self.depfile.itercmd():
+        for lCmd in aCmds:
             if self._verbosity > 0:
                 print (lCmd)
             self.commands[lCmd.cmd].append(lCmd)
@@ -527,25 +907,205 @@ class DepFileParser(object):
             self.errors.extend(f.errors)
             self.unresolved.extend(f.unresolved)
 
+        # Uniquify the commands lists, keeping the first occurrence of each entry
         for i in self.commands:
-            lTemp = list()
-            for j in self.commands[i]:
-                if j not in lTemp:
-                    lTemp.append(j)
-            self.commands[i] = lTemp
+            self.commands[i] = list(dict.fromkeys(self.commands[i]))
 
         # If we are exiting the top-level, uniquify the component list
         for lPkg in self.packages:
-            lTemp = list()
-            lAdded = set()
-            for lCmp in self.packages[lPkg]:
-                if lCmp not in lAdded:
-                    lTemp.append(lCmp)
-                    lAdded.add(lCmp)
-            self.packages[lPkg] = lTemp
+            self.packages[lPkg] = list(dict.fromkeys(self.packages[lPkg]))
         # --------------------------------------------------------------
 
     # -------------------------------------------------------------------------
+    def _resolvePending(self, aPending):
+        """
+        Resolves the paths of a pending command, once
+        """
+        if aPending.resolved is None:
+            lState, self._state = self._state, State()
+            try:
+                lEntries = self._resolveEntries(aPending.depfile, aPending.parsed, aPending.package, aPending.component)
+            finally:
+                self._state = lState
+
+            # Match the order the entries would have had if resolved while parsing
+            if not self.forwardparsing(aPending.depfile.name):
+                lEntries.reverse()
+            aPending.resolved = lEntries
+        return aPending.resolved
+
+    # -------------------------------------------------------------------------
+    def _resolveGroup(self, aGroup):
+        """
+        Resolves the pending commands of a group
+        """
+        lCmds = [
+            c for e in self._lazyentries if e.cmd == aGroup
+            for c in self._resolvePending(e)
+        ]
+        return list(dict.fromkeys(lCmds))
+
+    # -------------------------------------------------------------------------
+    def resolve(self):
+        """
+        Resolves all pending commands after a lazy parse, leaving the parser in
+        the same state as an eager one. Does nothing if no command is pending.
+        """
+        if self._lazyentries is None:
+            return
+
+        lEntries = self._lazyentries
+        self._lazyentries = None
+
+        self._summarize(c for e in lEntries for c in self._resolvePending(e))
+
+        # Replace the placeholders with the resolved commands
+        for f in self._depregistry.values():
+            f.entries = [
+                c for e in f.entries
+                for c in (e.resolved if isinstance(e, PendingCommand) else (e,))
+            ]
+
+    # -------------------------------------------------------------------------
+    def reparse(self, aChangedFiles=(), aChangedDirs=()):
+        """
+        Updates the results of a previous parse after changes in the work area,
+        re-parsing only the dep files affected by them.
+
+        A dep file is affected if it was modified or if one of the directories its
+        path expressions were matched against was. Settings are order-dependent
+        (the first assignment wins): each affected file is re-parsed in isolation
+        with the assignments applied before it was first parsed, the ones it saw.
+        The whole tree is parsed again if the new content of the file changes the
+        assignments it applies, which later files see, or if it includes unchanged
+        files at a point where the assignments applied differ from when they were
+        parsed.
+
+        Args:
+            aChangedFiles (list): Paths of the dep files that changed
+            aChangedDirs (list): Directories whose content changed
+
+        Returns:
+            bool: True if the tree was updated incrementally, False if it was parsed from scratch
+        """
+        if self._top is None:
+            raise RuntimeError("Nothing to re-parse, parse must be called first")
+
+        # Incremental updates need the paths of every command, re-parse eagerly
+        self.resolve()
+        lLazy, self._lazy = self._lazy, False
+        try:
+            return self._reparse(aChangedFiles, aChangedDirs)
+        finally:
+            self._lazy = lLazy
+
+    # -------------------------------------------------------------------------
+    def _reparse(self, aChangedFiles, aChangedDirs):
+        lChangedFiles = set(aChangedFiles)
+        lChangedDirs = set(aChangedDirs)
+
+        lAffected = [
+            f for p, f in self._depregistry.items()
+            if p in lChangedFiles or not f.globdirs.isdisjoint(lChangedDirs)
+        ]
+
+        if not lAffected:
+            return True
+
+        if any(not exists(f.path) for f in lAffected):
+            return self._reparseAll()
+
+        # Drop the affected files from the registry, for them to be read again
+        self._pathMaker.clearCache()
+        for f in lAffected:
+            del self._depregistry[f.path]
+
+        lSettings = self.settings
+        lAssignLog = self._assignlog
+        lStale = False
+        self._replaylog = lAssignLog
+        try:
+            for f in lAffected:
+                # Files already re-parsed as part of an affected parent are picked from the registry
+                if f.path not in self._depregistry:
+                    # Replay the assignments seen by the file on a scratch, unlocked, settings tree
+                    self._assignlog = []
+                    self.settings = self._mksettings()
+                    self._replayAssignments(lAssignLog[:f.mark])
+                    self._replayed = set()
+
+                    self._state = State()
+                    self._parseFile(f.pkg, f.cmp, f.name)
+
+                    # Later files saw the assignments applied by this one
+                    lStale = self._assignlog[f.mark:] != lAssignLog[f.mark:f.end]
+                    if lStale:
+                        break
+
+                self._replaceFile(f, self._depregistry[f.path])
+        finally:
+            self._state = None
+            self._assignlog = lAssignLog
+            self._replaylog = None
+            self._replayed = set()
+            self.settings = lSettings
+
+        if lStale:
+            return self._reparseAll()
+
+        # Rebuild the registry in parsing order, dropping the files no longer included.
+        # Files now first included after other assignments than when they were parsed are stale
+        lRegistry = OrderedDict()
+        lStack = [(self.depfile, 0)]
+        while lStack:
+            f, lMark = lStack.pop()
+            if f.path in lRegistry:
+                continue
+            if f.mark != lMark:
+                return self._reparseAll()
+            lRegistry[f.path] = f
+            lStack.extend(reversed(list(zip(f.children, f.includemarks))))
+        self._depregistry = lRegistry
+
+        for f in lRegistry.values():
+            f.parents = [p for p in f.parents if lRegistry.get(p.path) is p]
+
+        self._collect()
+        return True
+
+    # -------------------------------------------------------------------------
+    def _replayAssignments(self, aEntries):
+        """
+        Appends assignments of the previous parse to the log, applying those that were applied
+        """
+        for k, v, lApplied in aEntries:
+            self._assignlog.append((k, v, lApplied))
+            if lApplied:
+                self.settings[k] = v
+
+    # -------------------------------------------------------------------------
+    def _replaceFile(self, aOldFile, aNewFile):
+        """
+        Replaces a dep file object in the tree with its re-parsed version
+        """
+        if self.depfile is aOldFile:
+            self.depfile = aNewFile
+
+        for p in aOldFile.parents:
+            p.children = [aNewFile if c is aOldFile else c for c in p.children]
+            for e in p.entries:
+                if isinstance(e, IncludeCommand) and e.depfile is aOldFile:
+                    e.depfile = aNewFile
+            if p not in aNewFile.parents:
+                aNewFile.parents.append(p)
+
+    # -------------------------------------------------------------------------
+    def _reparseAll(self):
+        self._reset()
+        self.parse(*self._top)
+        return False
+
+    # -------------------------------------------------------------------------
 
 
 class DepFormatter(object):
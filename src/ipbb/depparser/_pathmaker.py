@@ -1,4 +1,6 @@
 import os
+import glob
+import fnmatch
 
 # --------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
 
@@ -29,6 +31,8 @@ class Pathmaker(object):
     def __init__(self, rootdir, verbosity=0):
         self._rootdir = rootdir
         self._verbosity = verbosity
+        # Directory listings, as (names, set of names), shared by all glob calls
+        self._listings = {}
 
         if self._verbosity > 3:
             print("+++ Pathmaker init", rootdir)
@@ -79,18 +83,65 @@ class Pathmaker(object):
             return [name+os.extsep+ext for ext in self.fexts[command]]
     # --------------------------------------------------------------
 
+    # --------------------------------------------------------------
+    def clearCache(self):
+        """
+        Drops the cached directory listings
+        """
+        self._listings = {}
+    # --------------------------------------------------------------
+
+    # --------------------------------------------------------------
+    def _listdir(self, aDir):
+        try:
+            return self._listings[aDir]
+        except KeyError:
+            pass
+
+        try:
+            with os.scandir(aDir or os.curdir) as lEntries:
+                lNames = [e.name for e in lEntries]
+        except OSError:
+            lNames = []
+
+        lListing = self._listings[aDir] = (lNames, set(lNames))
+        return lListing
+    # --------------------------------------------------------------
+
+    # --------------------------------------------------------------
+    def _expand(self, aPathExpr):
+        """
+        Equivalent of glob.glob matching the expression against the cached
+        listing of its directory
+        """
+        lDir, lPattern = os.path.split(aPathExpr)
+
+        # Wildcards in the directory part, leave it to glob
+        if not lPattern or glob.has_magic(lDir):
+            return glob.glob(aPathExpr)
+
+        lNames, lNameSet = self._listdir(lDir)
+
+        if not glob.has_magic(lPattern):
+            return [aPathExpr] if lPattern in lNameSet else []
+
+        # Like glob, hidden files are matched only by patterns starting with '.'
+        if lPattern[0] != '.':
+            lNames = [n for n in lNames if n[0] != '.']
+
+        return [os.path.join(lDir, n) for n in fnmatch.filter(lNames, lPattern)]
+    # --------------------------------------------------------------
+
     # --------------------------------------------------------------
     def glob(self, package, component, command, fileexpr, cd=None):
         """
         Returns the complete path expression as well as the list of files matches
         """
-        import glob
-
         lPathExpr = self.getPath(package, component, command, fileexpr, cd=cd)
         lKindPath = self.getPath(package, component, command, cd=cd)
 
         # Expand the expression
-        lFilePaths = glob.glob(lPathExpr)
+        lFilePaths = self._expand(lPathExpr)
 
         # Calculate the relative path and pair it up with the absolute path
         lFileList = [(os.path.relpath(lPath2, lKindPath), lPath2)
@@ -100,7 +151,7 @@ class Pathmaker(object):
     # --------------------------------------------------------------
 
     # --------------------------------------------------------------
-    def globall(self, package, component, command, fileexprlist, cd=None):
+    def globall(self, package, component, command, fileexprlist, cd=None, exprs=None):
         """Expands a list of file expressions 
         
         Args:
@@ -109,6 +160,7 @@ class Pathmaker(object):
             command (TYPE): Description
             fileexprlist (TYPE): Description
             cd (None, optional): Description
+            exprs (list, optional): If defined, the complete path expressions are appended to it
         
         Returns:
             TYPE: Description
@@ -120,6 +172,9 @@ class Pathmaker(object):
             lPathExpr, lFileList = self.glob(
                 package, component, command, fexpr, cd=cd
             )
+
+            if exprs is not None:
+                exprs.append(lPathExpr)
     
             if lFileList:
                 lFiles.append(lFileList)
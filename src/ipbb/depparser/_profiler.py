@@ -0,0 +1,136 @@
+import json
+import time
+
+from collections import OrderedDict
+from os.path import relpath
+from rich.table import Table
+
+
+# -----------------------------------------------------------------------------
+class DepParserProfiler(object):
+    """
+    Collects per dep file timings and counters from a DepFileParser.
+
+    The profiler wraps the parser methods implementing each parsing step and
+    accounts their exclusive time (i.e. excluding the time spent parsing
+    included files) to the dep file being parsed.
+
+    Attributes:
+        files (OrderedDict): Statistics by dep file path, in parsing order
+    """
+
+    # Parser methods timed, and the step they are accounted to
+    kSteps = OrderedDict([
+        ('_readDepFile', 'read'),
+        ('_lineDropComments', 'comments'),
+        ('_lineProcessAssignments', 'assignments'),
+        ('_lineProcessConditional', 'conditionals'),
+        ('_lineReplaceVars', 'substitution'),
+        ('parseLine', 'parse'),
+        ('_resolvePaths', 'resolve'),
+    ])
+    kCounters = ('lines', 'globs', 'matches')
+    kColumns = ('total',) + tuple(kSteps.values()) + ('other',) + kCounters
+
+    # -----------------------------------------------------------------------------
+    def __init__(self):
+        super().__init__()
+        self.files = OrderedDict()
+        # Time spent in nested calls, one entry per active timed call
+        self._frames = []
+        # Stats of the dep files being parsed, innermost last
+        self._filestack = []
+
+    # -----------------------------------------------------------------------------
+    def attach(self, aParser):
+        """
+        Instruments a parser. Must be called before parsing.
+        """
+        # Timings are only meaningful when the files are read, and paths resolved, while parsing
+        aParser._threads = 0
+        aParser._lazy = False
+
+        for lMethod, lStep in self.kSteps.items():
+            setattr(aParser, lMethod, self._timed(getattr(aParser, lMethod), lStep))
+
+        lResolvePaths = aParser._resolvePaths
+
+        def resolvePaths(aParsedCmd, *args, **kwargs):
+            lResult = lResolvePaths(aParsedCmd, *args, **kwargs)
+            lStats = self._filestack[-1]
+            lStats['globs'] += len(aParsedCmd.filepath) if aParsedCmd.filepath else 1
+            lStats['matches'] += len(lResult[0])
+            return lResult
+        aParser._resolvePaths = resolvePaths
+
+        lDropComments = aParser._lineDropComments
+
+        def dropComments(aLine):
+            self._filestack[-1]['lines'] += 1
+            return lDropComments(aLine)
+        aParser._lineDropComments = dropComments
+
+        lParseFile = self._timed(aParser._parseFile, 'other')
+
+        def parseFile(aPackage, aComponent, aDepFileName):
+            lPath = aParser._pathMaker.getPath(aPackage, aComponent, 'include', aDepFileName)
+            lStats = self.files.get(lPath)
+            if lStats is None:
+                lStats = self.files[lPath] = dict.fromkeys(self.kColumns, 0)
+                lStats.update(package=aPackage, component=aComponent, name=aDepFileName)
+
+            lStart = time.perf_counter()
+            self._filestack.append(lStats)
+            try:
+                return lParseFile(aPackage, aComponent, aDepFileName)
+            finally:
+                self._filestack.pop()
+                lStats['total'] += time.perf_counter() - lStart
+        aParser._parseFile = parseFile
+
+    # -----------------------------------------------------------------------------
+    def _timed(self, aFunc, aStep):
+        def timed(*args, **kwargs):
+            self._frames.append(0.)
+            lStart = time.perf_counter()
+            try:
+                return aFunc(*args, **kwargs)
+            finally:
+                lElapsed = time.perf_counter() - lStart
+                self._filestack[-1][aStep] += lElapsed - self._frames.pop()
+                if self._frames:
+                    self._frames[-1] += lElapsed
+        return timed
+
+    # -----------------------------------------------------------------------------
+    def totals(self):
+        return {c: sum(s[c] for s in self.files.values()) for c in self.kColumns if c != 'total'}
+
+    # -----------------------------------------------------------------------------
+    def table(self, aSortBy='total', aRootDir=None, aLimit=None):
+        """
+        Returns a rich table with the statistics of each dep file
+
+        Args:
+            aSortBy (str): Column to sort the dep files by, in descending order
+            aRootDir (str): If defined, paths are shown relative to it
+            aLimit (int): Maximum number of dep files to show
+        """
+        lFiles = sorted(self.files.items(), key=lambda x: x[1][aSortBy], reverse=True)
+        if aLimit:
+            lFiles = lFiles[:aLimit]
+
+        lTable = Table('dep file', *self.kColumns, title='Dep parsing profile (times in ms), sorted by ' + aSortBy)
+        for lPath, lStats in lFiles:
+            lTable.add_row(
+                relpath(lPath, aRootDir) if aRootDir else lPath,
+                *(str(lStats[c]) if c in self.kCounters else '{:.3f}'.format(lStats[c] * 1e3) for c in self.kColumns)
+            )
+        return lTable
+
+    # -----------------------------------------------------------------------------
+    def dump(self, aStream):
+        """
+        Writes the statistics to a stream, in JSON format. Times are in seconds.
+        """
+        json.dump({'files': self.files, 'totals': self.totals()}, aStream, indent=1)
@@ -48,6 +48,38 @@ class VivadoProjectGenerator(object):
         self.ipCachePath = aIPCachePath
         self.turbo = aTurbo
 
+    # --------------------------------------------------------------
+    def _addCommands(self, aSrcCmd):
+        """
+        Returns the commands adding a non-IP source file to the project, as (command template, file) pairs
+        """
+        lExt = splitext(aSrcCmd.filepath)[1]
+        f = aSrcCmd.filepath
+
+        lCommands = [(f'add_files -norecurse -fileset {self.fileset(aSrcCmd)} $files', f)]
+
+        if aSrcCmd.vhdl2008:
+            lCommands += [('set_property FILE_TYPE {VHDL 2008} [get_files {$files}]', f)]
+
+        if lExt == '.tcl':
+            lCommands += [('set_property USED_IN implementation [get_files {$files}]', f)]
+
+        if aSrcCmd.lib:
+            lCommands += [(f'set_property library {aSrcCmd.lib} [ get_files {{$files}} ]', f)]
+
+        return lCommands
+
+    # --------------------------------------------------------------
+    def _writeGrouped(self, aWrite, aCommands, aGroups):
+        """
+        Writes commands, or groups them by template in turbo mode
+        """
+        for c, f in aCommands:
+            if self.turbo:
+                aGroups.setdefault(c, []).append(f)
+            else:
+                aWrite(tmpl(c).substitute(files=f))
+
     # --------------------------------------------------------------
     def write(self, aOutput, aSettings, aComponentPaths, aCommandList, aLibs):
 
@@ -132,31 +164,9 @@ class VivadoProjectGenerator(object):
             # # }
 
             else:
+                lCommands += self._addCommands(src)
 
-                c = f'add_files -norecurse -fileset {self.fileset(src)} $files'
-                f = src.filepath
-                lCommands += [(c, f)]
-
-                if src.vhdl2008:
-                    c = 'set_property FILE_TYPE {VHDL 2008} [get_files {$files}]'
-                    f = src.filepath
-                    lCommands += [(c, f)]
-
-                if lExt == '.tcl':
-                    c = 'set_property USED_IN implementation [get_files {$files}]'
-                    f = src.filepath
-                    lCommands += [(c, f)]
-
-                if src.lib:
-                    c = f'set_property library {src.lib} [ get_files {{$files}} ]'
-                    f = src.filepath
-                    lCommands += [(c, f)]
-
-            for c, f in lCommands:
-                if self.turbo:
-                    lSrcCommandGroups.setdefault(c, []).append(f)
-                else:
-                    write(tmpl(c).substitute(files=f))
+            self._writeGrouped(write, lCommands, lSrcCommandGroups)
 
         if self.turbo:
             for c, f in lSrcCommandGroups.items():
@@ -182,6 +192,96 @@ class VivadoProjectGenerator(object):
             write(f'source {setup.filepath}')
 
         write('close_project')
+
+    # --------------------------------------------------------------
+    def fingerprint(self, aSettings, aCommandList, aHashes):
+        """
+        Summarises the inputs of the project script, to detect when the project needs updating.
+
+        The fingerprint is split in two parts. 'sources' maps the design and simulation
+        files to the properties they are added with: the project can be brought up to date
+        by adding and removing them. 'project' holds everything else, including the order of
+        constraints and the content of sourced scripts and imported IPs: any change in
+        this part requires the project to be created again.
+
+        Args:
+            aSettings (dict): Dep settings
+            aCommandList (dict): Dep commands by group
+            aHashes (callable): Returns the content digests of a list of paths
+
+        Returns:
+            dict: Fingerprint, JSON serializable
+        """
+        lSetups = aCommandList['setup']
+        lIPs = []
+        lConstrs = []
+        lSources = {}
+        for src in aCommandList['src']:
+            lExt = splitext(src.filepath)[1]
+            if lExt in self.filetypes['ip']:
+                lIPs.append(src.filepath)
+            elif lExt in self.filetypes['constr']:
+                lConstrs.append([src.filepath, self.fileset(src), src.lib, src.vhdl2008])
+            else:
+                lSources[src.filepath] = [self.fileset(src), src.lib, src.vhdl2008]
+
+        lDigests = iter(aHashes([c.filepath for c in lSetups] + lIPs))
+
+        lProject = {
+            'name': self.projInfo.name,
+            'path': abspath(join(self.projInfo.path, self.projInfo.name)),
+            'settings': {
+                k: aSettings.get(k, None)
+                for k in sorted(self.reqsettings) + ['board_part', 'dsa_board_id', 'top_entity', 'vivado.sim_top_entity']
+            },
+            'ipcache': abspath(self.ipCachePath) if self.ipCachePath else None,
+            'iprepos': [c.filepath for c in aCommandList['iprepo']],
+            'utils': [c.filepath for c in aCommandList['util']],
+            'setups': [[c.filepath, c.finalize, next(lDigests)] for c in lSetups],
+            'ips': [[f, next(lDigests)] for f in lIPs],
+            'constraints': lConstrs,
+        }
+
+        return {'project': lProject, 'sources': lSources}
+
+    # --------------------------------------------------------------
+    def writeDelta(self, aOutput, aOld, aNew, aCommandList):
+        """
+        Writes the commands updating an existing project from an old to a new fingerprint.
+        Only valid if the 'project' parts of the two fingerprints match.
+
+        Args:
+            aOutput (callable): Destination of the TCL commands
+            aOld (dict): Fingerprint of the existing project
+            aNew (dict): Fingerprint of the requested project
+            aCommandList (dict): Dep commands by group, the ones aNew was computed from
+        """
+        write = aOutput
+
+        lOld, lNew = aOld['sources'], aNew['sources']
+        lRemoved = [f for f, p in lOld.items() if lNew.get(f) != p]
+        lAdded = {f for f, p in lNew.items() if lOld.get(f) != p}
+
+        lWorkingDir = abspath(join(self.projInfo.path, self.projInfo.name))
+
+        write('# Autogenerated project update script')
+        write(time.strftime("# %c"))
+        write()
+
+        write(f'open_project {join(lWorkingDir, self.projInfo.name + ".xpr")}')
+
+        if lRemoved:
+            write('remove_files [get_files {{{}}}]'.format(' '.join(lRemoved)))
+
+        lSrcCommandGroups = collections.OrderedDict()
+        for src in aCommandList['src']:
+            if src.filepath in lAdded:
+                self._writeGrouped(write, self._addCommands(src), lSrcCommandGroups)
+
+        for c, f in lSrcCommandGroups.items():
+            write(tmpl(c).substitute(files=' '.join(f)))
+
+        write('close_project')
     # --------------------------------------------------------------
 
 # --------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
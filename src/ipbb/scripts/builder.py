@@ -66,6 +66,10 @@ def _compose_cli():
     vivado.vivado.add_command(common.user_config)
     climain.add_command(vivado.vivado)
 
+    from ..cli import build
+
+    climain.add_command(build.build)
+
     from ..cli import sim
 
     sim.sim.add_command(common.cleanup)
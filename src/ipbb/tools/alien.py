@@ -1,5 +1,6 @@
 
 from string import Template
+from functools import lru_cache
 
 
 
@@ -73,6 +74,9 @@ class AlienBranch(object):
     def __init__(self):
         super().__init__()
         self.__dict__['_locked'] = False
+        # Tree indexing this branch and dotted path of the branch in it, including the trailing '.'
+        self.__dict__['_tree'] = None
+        self.__dict__['_path'] = ''
 
     def __repr__(self):
         return str({ k: v for k, v in self.__dict__.items() if not k.startswith('_')})
@@ -85,12 +89,23 @@ class AlienBranch(object):
                 raise
             else:
                 value = self.__dict__[name] = type(self)()
+                if self._tree is not None:
+                    self._tree._attach(self._path + name, value)
                 return value
 
     def __setattr__(self, name, value):
         if name not in self.__dict__ and name.startswith('_'):
             raise AttributeError("Attributes starting with '_' are reserved ")
         super().__setattr__(name, value)
+        if self._tree is not None and not name.startswith('_'):
+            self._tree._attach(self._path + name, value)
+
+    def __getstate__(self):
+        return self.__dict__
+
+    def __setstate__(self, state):
+        # Bypass __getattr__, which would otherwise autovivify on an empty instance
+        self.__dict__.update(state)
 
     def __getitem__(self, name):
         tokens = name.split('.', 1)
@@ -173,15 +188,60 @@ class AlienBranch(object):
 # ------------------------------------------------------------------------------
 class AlienTree(object):
     """
-    docstring for AlienTree
+    Tree of key-values, addressed by dotted keys (e.g. 'vivado.jobs').
+
+    Alongside the branches, the tree maintains a flat index of all dotted keys,
+    branches included, kept up to date by the branches themselves on writes and
+    autovivification. Lookups and membership tests go through the index, while
+    iteration results and the dict() snapshot are cached until the next write.
     """
     def __init__(self):
         super().__init__()
+        # Dotted key -> leaf value or branch
+        self._index = {}
+        # Cached iteration results, invalidated on writes
+        self._snapshot = {}
         self._trunk = AlienBranch()
+        self._trunk.__dict__['_tree'] = self
 
     def __repr__(self):
         return self.__class__.__name__+repr(self._trunk)
 
+    def _attach(self, aKey, aValue):
+        """
+        Updates the index after aKey was set to aValue
+        """
+        lOld = self._index.get(aKey)
+        if isinstance(lOld, AlienBranch) and lOld is not aValue:
+            self._detach(lOld)
+            lPrefix = aKey + '.'
+            for k in [k for k in self._index if k.startswith(lPrefix)]:
+                del self._index[k]
+
+        self._index[aKey] = aValue
+        self._snapshot = {}
+
+        if isinstance(aValue, AlienBranch):
+            aValue.__dict__['_tree'] = self
+            aValue.__dict__['_path'] = aKey + '.'
+            for b, o in list(aValue.__dict__.items()):
+                if not b.startswith('_'):
+                    self._attach(aKey + '.' + b, o)
+
+    @staticmethod
+    def _detach(aBranch):
+        aBranch.__dict__['_tree'] = None
+        aBranch.__dict__['_path'] = ''
+        for b, o in aBranch._iterbranches():
+            o.__dict__['_tree'] = None
+
+    def _cached(self, aName, aFunc):
+        try:
+            return self._snapshot[aName]
+        except KeyError:
+            lValue = self._snapshot[aName] = aFunc()
+            return lValue
+
     @property
     def trunk(self):
         return self._trunk
@@ -190,10 +250,17 @@ class AlienTree(object):
         return self._trunk
 
     def __iter__(self):
-        return self._trunk.__iter__()
+        return iter(self._cached('iter', lambda: list(self._trunk)))
+
+    def __contains__(self, name):
+        return name in self._index
 
     def __getitem__(self, name):
-        return self._trunk.__getitem__(name)
+        try:
+            return self._index[name]
+        except KeyError:
+            # Not indexed: let the branches autovivify or raise
+            return self._trunk.__getitem__(name)
 
     def __setitem__(self, name, value):
         return self._trunk.__setitem__(name, value)
@@ -204,21 +271,28 @@ class AlienTree(object):
 
     def lock(self, value):
         self._trunk._lock(value)
-    
+
     def get(self, name, default=None):
-        return self._trunk._get(name, default)
+        try:
+            return self._index[name]
+        except KeyError:
+            return self._trunk._get(name, default)
 
     def keys(self):
-        return self._trunk._iterleafkeys()
+        return iter(self._cached('keys', lambda: list(self._trunk._iterleafkeys())))
 
     def leaves(self):
-        return self._trunk._iterleaves()
-    
+        return iter(self._cached('leaves', lambda: list(self._trunk._iterleaves())))
+
     def branches(self):
-        return self._trunk._iterbranches()
+        return iter(self._cached('branches', lambda: list(self._trunk._iterbranches())))
 
     def dict(self):
-        return self._trunk._dict()
+        """
+        Returns the tree as nested dictionaries.
+        The result is cached until the next write and must not be modified.
+        """
+        return self._cached('dict', self._trunk._dict)
 
         
 
@@ -254,4 +328,48 @@ class AlienTemplate(Template):
     """
     idpattern =  r'[_a-z][\._a-z0-9]*'
 
+
+# ------------------------------------------------------------------------------
+@lru_cache(maxsize=8192)
+def _parseTemplate(aText):
+    """
+    Splits a template into (literal text, placeholder) chunks.
+    Returns None if the template contains invalid placeholders.
+    """
+    lChunks = []
+    lPos = 0
+    for m in AlienTemplate.pattern.finditer(aText):
+        if m.group('invalid') is not None:
+            return None
+
+        lLiteral = aText[lPos:m.start()]
+        if m.group('escaped') is not None:
+            lChunks.append((lLiteral + AlienTemplate.delimiter, None))
+        else:
+            lChunks.append((lLiteral, m.group('named') or m.group('braced')))
+        lPos = m.end()
+
+    lChunks.append((aText[lPos:], None))
+    return tuple(lChunks)
+
+
+# ------------------------------------------------------------------------------
+def substituteTemplate(aText, aMapping):
+    """
+    Equivalent to AlienTemplate(aText).substitute(aMapping), with parsed
+    templates cached and texts without placeholders returned as they are.
+    """
+    if AlienTemplate.delimiter not in aText:
+        return aText
+
+    lChunks = _parseTemplate(aText)
+    if lChunks is None:
+        # Let Template report the error
+        return AlienTemplate(aText).substitute(aMapping)
+
+    return ''.join(
+        l if k is None else l + str(aMapping[k])
+        for l, k in lChunks
+    )
+
  
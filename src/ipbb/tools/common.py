@@ -1,10 +1,16 @@
 
+import collections
+import json
 import os
+import re
 import sys
 import pexpect
 import subprocess
+import threading
 import time
 
+from .termui import kReset
+
 
 # ------------------------------------------------------------------------------
 class OutputFormatter(object):
@@ -93,3 +99,314 @@ class OutputFormatter(object):
             return
         self._flush()
 
+
+# ------------------------------------------------------------------------------
+class MessageIndex(object):
+    """
+    Index of the messages of a console session, by severity and message ID
+
+    Every entry records the number of occurrences, the times of the first and
+    last occurrence, in seconds since the start of the session, the commands
+    that produced them and the text of the first occurrence.
+    Commands are stored once, entries refer to them by position.
+
+    Attributes:
+        session (str): Session identifier
+        start (float): Session start time, as returned by time.time
+        commands (list): Commands executed in the session
+        entries (dict): Entries by (severity, message ID), as [count, first, last, first command, last command, text]
+    """
+
+    # Longest message text stored
+    kTextLen = 200
+
+    # ------------------------------------------------------------------------------
+    def __init__(self, aSession=None, aStart=None):
+        super().__init__()
+        self.session = aSession
+        self.start = time.time() if aStart is None else aStart
+        self.commands = []
+        self.entries = {}
+        self._cmdindex = {}
+        self._batch = []
+        self._current = None
+
+    # ------------------------------------------------------------------------------
+    def __len__(self):
+        return len(self.entries)
+
+    # ------------------------------------------------------------------------------
+    def _register(self, aCmd):
+        lIndex = self._cmdindex.get(aCmd)
+        if lIndex is None:
+            lIndex = self._cmdindex[aCmd] = len(self.commands)
+            self.commands.append(aCmd)
+        return lIndex
+
+    # ------------------------------------------------------------------------------
+    def setCommands(self, aCmds):
+        """
+        Registers the commands about to be executed, the first one becoming the current
+
+        Args:
+            aCmds (list): Commands, in execution order
+        """
+        self._batch = [self._register(c) for c in aCmds]
+        self._current = self._batch[0] if self._batch else None
+
+    # ------------------------------------------------------------------------------
+    def selectCommand(self, aIndex):
+        """
+        Makes the aIndex-th of the commands last registered the current one
+        """
+        if 0 <= aIndex < len(self._batch):
+            self._current = self._batch[aIndex]
+
+    # ------------------------------------------------------------------------------
+    def add(self, aSeverity, aId, aText):
+        """
+        Records the occurrence of a message, attributed to the current command
+        """
+        lTime = round(time.time() - self.start, 3)
+        lEntry = self.entries.get((aSeverity, aId))
+        if lEntry is None:
+            self.entries[aSeverity, aId] = [1, lTime, lTime, self._current, self._current, aText[:self.kTextLen]]
+        else:
+            lEntry[0] += 1
+            lEntry[2] = lTime
+            lEntry[4] = self._current
+
+    # ------------------------------------------------------------------------------
+    def scan(self, aLines, aClassify, aCommand):
+        """
+        Records the messages found in the lines of a log, e.g. of a run executed outside the console
+
+        Args:
+            aLines (iterable): Log lines
+            aClassify (callable): Line classifier, see ConsoleOutputFormatter.classify
+            aCommand (str): Command the messages are attributed to
+        """
+        self.setCommands([aCommand])
+        for lLine in aLines:
+            lLine = lLine.rstrip('\r\n')
+            lMsg = aClassify(lLine)
+            if lMsg is not None:
+                self.add(*lMsg, lLine)
+
+    # ------------------------------------------------------------------------------
+    def count(self, aSeverity=None):
+        """
+        Number of messages, of a given severity or in total
+        """
+        return sum(e[0] for (s, _), e in self.entries.items() if aSeverity is None or s == aSeverity)
+
+    # ------------------------------------------------------------------------------
+    def todict(self):
+        return {
+            'session': self.session,
+            'start': self.start,
+            'commands': self.commands,
+            'messages': [
+                {
+                    'severity': s, 'id': i, 'count': e[0], 'first': e[1], 'last': e[2],
+                    'first_command': e[3], 'last_command': e[4], 'text': e[5]
+                }
+                for (s, i), e in sorted(self.entries.items(), key=lambda x: -x[1][0])
+            ],
+        }
+
+    # ------------------------------------------------------------------------------
+    @classmethod
+    def fromdict(cls, aDict):
+        lIndex = cls(aDict['session'], aDict['start'])
+        for c in aDict['commands']:
+            lIndex._register(c)
+        for m in aDict['messages']:
+            lIndex.entries[m['severity'], m['id']] = [
+                m['count'], m['first'], m['last'], m['first_command'], m['last_command'], m['text']
+            ]
+        return lIndex
+
+    # ------------------------------------------------------------------------------
+    def dump(self, aPath):
+        """
+        Writes the index to a JSON file, most frequent messages first
+        """
+        with open(aPath, 'w') as lFile:
+            json.dump(self.todict(), lFile, indent=1)
+
+
+# ------------------------------------------------------------------------------
+class ConsoleOutputFormatter(OutputFormatter):
+    """
+    Line-oriented formatter for the output of tool consoles
+
+    Chunks are split into lines, an incomplete last line being held until the
+    next chunk. Message lines are recognised by a single regex built from the
+    severity table, coloured and counted by severity and message ID. In quiet
+    mode only message lines are written, in silent mode none.
+    The formatted output is buffered and written at most every kFlushInterval
+    seconds by flush, unless the buffer fills up or the flush is forced. Output
+    held in the buffer is written by a timer after kFlushInterval seconds at
+    most, should no flush come in the meantime.
+
+    Subclasses define the severity table, the lines to skip and the message ID pattern.
+
+    Attributes:
+        counts (collections.Counter): Number of messages by severity and message ID
+        index (MessageIndex): If defined, index the messages are recorded in
+        silent (bool): Suppress all output, messages are still counted
+    """
+
+    # Message line prefixes, as (prefix, severity, color)
+    kSeverities = ()
+    # Lines to drop, by content or by prefix
+    kSkipLines = frozenset()
+    kSkipPrefixes = ()
+    # Skipped line announcing the n-th command of a batch, followed by n
+    kCommandMarker = None
+    # Pattern matching the message ID after the severity prefix, as first group
+    kIdPattern = None
+
+    kFlushInterval = 0.1
+    kBufferSize = 0x10000
+
+    # ------------------------------------------------------------------------------
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._reSeverity = re.compile('|'.join('({})'.format(re.escape(p)) for p, _, _ in cls.kSeverities) or '(?!)')
+        cls._reId = re.compile(cls.kIdPattern) if cls.kIdPattern else None
+
+    # ------------------------------------------------------------------------------
+    def __init__(self, prefix=None, sep=' | ', quiet=False):
+        super().__init__(prefix, sep, quiet)
+
+        self.pendingchars = ''
+        self.silent = False
+        self.counts = collections.Counter()
+        self.index = None
+        self._buffer = []
+        self._buffered = 0
+        self._lastflush = 0.
+        self._lock = threading.RLock()
+        self._timer = None
+
+    # ------------------------------------------------------------------------------
+    def __del__(self):
+        try:
+            self.flush(True)
+        except Exception:
+            pass
+
+    # ------------------------------------------------------------------------------
+    def write(self, message):
+        """Writes formatted message
+
+        Args:
+            message (string): Message to format
+        """
+
+        # put any pending character first
+        msg = self.pendingchars + message
+        lEnd = msg.rfind('\n') + 1
+        self.pendingchars = msg[lEnd:]
+        if not lEnd:
+            return
+
+        lQuiet = self.quiet or self.silent
+        lSilent = self.silent
+        lPrefix = self._prefixstr
+        lSeverities = self.kSeverities
+        lSkipLines = self.kSkipLines
+        lSkipPrefixes = self.kSkipPrefixes
+        lMatchSeverity = self._reSeverity.match
+        lMatchId = self._reId.match if self._reId is not None else None
+        lCounts = self.counts
+        lIndex = self.index
+
+        lOut = []
+        for lLine in msg[:lEnd - 1].split('\n'):
+            lRet = '\n'
+            if lLine.endswith('\r'):
+                lLine, lRet = lLine[:-1], '\r\n'
+
+            if lLine in lSkipLines or lLine.startswith(lSkipPrefixes):
+                if self.kCommandMarker and self.index is not None and lLine.startswith(self.kCommandMarker):
+                    self.index.selectCommand(int(lLine[len(self.kCommandMarker):]))
+                continue
+
+            m = lMatchSeverity(lLine)
+            if m is None:
+                if not lQuiet:
+                    lOut.append(lPrefix + lLine + lRet)
+                continue
+
+            _, lSeverity, lColor = lSeverities[m.lastindex - 1]
+            lId = lMatchId(lLine, m.end()) if lMatchId is not None else None
+            lId = lId.group(1) if lId is not None else None
+            lCounts[lSeverity, lId] += 1
+            if lIndex is not None:
+                lIndex.add(lSeverity, lId, lLine)
+
+            if not lSilent:
+                lOut.append(lPrefix + lColor + lLine + kReset + lRet)
+
+        if not lOut:
+            return
+
+        lOut = ''.join(lOut)
+        with self._lock:
+            self._buffer.append(lOut)
+            self._buffered += len(lOut)
+            if self._buffered >= self.kBufferSize:
+                self.flush(True)
+            elif self._timer is None:
+                # The console may stay silent for long, do not hold the output until the next write
+                self._timer = threading.Timer(self.kFlushInterval, self.flush, (True,))
+                self._timer.daemon = True
+                self._timer.start()
+
+    # ------------------------------------------------------------------------------
+    @classmethod
+    def classify(cls, aLine):
+        """
+        Severity and message ID of a line
+
+        Args:
+            aLine (str): Output line, without line terminator
+
+        Returns:
+            tuple: Severity and message ID, None if not found, or None if the line is not a message
+        """
+        m = cls._reSeverity.match(aLine)
+        if m is None:
+            return None
+        lId = cls._reId.match(aLine, m.end()) if cls._reId is not None else None
+        return cls.kSeverities[m.lastindex - 1][1], lId.group(1) if lId is not None else None
+
+    # ------------------------------------------------------------------------------
+    def flush(self, aForce=False):
+        """Writes the buffered output, if the flush interval has elapsed or if forced
+
+        Args:
+            aForce (bool): Write regardless of the time since the last flush
+        """
+        with self._lock:
+            if not self._buffer:
+                return
+
+            lNow = time.monotonic()
+            if not aForce and lNow - self._lastflush < self.kFlushInterval:
+                return
+
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+            lText = ''.join(self._buffer)
+            self._buffer.clear()
+            self._buffered = 0
+            self._lastflush = lNow
+
+            self._write(lText)
+            self._flush()
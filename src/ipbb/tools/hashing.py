@@ -0,0 +1,186 @@
+import hashlib
+import json
+import mmap
+import os
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from os.path import isdir, join, relpath, exists
+
+
+# -----------------------------------------------------------------------------
+class ContentHasher(object):
+    """
+    Content hashing engine.
+
+    Files are read and hashed, in a pool of threads when there is enough data,
+    and their digests cached, keyed by path, size, modification time and inode,
+    so that hashing unchanged files again only costs a stat call. Directories are hashed recursively.
+    Digests of multiple paths are combined deterministically, in the order given.
+
+    Attributes:
+        algo (str): Name of the hashlib algorithm
+        cachepath (str): Path of the JSON digest cache, None to disable caching
+        threads (int): Number of reading threads, None for the executor default
+    """
+
+    # Bump whenever the layout of the cache file changes
+    kFormat = 1
+    # Read size for small files, larger ones are memory-mapped
+    kChunkSize = 0x100000
+    kMmapSize = 0x4000000
+    # Minimum amount of data to read in the thread pool
+    kPoolSize = 0x1000000
+
+    # -----------------------------------------------------------------------------
+    def __init__(self, aAlgo='sha1', aCachePath=None, aThreads=None):
+        super().__init__()
+
+        # Ensure that the selected algorithm exists
+        if getattr(hashlib, aAlgo, None) is None:
+            raise AttributeError('Hashing algorithm {0} is not available'.format(aAlgo))
+
+        self.algo = aAlgo
+        self.cachepath = aCachePath
+        self.threads = aThreads
+        # Digests by path, as [size, mtime, inode, hexdigest]
+        self._digests = {}
+        self._dirty = False
+        self._load()
+
+    # -----------------------------------------------------------------------------
+    def _load(self):
+        if self.cachepath is None or not exists(self.cachepath):
+            return
+
+        try:
+            with open(self.cachepath) as lFile:
+                lCache = json.load(lFile)
+        except (OSError, ValueError):
+            # Unreadable cache, start from scratch
+            return
+
+        if lCache.get('format') == self.kFormat and lCache.get('algo') == self.algo:
+            self._digests = lCache['files']
+
+    # -----------------------------------------------------------------------------
+    def save(self):
+        """
+        Writes the digest cache, dropping the entries of files that no longer exist
+        """
+        if self.cachepath is None or not self._dirty:
+            return
+
+        lDigests = {p: d for p, d in self._digests.items() if exists(p)}
+
+        os.makedirs(os.path.dirname(self.cachepath), exist_ok=True)
+        lTmpPath = self.cachepath + '.tmp'
+        with open(lTmpPath, 'w') as lFile:
+            json.dump({'format': self.kFormat, 'algo': self.algo, 'files': lDigests}, lFile)
+        os.replace(lTmpPath, self.cachepath)
+        self._dirty = False
+
+    # -----------------------------------------------------------------------------
+    def _read(self, aPath):
+        lHash = hashlib.new(self.algo)
+        with open(aPath, 'rb') as f:
+            lSize = os.fstat(f.fileno()).st_size
+            if lSize >= self.kMmapSize:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                    lHash.update(m)
+            else:
+                for lChunk in iter(lambda: f.read(self.kChunkSize), b''):
+                    lHash.update(lChunk)
+        return lHash.hexdigest()
+
+    # -----------------------------------------------------------------------------
+    def _lookup(self, aPath):
+        """
+        Returns the cache key of a file and its cached digest, None if not cached or out of date
+
+        Missing files, e.g. dangling links, are not cached and have the digest of no content.
+        """
+        try:
+            s = os.stat(aPath)
+        except FileNotFoundError:
+            return None, hashlib.new(self.algo).hexdigest()
+        lKey = [s.st_size, s.st_mtime_ns, s.st_ino]
+
+        lEntry = self._digests.get(aPath)
+        return lKey, (lEntry[3] if lEntry is not None and lEntry[:3] == lKey else None)
+
+    # -----------------------------------------------------------------------------
+    def _files(self, aPath):
+        """
+        Returns the files under a path, sorted, or the path itself if it is not a directory
+        """
+        if not isdir(aPath):
+            return [aPath]
+
+        lFiles = []
+        for lRoot, lDirs, lNames in os.walk(aPath):
+            lDirs.sort()
+            lFiles += [join(lRoot, n) for n in sorted(lNames)]
+        return lFiles
+
+    # -----------------------------------------------------------------------------
+    def combine(self, aDigests):
+        """
+        Returns a hash object of the concatenation of digests
+        """
+        lHash = hashlib.new(self.algo)
+        for d in aDigests:
+            lHash.update(bytes.fromhex(d))
+        return lHash
+
+    # -----------------------------------------------------------------------------
+    def hashmany(self, aPaths):
+        """
+        Hashes files and directories in parallel
+
+        Args:
+            aPaths (list): Paths of files or directories
+
+        Returns:
+            list: Hex digests, in the same order as the paths. The digest of a
+                directory combines relative paths and digests of the files it contains.
+        """
+        lPaths = list(aPaths)
+        lTrees = {p: self._files(p) for p in dict.fromkeys(lPaths)}
+        lFiles = list(dict.fromkeys(f for l in lTrees.values() for f in l))
+
+        # Modification times from this moment on are considered unstable
+        lStart = time.time_ns() - 1000000000
+
+        lDigests = {}
+        lMisses = {}
+        for f in lFiles:
+            lKey, lDigests[f] = self._lookup(f)
+            if lDigests[f] is None:
+                lMisses[f] = lKey
+
+        # Threads pay off only when there is enough data to read
+        if sum(k[0] for k in lMisses.values()) >= self.kPoolSize:
+            with ThreadPoolExecutor(self.threads) as lPool:
+                lDigests.update(zip(lMisses, lPool.map(self._read, lMisses)))
+        else:
+            lDigests.update((f, self._read(f)) for f in lMisses)
+
+        for f, lKey in lMisses.items():
+            # Files modified while hashing could change again within the timestamp resolution, do not trust them
+            if lKey[1] < lStart:
+                self._digests[f] = lKey + [lDigests[f]]
+                self._dirty = True
+
+        lResults = {}
+        for p, lTree in lTrees.items():
+            if not isdir(p):
+                lResults[p] = lDigests[p]
+                continue
+            lHash = hashlib.new(self.algo)
+            for f in lTree:
+                lHash.update(relpath(f, p).encode())
+                lHash.update(bytes.fromhex(lDigests[f]))
+            lResults[p] = lHash.hexdigest()
+
+        return [lResults[p] for p in lPaths]
@@ -4,7 +4,7 @@ import sh
 
 
 from ...utils import which
-from ..common import OutputFormatter
+from ..common import ConsoleOutputFormatter
 from ..termui import *
 
 _vsim = 'vsim'
@@ -46,64 +46,16 @@ def autodetect(executable=_vcom):
 
 
 # -------------------------------------------------------------------------
-class ModelSimOutputFormatter(OutputFormatter):
+class ModelSimOutputFormatter(ConsoleOutputFormatter):
     """Formatter for Vivado command line output
 
     Arguments:
         prefix (string): String to prepend to each line of output
     """
-
-    def __init__(self, prefix=None, sep=' | ', quiet=False):
-        super().__init__(prefix, sep, quiet)
-
-        self.pendingchars = ''
-        self.skiplines = []
-
-    def write(self, message):
-        """Writes formatted message
-        
-        Args:
-            message (string): Message to format
-        """
-        
-        # put any pending character first
-        msg = self.pendingchars + message
-        # Flush pending chars
-        self.pendingchars = ''
-
-        # Splitting with regex, allows more flexibility
-        lReNewLines = re.compile('(\r?\n)')
-
-        # lines = msg.splitlines(True)
-        lines = lReNewLines.split(msg)
-
-        if not lines[-1]:
-        # Drop the last entry if empty, i.e. the 
-            lines.pop()
-        else:
-        # Otherwise queue it for the next round
-            self.pendingchars = lines[-1]
-            del lines[-1]
-
-
-        assert (len(lines) % 2 == 0)
-
-        # Iterate over pairs, line and newline match
-        for lLine,lRet in zip(lines[::2], lines[1::2]):
-            if lLine in self.skiplines:
-                continue
-
-            lColor = None
-            if lLine.startswith('** Note:'):
-                lColor = kBlue
-            elif lLine.startswith('** Warning:'):
-                lColor = kYellow
-            elif lLine.startswith('** Error:'):
-                lColor = kRed
-            elif self.quiet:
-                continue
-
-            if lColor is not None:
-                lLine = lColor + lLine + kReset
-
-            self._write(self._prefixstr + lLine + lRet)
+    kSeverities = (
+        ('** Note:', 'NOTE', kBlue),
+        ('** Warning:', 'WARNING', kYellow),
+        ('** Error:', 'ERROR', kRed),
+    )
+    # e.g. '** Warning: (vsim-3015) ...'
+    kIdPattern = r'\s*\(([\w-]+)\)'
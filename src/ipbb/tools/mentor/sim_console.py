@@ -199,9 +199,11 @@ class ModelSimConsole(object):
             # ----------------------------------------------------------
             # Break if prompt
             if lIndex in [1, 2]:
+                self._out.flush(True)
                 break
             elif lIndex == 3:
                 lTimeoutCounts += 1
+                self._out.flush(True)
                 print ("ModelsimConsole >> Time since last command: {0}s".format(
                     lTimeoutCounts * self._process.timeout))
             # ----------------------------------------------------------
@@ -236,6 +238,7 @@ class ModelSimConsole(object):
 
         # Write one last newline
         self._out.write('- Terminating Modelsim (pid {}) -'.format(self._process.pid)+'-' * 40 + '\n')
+        self._out.flush(True)
         # Just in case
         self._process.terminate(True)
 
@@ -1,3 +1,4 @@
+import psutil
 import time
 
 # -----------------------------------------------------------------------------
@@ -121,15 +122,22 @@ class ProcessTreeAnalyzer(object):
 
         if aInterval:
             for p in lProcs:
-                with p.oneshot():
-                    p.cpu_percent()
+                try:
+                    with p.oneshot():
+                        p.cpu_percent()
+                except psutil.NoSuchProcess:
+                    pass
 
             time.sleep(aInterval)
 
         lData = []
         for p in lProcs:
-            with p.oneshot():
-                lData += [ (p.pid, [getattr(p, x)() for x in self.fields])]
+            # Children may exit while the tree is sampled, or belong to other users
+            try:
+                with p.oneshot():
+                    lData += [ (p.pid, [getattr(p, x)() for x in self.fields])]
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
 
         return lData
 
@@ -139,7 +147,7 @@ class ProcessTreeAnalyzer(object):
         lData = self.snapshot(aInterval)
 
         lSums = []
-        for row in zip(*lData):
+        for row in zip(*(d for _, d in lData)):
             if isinstance(row[0], tuple):
                 lCls = type(row[0])
                 lSums.append(lCls._make(map(sum, zip(*row))))
@@ -62,5 +62,13 @@ class TCLConsoleSnoozer(object):
     # --------------------------------------------------------------
     def __exit__(self, type, value, traceback):
         self._console.quiet = self._quiet
+
+    # --------------------------------------------------------------
+    async def __aenter__(self):
+        self.__enter__()
+
+    # --------------------------------------------------------------
+    async def __aexit__(self, type, value, traceback):
+        self.__exit__(type, value, traceback)
     # --------------------------------------------------------------
 
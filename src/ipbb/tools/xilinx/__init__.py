@@ -4,6 +4,9 @@ from .vivado_console import *
 from .vivado_hwserver import *
 from .vivado_batch import *
 from .vivado_project import *
+from .vivado_pool import *
+from .vivado_async import *
+from .vivado_scheduler import *
 
 
 from .vivadohls_console import *
@@ -0,0 +1,447 @@
+# Modules
+import asyncio
+import logging
+import os
+import pexpect
+import psutil
+
+# Elements
+from os.path import join, abspath
+from ..common import MessageIndex
+from .vivado_common import VivadoOutputFormatter, _parseversion, kBatchMarker
+from .vivado_console import VivadoConsoleError, _spawnVivado, _checkEcho, _OutputCollector, _writeBatchScript, _batchOutput
+from .vivado_project import kRunInfoProps, runInfoCommand, parseRunInfo, isRunDone
+
+
+# ------------------------------------------------------------------------------
+class AsyncVivadoConsole(object):
+    """
+    Asyncio variant of VivadoConsole
+
+    Commands are coroutines: while Vivado executes one, the event loop is free
+    to run other tasks, e.g. other consoles, run monitors or resource samplers.
+    Cancelling a command, directly, through a timeout or by Ctrl-C in
+    asyncio.run, interrupts it in Vivado; the console waits for the prompt
+    again before executing the next command.
+
+    Consoles are created by the start coroutine, or attached to the Vivado
+    process of a synchronous console.
+
+    Attributes:
+        variant (str): Vivado variant
+        version (str): Vivado version
+        processinfo (psutil.Process): Vivado process descriptor
+    """
+
+    # Time allowed to Vivado to get back to the prompt after an interruption, in seconds
+    kInterruptTimeout = 30
+
+    # --------------------------------------------------------------
+    @classmethod
+    async def start(cls, executable='vivado', stopOnCWarnings=False, echo=True, showbanner=False, sid=None, loglabel=None):
+        """
+        Starts Vivado and waits for its prompt
+
+        Args:
+            executable (str): Executable name
+            stopOnCWarnings (bool): Stop on Critical Warnings
+            echo (bool): Switch to enable echo messages
+            showbanner (bool, optional): Show Vivado startup banner
+            sid (str, optional): Session identifier
+            loglabel (str, optional): Label of the Vivado log and journal files, sid by default
+
+        Returns:
+            AsyncVivadoConsole: Console object
+        """
+        lOut = VivadoOutputFormatter(sid, quiet=(not echo))
+        lOut.write('\n' + '- Starting Vivado -' + '-' * 40 + '\n')
+
+        lConsole = cls(*_spawnVivado(executable, lOut, echo, loglabel if loglabel else sid), lOut, stopOnCWarnings)
+        lConsole.sessionid = sid
+        lConsole._out.quiet = (not showbanner)
+        try:
+            lOutput = await lConsole._expectPrompt(100)
+        except BaseException:
+            lConsole.terminate()
+            raise
+        lConsole._variant, lConsole._version = _parseversion(''.join(l for l in lOutput[0] if l is not None))
+        lConsole._out.quiet = (not echo)
+        lConsole._out.write('\n' + '- Started {} {} -'.format(lConsole.variant, lConsole.version) + '-' * 40 + '\n')
+        lConsole._out.flush(True)
+        return lConsole
+
+    # --------------------------------------------------------------
+    @classmethod
+    def attach(cls, aConsole):
+        """
+        Drives the Vivado process of a synchronous console, e.g. to monitor runs without blocking
+
+        The output and the message indexes are shared with the synchronous
+        console, which must not be used while the coroutines are running.
+
+        Args:
+            aConsole (VivadoConsole): Synchronous console
+
+        Returns:
+            AsyncVivadoConsole: Console object
+        """
+        lConsole = cls(aConsole._process, aConsole._rePrompt, aConsole._reNewline, aConsole._out, aConsole.stopOnCWarnings, aConsole._messages)
+        lConsole._variant, lConsole._version = aConsole.variant, aConsole.version
+        return lConsole
+
+    # --------------------------------------------------------------
+    def __init__(self, aProcess, aRePrompt, aReNewline, aOut, aStopOnCWarnings, aMessages=None):
+        super().__init__()
+
+        self._log = logging.getLogger('Vivado')
+        self._stopOnCWarnings = aStopOnCWarnings
+
+        self._process, self._rePrompt, self._reNewline = aProcess, aRePrompt, aReNewline
+        self._out = aOut
+        self._messages = aMessages if aMessages is not None else {}
+
+        self._processinfo = psutil.Process(self._process.pid)
+        self._variant = self._version = None
+        # Serialises the commands of concurrent tasks
+        self._lock = asyncio.Lock()
+        # Set when a command was interrupted before the prompt
+        self._resync = False
+
+    # --------------------------------------------------------------
+    @property
+    def quiet(self):
+        return self._out.quiet
+
+    @quiet.setter
+    def quiet(self, value):
+        self._out.quiet = value
+
+    # --------------------------------------------------------------
+    @property
+    def sessionid(self):
+        return self._out.prefix
+
+    @sessionid.setter
+    def sessionid(self, prefix):
+        self._out.prefix = prefix
+        if prefix not in self._messages:
+            self._messages[prefix] = MessageIndex(prefix)
+        self._out.index = self._messages[prefix]
+
+    # --------------------------------------------------------------
+    @property
+    def messages(self):
+        return self._out.index
+
+    # --------------------------------------------------------------
+    @property
+    def stopOnCWarnings(self):
+        return self._stopOnCWarnings
+
+    @stopOnCWarnings.setter
+    def stopOnCWarnings(self, stop):
+        self._stopOnCWarnings = stop
+
+    # --------------------------------------------------------------
+    @property
+    def variant(self):
+        return self._variant
+
+    @property
+    def version(self):
+        return self._version
+
+    @property
+    def processinfo(self):
+        return self._processinfo
+
+    # --------------------------------------------------------------
+    def isAlive(self):
+        return self._process.isalive()
+
+    # --------------------------------------------------------------
+    def usage(self):
+        """
+        Samples the resources used by Vivado and its child processes, e.g. the runs it launched
+
+        Returns:
+            dict: CPU usage since the previous sample, in percent of one core, and resident memory, in bytes
+        """
+        lCpu = lRss = 0
+        try:
+            lProcesses = [self._processinfo] + self._processinfo.children(recursive=True)
+        except psutil.Error:
+            return {'cpu': 0., 'rss': 0}
+        for p in lProcesses:
+            try:
+                with p.oneshot():
+                    lCpu += p.cpu_percent()
+                    lRss += p.memory_info().rss
+            except psutil.Error:
+                pass
+        return {'cpu': lCpu, 'rss': lRss}
+
+    # --------------------------------------------------------------
+    async def _readable(self):
+        lLoop = asyncio.get_running_loop()
+        lFuture = lLoop.create_future()
+        lFd = self._process.child_fd
+
+        def ready():
+            if not lFuture.done():
+                lFuture.set_result(None)
+
+        lLoop.add_reader(lFd, ready)
+        try:
+            await lFuture
+        finally:
+            lLoop.remove_reader(lFd)
+
+    # --------------------------------------------------------------
+    async def _expect(self, aPatterns):
+        """
+        Waits for one of the compiled patterns, the last one being pexpect.TIMEOUT
+
+        pexpect only reads the output already available, the event loop runs
+        while waiting for more. The formatter is flushed before waiting.
+
+        Returns:
+            int: Index of the pattern matched
+        """
+        lTimeout = len(aPatterns) - 1
+        while True:
+            lIndex = self._process.expect_list(aPatterns, timeout=0)
+            if lIndex != lTimeout:
+                return lIndex
+            self._out.flush(True)
+            await self._readable()
+
+    # --------------------------------------------------------------
+    async def _send(self, aText):
+        self._process.sendline(aText)
+        await self._expect(self._reNewline)
+        # Hard check: First line of output must match the injected command
+        _checkEcho(aText, self._process.before)
+
+    # --------------------------------------------------------------
+    async def _expectPrompt(self, aMaxLen, aMarker=None):
+        lOutput = _OutputCollector(aMaxLen, aMarker)
+
+        while True:
+            lIndex = await self._expect(self._rePrompt)
+            if lIndex == 1:
+                self._out.flush(True)
+                return lOutput.done()
+
+            lOutput.add(str(self._process.before))
+
+    # --------------------------------------------------------------
+    async def _resynchronise(self):
+        """
+        Waits for the prompt following the interruption of a cancelled command
+        """
+        try:
+            await asyncio.wait_for(self._expectPrompt(1), self.kInterruptTimeout)
+        except asyncio.TimeoutError:
+            raise RuntimeError('Vivado not responding after interruption') from None
+        self._resync = False
+
+    # --------------------------------------------------------------
+    async def _run(self, aText, aMaxLen, aMarker=None):
+        async with self._lock:
+            if self._resync:
+                await self._resynchronise()
+
+            try:
+                await self._send(aText)
+                return await self._expectPrompt(aMaxLen, aMarker)
+            except asyncio.CancelledError:
+                self._resync = True
+                self._process.sendintr()
+                raise
+
+    # --------------------------------------------------------------
+    def __call__(self, aCmd='', aMaxLen=1):
+        return self.execute(aCmd, aMaxLen)
+
+    # --------------------------------------------------------------
+    async def execute(self, aCmd, aMaxLen=1, aTimeout=None):
+        """
+        Executes a command, see VivadoConsole.execute
+
+        Args:
+            aCmd (str): Command
+            aMaxLen (int): Number of output lines to keep
+            aTimeout (float, optional): Time after which the command is interrupted, in seconds
+
+        Raises:
+            asyncio.TimeoutError: The command timed out
+        """
+        if not isinstance(aCmd, str):
+            raise TypeError('expected string, found ' + str(type(aCmd)))
+
+        if aCmd.count('\n') != 0:
+            raise ValueError('Format error. Newline not allowed in commands')
+
+        self._out.index.setCommands([aCmd])
+        lBuffer, lErrors, lCriticalWarnings = await asyncio.wait_for(self._run(aCmd, aMaxLen), aTimeout)
+
+        if lErrors or (self._stopOnCWarnings and lCriticalWarnings):
+            raise VivadoConsoleError(aCmd, lErrors, lCriticalWarnings)
+
+        return tuple(lBuffer)
+
+    # --------------------------------------------------------------
+    async def executeMany(self, aCmds, aMaxLen=1, aTimeout=None):
+        """
+        Executes a list of commands in a single round trip, see VivadoConsole.executeMany
+        """
+        if not isinstance(aCmds, list):
+            raise TypeError('expected list')
+
+        if any(c.count('\n') != 0 for c in aCmds):
+            raise ValueError('Format error. Newline not allowed in commands')
+
+        if not aCmds:
+            return []
+
+        if self._stopOnCWarnings:
+            return [await self.execute(c, aMaxLen, aTimeout) for c in aCmds]
+
+        lScript = _writeBatchScript(aCmds)
+        try:
+            self._out.index.setCommands(aCmds)
+            lResults = await asyncio.wait_for(
+                self._run('source -notrace {{{}}}'.format(lScript), aMaxLen, kBatchMarker), aTimeout
+            )
+        finally:
+            os.remove(lScript)
+
+        return _batchOutput(aCmds, lResults)
+
+    # --------------------------------------------------------------
+    async def changeMsgSeverity(self, aIds, aSeverity):
+        lIds = aIds if isinstance(aIds, list) else [aIds]
+        for c in ('set_msg_config -id {{{}}} -new_severity {{{}}}'.format(i, aSeverity) for i in lIds):
+            await self.execute(c)
+
+    # --------------------------------------------------------------
+    def terminate(self):
+        """
+        Kills Vivado without waiting
+        """
+        self._process.terminate(True)
+
+    # --------------------------------------------------------------
+    async def close(self, aTimeout=30):
+        """
+        Quits Vivado, killing it if it does not exit within aTimeout seconds
+        """
+        if not self._process.isalive():
+            return
+
+        self._log.debug('Shutting Vivado down')
+        try:
+            await self.execute('quit', aTimeout=aTimeout)
+        except (pexpect.ExceptionPexpect, asyncio.TimeoutError):
+            pass
+
+        self._out.write('- Terminating Vivado (pid {}) -'.format(self._process.pid) + '-' * 40 + '\n')
+        self._out.flush(True)
+        self.terminate()
+
+
+# ------------------------------------------------------------------------------
+class AsyncVivadoSession(object):
+    """
+    Async context manager starting a console on entry and closing it on exit
+
+        async with AsyncVivadoSession(sid='synth') as console:
+            await console('...')
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self._console = None
+        self._args = args
+        self._kwargs = kwargs
+
+    async def __aenter__(self):
+        self._console = await AsyncVivadoConsole.start(*self._args, **self._kwargs)
+        return self._console
+
+    async def __aexit__(self, type, value, traceback):
+        if self._console:
+            # Do not wait for a console left busy by a cancelled command
+            if type is asyncio.CancelledError or type is KeyboardInterrupt:
+                self._console.terminate()
+            else:
+                await self._console.close()
+            self._console = None
+
+
+# ------------------------------------------------------------------------------
+class AsyncVivadoProject(object):
+    """
+    Project helper for asynchronous consoles, see VivadoProject
+
+    Attributes:
+        console (AsyncVivadoConsole): Console object
+    """
+
+    def __init__(self, aConsole):
+        super().__init__()
+        self.console = aConsole
+
+    # ------------------------------------------------------------------------------
+    async def current(self):
+        return (await self.console('current_project -quiet'))[0]
+
+    # ------------------------------------------------------------------------------
+    async def open(self, aPath):
+        """
+        Opens a project, unless already open
+        """
+        cp = await self.current()
+        if cp:
+            cp_dir = (await self.console('get_property DIRECTORY [current_project]'))[0]
+            if abspath(join(cp_dir, cp + '.xpr')) == abspath(aPath):
+                return
+            await self.close()
+
+        await self.console('open_project {}'.format(aPath))
+
+    # ------------------------------------------------------------------------------
+    async def close(self):
+        await self.console('close_project')
+
+    # ------------------------------------------------------------------------------
+    async def readRunInfo(self, aProps=None):
+        """
+        Reads the properties of all runs in a single console round trip, see VivadoProject.readRunInfo
+        """
+        lProps = aProps if aProps is not None else kRunInfoProps
+        return parseRunInfo(await self.console(runInfoCommand(lProps), None), lProps)
+
+    # ------------------------------------------------------------------------------
+    async def monitorRun(self, aRun, aInterval, aCallback=None):
+        """
+        Polls the properties of the runs until aRun is complete or failed, without blocking the event loop
+
+        Args:
+            aRun (str): Name of the run
+            aInterval (float): Polling interval, in seconds
+            aCallback (callable, optional): Called after each poll with the run properties and the resource usage
+
+        Returns:
+            dict: Last run properties, by run name
+        """
+        while True:
+            lRunProps = await self.readRunInfo()
+            if aCallback is not None:
+                aCallback(lRunProps, self.console.usage())
+
+            if isRunDone(lRunProps[aRun]):
+                return lRunProps
+
+            await asyncio.sleep(aInterval)
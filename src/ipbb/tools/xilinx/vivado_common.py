@@ -4,9 +4,17 @@ import sh
 
 
 from ...utils import which
-from ..common import OutputFormatter
+from ..common import ConsoleOutputFormatter
 from ..termui import *
 
+# Prefix of the control lines ipbb makes Vivado print, hidden from the console output
+kOutputMarker = '@ipbb@'
+# Line separating the output of batched commands
+kBatchMarker = kOutputMarker + 'cmd'
+# Line holding the value of a run property
+kRunInfoMarker = kOutputMarker + 'run'
+
+
 # ------------------------------------------------
 class VivadoNotFoundError(Exception):
 
@@ -59,66 +67,21 @@ def autodetect(executable='vivado'):
 
 
 # -------------------------------------------------------------------------
-class VivadoOutputFormatter(OutputFormatter):
+class VivadoOutputFormatter(ConsoleOutputFormatter):
     """Formatter for Vivado command line output
 
     Arguments:
         prefix (string): String to prepend to each line of output
     """
-    def __init__(self, prefix=None, sep=' | ', quiet=False):
-        super().__init__(prefix, sep, quiet)
-
-        self.pendingchars = ''
-        self.skiplines = ['\r\x1b[12C\r']
-
-    def write(self, message):
-        """Writes formatted message
-        
-        Args:
-            message (string): Message to format
-        """
-        
-        # put any pending character first
-        msg = self.pendingchars + message
-        # Flush pending chars
-        self.pendingchars = ''
-
-        # Splitting with regex, allows more flexibility
-        lReNewLines = re.compile('(\r?\n)')
-
-        # lines = msg.splitlines(True)
-        lines = lReNewLines.split(msg)
-
-        if not lines[-1]:
-        # Drop the last entry if empty, i.e. the 
-            lines.pop()
-        else:
-        # Otherwise queue it for the next round
-            self.pendingchars = lines[-1]
-            del lines[-1]
-
-
-        assert (len(lines) % 2 == 0)
-
-        # Iterate over pairs, line and newline match
-        for lLine,lRet in zip(lines[::2], lines[1::2]):
-            if lLine in self.skiplines:
-                continue
-
-            lColor = None
-            if lLine.startswith('INFO:'):
-                lColor = kBlue
-            elif lLine.startswith('WARNING:'):
-                lColor = kYellow
-            elif lLine.startswith('CRITICAL WARNING:'):
-                lColor = kOrange
-            elif lLine.startswith('ERROR:'):
-                lColor = kRed
-            elif self.quiet:
-                continue
-
-            if lColor is not None:
-                lLine = lColor + lLine + kReset
-
-            self._write(self._prefixstr + lLine + lRet)
+    kSeverities = (
+        ('INFO:', 'INFO', kBlue),
+        ('WARNING:', 'WARNING', kYellow),
+        ('CRITICAL WARNING:', 'CRITICAL WARNING', kOrange),
+        ('ERROR:', 'ERROR', kRed),
+    )
+    kSkipLines = frozenset(['\r\x1b[12C\r'])
+    kSkipPrefixes = (kOutputMarker,)
+    kCommandMarker = kBatchMarker
+    # e.g. 'WARNING: [Synth 8-327] ...'
+    kIdPattern = r'\s*\[([^\]]+)\]'
 # -------------------------------------------------------------------------
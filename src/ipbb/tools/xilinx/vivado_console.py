@@ -17,8 +17,9 @@ from os.path import join, split, exists, splitext, basename
 from click import style
 from ...utils import which, DEFAULT_ENCODING
 # from ..termui import *
+from ..common import MessageIndex
 from ..tcl_console import consolectxmanager, TCLConsoleSnoozer
-from .vivado_common import VivadoNotFoundError, autodetect, VivadoOutputFormatter, _parseversion
+from .vivado_common import VivadoNotFoundError, autodetect, VivadoOutputFormatter, _parseversion, kBatchMarker
 
 # ------------------------------------------------
 # This is for when python 2.7 will become available
@@ -53,6 +54,195 @@ def on_parent_exit(signame):
 
 
 
+# -------------------------------------------------------------------------
+_reCharBackspace = re.compile(r'.\x08')
+
+
+def _checkEcho(aText, aBefore):
+    """
+    Hard check: First line of output must match the injected command
+    """
+
+    lCmdRcvd = _reCharBackspace.sub('', aBefore)
+    lCmdSent = aText.split('\n')[0]
+    if lCmdRcvd != lCmdSent:
+        # --------------------------------------------------------------
+        print('-' * 20)
+        print('Echo character-by-character diff')
+        # Find where the 2 strings don't match
+        print('sent:', len(lCmdSent), 'rcvd', len(lCmdRcvd))
+
+        # find the first mismatching character
+        minlen = min(len(lCmdRcvd), len(lCmdSent))
+        maxlen = max(len(lCmdRcvd), len(lCmdSent))
+        x = next((i for i in range(minlen) if lCmdRcvd[i] != lCmdSent[i]), minlen)
+
+        a = x - 10
+        b = x + 10
+        for i in range(max(a, 0), min(b, maxlen)):
+            r = lCmdRcvd[i] if len(lCmdRcvd) > i else ' '
+            s = lCmdSent[i] if len(lCmdSent) > i else ' '
+            # print i, '\t', r, ord(r), ord(r) > 128, '\t', s, ord(s),
+            # ord(s) > 128
+            print(i, '\t', repr(s), repr(r), r == s, ord(r))
+
+        print(''.join([str(i % 10) for i in range(len(lCmdRcvd))]))
+        print(lCmdRcvd)
+        print(''.join([str(i % 10) for i in range(len(lCmdSent))]))
+        print(lCmdSent)
+        # --------------------------------------------------------------
+        raise RuntimeError(
+            "Command and first output lines don't match Sent='{0}', Rcvd='{1}".format(
+                lCmdSent, lCmdRcvd
+            )
+        )
+
+
+# -------------------------------------------------------------------------
+# Prompt patterns, by executable
+kPromptMap = {
+    'vivado': re.compile(r'Vivado%\s'),
+    'vivado_lab': re.compile(r'vivado_lab%\s')
+}
+kNewlines = [u'\r\n']
+
+
+# -------------------------------------------------------------------------
+def _spawnVivado(aExecutable, aOut, aEcho, aLogLabel, aPrompt=None):
+    """
+    Starts Vivado in TCL mode, shared by the synchronous and asynchronous consoles
+
+    Args:
+        aExecutable (str): Executable name
+        aOut (VivadoOutputFormatter): Formatter the console output is written to
+        aEcho (bool): Switch to enable echo messages
+        aLogLabel (str): Label of the Vivado log and journal files, None for none
+        aPrompt (str, optional): Prompt pattern, by default the one of the executable
+
+    Returns:
+        tuple: pexpect process, compiled [newline, prompt, TIMEOUT] and [newline, TIMEOUT] pattern lists
+
+    Raises:
+        VivadoNotFoundError: The executable is not in PATH
+    """
+    if not which(aExecutable):
+        raise VivadoNotFoundError(aExecutable + " not found in PATH. Have you sourced Vivado\'s setup script?")
+
+    lLogName = aExecutable + (('_' + aLogLabel) if aLogLabel else '')
+    lProcess = pexpect.spawn(aExecutable, [
+            '-mode', 'tcl',
+            '-log', lLogName + '.log',
+            '-journal', lLogName + '.jou'
+        ],
+        echo=aEcho,
+        logfile=aOut,
+        encoding=DEFAULT_ENCODING,
+        preexec_fn=on_parent_exit('SIGTERM')
+    )
+    # Set send delay
+    lProcess.delaybeforesend = 0.00
+
+    lRePrompt = lProcess.compile_pattern_list(kNewlines + [aPrompt if aPrompt else kPromptMap[aExecutable], pexpect.TIMEOUT])
+    lReNewline = lProcess.compile_pattern_list(kNewlines + [pexpect.TIMEOUT])
+    return lProcess, lRePrompt, lReNewline
+
+
+# -------------------------------------------------------------------------
+class _OutputCollector(object):
+    """
+    Collects the output lines of commands, with their errors and critical warnings.
+
+    If a marker is specified, the output is split at each line starting with
+    it, one (buffer, errors, critical warnings) tuple per marker. Lines preceding
+    the first marker are dropped.
+    """
+
+    _reError = re.compile(r'^ERROR:')
+    _reCriticalWarning = re.compile(r'^CRITICAL WARNING:')
+
+    def __init__(self, aMaxLen, aMarker=None):
+        super().__init__()
+        self._maxlen = aMaxLen
+        self._marker = aMarker
+        self._results = []
+        self._next()
+
+    def _next(self):
+        self._current = (collections.deque([], self._maxlen), [], [])
+
+    def add(self, aLine):
+        # Start collecting the output of the next command
+        if self._marker is not None and aLine.startswith(self._marker):
+            self._next()
+            self._results.append(self._current)
+            return
+
+        lBuffer, lErrors, lCriticalWarnings = self._current
+        # Store the output in the circular buffer
+        lBuffer.append(aLine)
+
+        if self._reError.match(aLine):
+            lErrors.append(aLine)
+        elif self._reCriticalWarning.match(aLine):
+            lCriticalWarnings.append(aLine)
+
+    def done(self):
+        """
+        Returns the (buffer, errors, critical warnings) tuple, or the list of tuples if a marker is specified
+        """
+        lResults = self._results if self._marker is not None else [self._current]
+        for b, _, _ in lResults:
+            if not b:
+                b.append(None)
+        return lResults if self._marker is not None else self._current
+
+
+# -------------------------------------------------------------------------
+# TCL variable holding the result of the last command of a batch
+kBatchResultVar = 'ipbb_batch_result'
+
+
+# -------------------------------------------------------------------------
+def _writeBatchScript(aCmds):
+    """
+    Writes the commands to a temporary TCL script, each preceded by a marker line, and returns its path
+
+    Sourced scripts do not print the results of their commands as the console
+    does: each command result is stored and printed, unless empty. Comments and
+    blank lines are written as they are. A last marker, numbered after the
+    commands, is printed once all of them completed.
+    """
+    with tempfile.NamedTemporaryFile('w', prefix='ipbb_batch_', suffix='.tcl', delete=False) as lScript:
+        for i, c in enumerate(aCmds):
+            if c.strip() and not c.lstrip().startswith('#'):
+                c = 'set {0} [{1}]; if {{${0} ne ""}} {{puts ${0}}}'.format(kBatchResultVar, c)
+            lScript.write('puts "{} {}"\n{}\n'.format(kBatchMarker, i, c))
+        lScript.write('puts "{} {}"\n'.format(kBatchMarker, len(aCmds)))
+    return lScript.name
+
+
+# -------------------------------------------------------------------------
+def _batchOutput(aCmds, aResults):
+    """
+    Returns the output of each command of a sourced batch, raising a VivadoConsoleError for the first failing one
+    """
+    lResults = aResults[:len(aCmds)]
+    for c, (lBuffer, lErrors, lCriticalWarnings) in zip(aCmds, lResults):
+        if lErrors:
+            raise VivadoConsoleError(c, lErrors, lCriticalWarnings)
+
+    # Sourcing can also stop on plain TCL errors, not reported as ERROR messages: the end marker is then missing
+    if len(aResults) != len(aCmds) + 1:
+        lBuffer, lErrors, lCriticalWarnings = lResults[-1] if lResults else ([], [], [])
+        raise VivadoConsoleError(
+            aCmds[max(len(lResults) - 1, 0)],
+            [l for l in lBuffer if l is not None],
+            lCriticalWarnings
+        )
+
+    return [tuple(b) for b, _, _ in lResults]
+
+
 # -------------------------------------------------------------------------
 class VivadoConsoleError(Exception):
     """Exception raised for errors in the input.
@@ -84,15 +274,7 @@ class VivadoConsole(object):
     
     """
 
-    __reCharBackspace = re.compile(r'.\x08')
-    __reError = re.compile(r'^ERROR:')
-    __reCriticalWarning = re.compile(r'^CRITICAL WARNING:')
     __instances = set()
-    __promptMap = {
-        'vivado': re.compile(r'Vivado%\s'),
-        'vivado_lab': re.compile(r'vivado_lab%\s')
-    }
-    __newlines = [u'\r\n']
 
     # --------------------------------------------------------------
     @classmethod
@@ -144,45 +326,22 @@ class VivadoConsole(object):
         self._stopOnCWarnings = stopOnCWarnings
         # define what executable to run
         self._executable = executable
-        if not which(self._executable):
-            raise VivadoNotFoundError(self._executable + " not found in PATH. Have you sourced Vivado\'s setup script?")
-
-        # Define the prompt to use
-        if prompt is None:
-            # set prompt pattern based on sim variant
-            self._prompt = self.__promptMap[executable]
-        else:
-            self._prompt = prompt
 
-        # Set up the output formatter
+        # Set up the output formatter, recording messages in an index per session
+        self._messages = {}
         self._out = VivadoOutputFormatter(
             sid, quiet=(not echo)
         )
+        self.sessionid = sid
 
         self._out.write('\n' + '- Starting Vivado -'+'-' * 40 + '\n')
         self._out.quiet = (not showbanner)
        
         # If loglabel is not specified, use sid
-        loglabel = loglabel if loglabel else sid
-        lLogName = self._executable + (('_' + loglabel) if loglabel else '')
-        self._process = pexpect.spawn(self._executable,[
-                    '-mode', 'tcl', 
-                    '-log', lLogName+'.log',
-                    '-journal', lLogName+'.jou'
-                ],
-            echo=echo,
-            logfile=self._out,
-            encoding=DEFAULT_ENCODING,
-            preexec_fn=on_parent_exit('SIGTERM')
+        self._process, self._rePrompt, self._reNewline = _spawnVivado(
+            self._executable, self._out, echo, loglabel if loglabel else sid, prompt
         )
 
-        # Compile the list of patterns to detect the prompt
-        self._rePrompt = self._process.compile_pattern_list(
-            self.__newlines+[self._prompt, pexpect.TIMEOUT]
-        )
-        # Set send delay
-        self._process.delaybeforesend = 0.00  # 1
-
         # Wait for vivado to wake up
         startupstr = self.__expectPrompt()
         
@@ -191,6 +350,7 @@ class VivadoConsole(object):
         self._out.quiet = (not echo)
         self._log.debug('Vivado up and running')
         self._out.write('\n' + '- Started {} {} -'.format(self.variant, self.version)+'-' * 40 + '\n')
+        self._out.flush(True)
 
         # Create a process descriptor
         self._processinfo = psutil.Process(self._process.pid)
@@ -228,6 +388,16 @@ class VivadoConsole(object):
     @sessionid.setter
     def sessionid(self, prefix):
         self._out.prefix = prefix
+        if prefix not in self._messages:
+            self._messages[prefix] = MessageIndex(prefix)
+        self._out.index = self._messages[prefix]
+
+    # --------------------------------------------------------------
+    @property
+    def messages(self):
+        """MessageIndex of the current session
+        """
+        return self._out.index
 
 
     # --------------------------------------------------------------
@@ -238,63 +408,27 @@ class VivadoConsole(object):
     def __call__(self, aCmd='', aMaxLen=1):
         return self.execute(aCmd, aMaxLen)
 
-    # --------------------------------------------------------------
-    def __checkEcho(self, aText, aBefore):
-        """
-        Hard check: First line of output must match the injected command
-        """
-
-        lCmdRcvd = self.__reCharBackspace.sub('', aBefore)
-        lCmdSent = aText.split('\n')[0]
-        if lCmdRcvd != lCmdSent:
-            # --------------------------------------------------------------
-            print('-' * 20)
-            print('Echo character-by-character diff')
-            # Find where the 2 strings don't match
-            print('sent:', len(lCmdSent), 'rcvd', len(lCmdRcvd))
-
-            # find the first mismatching character
-            minlen = min(len(lCmdRcvd), len(lCmdSent))
-            maxlen = max(len(lCmdRcvd), len(lCmdSent))
-            x = next((i for i in range(minlen) if lCmdRcvd[i] != lCmdSent[i]), minlen)
-
-            a = x - 10
-            b = x + 10
-            for i in range(max(a, 0), min(b, maxlen)):
-                r = lCmdRcvd[i] if len(lCmdRcvd) > i else ' '
-                s = lCmdSent[i] if len(lCmdSent) > i else ' '
-                # print i, '\t', r, ord(r), ord(r) > 128, '\t', s, ord(s),
-                # ord(s) > 128
-                print(i, '\t', repr(s), repr(r), r == s, ord(r))
-
-            print(''.join([str(i % 10) for i in range(len(lCmdRcvd))]))
-            print(lCmdRcvd)
-            print(''.join([str(i % 10) for i in range(len(lCmdSent))]))
-            print(lCmdSent)
-            # --------------------------------------------------------------
-            raise RuntimeError(
-                "Command and first output lines don't match Sent='{0}', Rcvd='{1}".format(
-                    lCmdSent, lCmdRcvd
-                )
-            )
-
     # --------------------------------------------------------------
     def __send(self, aText):
 
         x = self._process.sendline(aText)
-        lIndex = self._process.expect(self.__newlines)
+        lIndex = self._process.expect(kNewlines)
 
         # --------------------------------------------------------------
         # Hard check: First line of output must match the injected command
-        self.__checkEcho(aText, self._process.before)
+        _checkEcho(aText, self._process.before)
 
     # --------------------------------------------------------------
-    def __expectPrompt(self, aMaxLen=100):
+    def __expectPrompt(self, aMaxLen=100, aMarker=None):
+        """
+        Collects the output until the next prompt.
+
+        If a marker is specified, the output is split at each line starting with
+        it and a list of (buffer, errors, critical warnings) tuples is returned,
+        one per marker. Lines preceding the first marker are dropped.
+        """
 
-        lIndex = None
-        lBuffer = collections.deque([], aMaxLen)
-        lErrors = []
-        lCriticalWarnings = []
+        lOutput = _OutputCollector(aMaxLen, aMarker)
 
         # --------------------------------------------------------------
         lTimeoutCounts = 0
@@ -305,27 +439,20 @@ class VivadoConsole(object):
             # ----------------------------------------------------------
             # Break if prompt
             if lIndex == 1:
-                if not lBuffer:
-                    lBuffer.append(None)
+                self._out.flush(True)
                 break
             elif lIndex == 2:
                 lTimeoutCounts += 1
+                self._out.flush(True)
                 print ("VivadoConsole >> Time since last command: {0}s".format(
                     lTimeoutCounts * self._process.timeout))
             # ----------------------------------------------------------
 
-            lBefore = str(self._process.before)
-            # Store the output in the circular buffer
-            lBuffer.append(lBefore)
-
-            if self.__reError.match(lBefore):
-                lErrors.append(lBefore)
-            elif self.__reCriticalWarning.match(lBefore):
-                lCriticalWarnings.append(lBefore)
+            lOutput.add(str(self._process.before))
 
         # --------------------------------------------------------------
 
-        return lBuffer, lErrors, lCriticalWarnings
+        return lOutput.done()
     # --------------------------------------------------------------
 
     # --------------------------------------------------------------
@@ -349,6 +476,7 @@ class VivadoConsole(object):
 
         # Write one last newline
         self._out.write('- Terminating Vivado (pid {}) -'.format(self._process.pid)+'-' * 40 + '\n')
+        self._out.flush(True)
         # Just in case
         self._process.terminate(True)
 
@@ -365,6 +493,7 @@ class VivadoConsole(object):
         if aCmd.count('\n') != 0:
             raise ValueError('Format error. Newline not allowed in commands')
 
+        self._out.index.setCommands([aCmd])
         self.__send(aCmd)
         lBuffer, lErrors, lCriticalWarnings = self.__expectPrompt(aMaxLen)
 
@@ -373,6 +502,45 @@ class VivadoConsole(object):
 
         return tuple(lBuffer)
 
+    # --------------------------------------------------------------
+    def executeMany(self, aCmds, aMaxLen=1):
+        """
+        Executes a list of commands in a single round trip, sourcing them from a temporary script.
+
+        Each command is preceded by a marker line, used to attribute output lines, errors
+        and critical warnings to it. Command results are printed as the console does. Sourcing stops at the first failing command, which
+        is reported by a VivadoConsoleError as in execute. Stopping on critical warnings
+        requires a check after each command: in that case commands are executed one by one.
+
+        Args:
+            aCmds (list): Commands to execute
+            aMaxLen (int): Number of output lines to keep for each command
+
+        Returns:
+            list: Output of each command, as returned by execute
+        """
+        if not isinstance(aCmds, list):
+            raise TypeError('expected list')
+
+        if any(c.count('\n') != 0 for c in aCmds):
+            raise ValueError('Format error. Newline not allowed in commands')
+
+        if not aCmds:
+            return []
+
+        if self._stopOnCWarnings:
+            return [self.execute(c, aMaxLen) for c in aCmds]
+
+        lScript = _writeBatchScript(aCmds)
+        try:
+            self._out.index.setCommands(aCmds)
+            self.__send('source -notrace {{{}}}'.format(lScript))
+            lResults = self.__expectPrompt(aMaxLen, kBatchMarker)
+        finally:
+            os.remove(lScript)
+
+        return _batchOutput(aCmds, lResults)
+
     # --------------------------------------------------------------
     def changeMsgSeverity(self, aIds, aSeverity):
         """Change the severity of a single/multiple messages
@@ -399,6 +567,44 @@ class VivadoSession(VivadoConsole):
 VivadoSnoozer = TCLConsoleSnoozer
 
 
+# ------------------------------------------------------------------------------
+class VivadoCommandBatch(object):
+    """
+    Collects TCL commands and executes them in blocks through VivadoConsole.executeMany.
+
+    Can replace the console as output of the project generators. Comments and
+    empty lines are dropped. Commands still queued must be sent with flush.
+
+    Attributes:
+        console (VivadoConsole): Console object
+        size (int): Number of commands per block, 0 to send everything on flush
+    """
+
+    def __init__(self, aConsole, aSize=0):
+        super().__init__()
+        self.console = aConsole
+        self.size = aSize
+        self._cmds = []
+
+    def __call__(self, aCmd=''):
+        if not aCmd or aCmd.startswith('#'):
+            return
+
+        self._cmds.append(aCmd)
+        if self.size and len(self._cmds) >= self.size:
+            self.flush()
+
+    def flush(self):
+        """
+        Executes the queued commands
+
+        Returns:
+            list: Output of each command
+        """
+        lCmds, self._cmds = self._cmds, []
+        return self.console.executeMany(lCmds)
+
+
 # ------------------------------------------------------------------------------
 class VivadoSessionContextAdapter(object):
 
@@ -426,7 +632,7 @@ class VivadoSessionContextAdapter(object):
 
     def __exit__(self, type, value, traceback):
         if self._closeonexit:
-            self._console.close()
+            self._mgr._dispose(self._console)
             self._console = None
     
 
@@ -437,32 +643,66 @@ class VivadoSessionManager(object):
     Attributes:
         persistent (TYPE): Description
     """
-    def __init__(self, keep=False, echo=True, loglabel=None):
+    def __init__(self, keep=False, echo=True, loglabel=None, socket=None, pool=None):
         """Constructor
         
         Args:
             keep (TYPE): Description
+            socket (str, optional): Socket of a Vivado daemon to use, when running, instead of spawning Vivado
+            pool (VivadoConsolePool, optional): Pool to take consoles from, and return them to, instead of spawning Vivado
         """
         super().__init__()
         self._keep = keep
         self._echo = echo
         self._loglabel = loglabel
+        self._socket = socket
+        self._pool = pool
         if self._keep:
             self._console = None
 
     def __del__(self):
+        self.close()
+
+    def close(self):
+        """Closes the kept console, or returns it to the pool
+        """
         if self._keep and self._console:
-            self._console.close()
+            self._dispose(self._console)
+            self._console = None
+
+    def _spawn(self, sid):
+
+        if self._socket:
+            from .vivado_server import VivadoClient, VivadoDaemonBusyError
+            try:
+                lClient = VivadoClient.connect(self._socket, sid=sid, echo=self._echo)
+            except (VivadoDaemonBusyError, PermissionError) as lExc:
+                logging.getLogger('Vivado').warning('%s. Starting Vivado instead', lExc)
+                lClient = None
+            if lClient is not None:
+                return lClient
+
+        if self._pool is not None:
+            return self._pool.acquire(sid, os.getcwd())
+
+        return VivadoConsole(sid=sid, loglabel=self._loglabel, echo=self._echo)
+
+    def _dispose(self, aConsole):
+
+        if self._pool is not None and isinstance(aConsole, VivadoConsole):
+            self._pool.release(aConsole)
+        else:
+            aConsole.close()
 
     def _getconsole(self, sid):
 
         if self._keep:
             if not self._console:
-                self._console = VivadoConsole(sid=sid, loglabel=self._loglabel, echo=self._echo)
+                self._console = self._spawn(sid)
             self._console.sessionid = sid
             return self._console
         else:
-            return VivadoConsole(sid=sid, loglabel=self._loglabel, echo=self._echo)
+            return self._spawn(sid)
 
 
     def getctx(self, sid):
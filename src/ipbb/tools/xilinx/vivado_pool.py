@@ -0,0 +1,214 @@
+# Modules
+import collections
+import logging
+import pexpect
+import psutil
+import threading
+
+# Elements
+from concurrent.futures import ThreadPoolExecutor
+
+from .vivado_console import VivadoConsole, VivadoConsoleError, VivadoSnoozer
+
+
+# ------------------------------------------------------------------------------
+class VivadoConsolePool(object):
+    """
+    Bounded pool of Vivado consoles, started ahead of use.
+
+    Consoles are started in background threads, handed out by acquire and
+    returned by release, which closes the open project for the next user.
+    Returned consoles exceeding the memory cap, measured on the Vivado
+    processes and their children, are closed instead of being kept.
+
+    Attributes:
+        size (int): Maximum number of consoles
+        maxmemory (int): Memory cap of the pool consoles, in bytes, None for no cap
+    """
+
+    # ------------------------------------------------------------------------------
+    def __init__(self, aSize, aMaxMemory=None, echo=True, loglabel='pool'):
+        """
+        Constructor
+
+        Args:
+            aSize (int): Maximum number of consoles
+            aMaxMemory (int, optional): Memory cap, in bytes
+            echo (bool): Switch to enable echo messages
+            loglabel (str): Prefix of the consoles log labels
+        """
+        super().__init__()
+        self._log = logging.getLogger('Vivado')
+
+        self.size = aSize
+        self.maxmemory = aMaxMemory
+        self._echo = echo
+        self._loglabel = loglabel
+
+        self._cond = threading.Condition()
+        self._idle = collections.deque()
+        self._busy = set()
+        self._starting = 0
+        self._started = 0
+        self._error = None
+        # Consoles receive SIGTERM when the thread that started them exits (see on_parent_exit),
+        # the executor threads must live as long as the pool.
+        self._executor = ThreadPoolExecutor(aSize, thread_name_prefix='vivado-pool')
+
+    # ------------------------------------------------------------------------------
+    def __enter__(self):
+        return self
+
+    # ------------------------------------------------------------------------------
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    # ------------------------------------------------------------------------------
+    @staticmethod
+    def _rss(aConsole):
+        try:
+            lProcess = aConsole.processinfo
+            return sum(p.memory_info().rss for p in [lProcess] + lProcess.children(recursive=True))
+        except psutil.Error:
+            return 0
+
+    # ------------------------------------------------------------------------------
+    def memory(self):
+        """
+        Resident memory of the pool consoles, including their child processes, in bytes
+        """
+        with self._cond:
+            lConsoles = list(self._idle) + list(self._busy)
+        return sum(self._rss(c) for c in lConsoles)
+
+    # ------------------------------------------------------------------------------
+    def _overMemory(self):
+        return self.maxmemory is not None and self.memory() >= self.maxmemory
+
+    # ------------------------------------------------------------------------------
+    def _start(self, aLogLabel):
+        try:
+            lConsole = VivadoConsole(sid=aLogLabel, loglabel=aLogLabel, echo=self._echo)
+        except Exception as lExc:
+            with self._cond:
+                self._starting -= 1
+                self._error = lExc
+                self._cond.notify_all()
+            return
+
+        with self._cond:
+            self._starting -= 1
+            self._idle.append(lConsole)
+            self._cond.notify_all()
+
+    # ------------------------------------------------------------------------------
+    def _schedule(self):
+        # To be called with the lock held
+        self._starting += 1
+        self._started += 1
+        self._executor.submit(self._start, '{}{}'.format(self._loglabel, self._started))
+
+    # ------------------------------------------------------------------------------
+    def warm(self, aCount=None):
+        """
+        Starts consoles in the background, within the pool size, unless the memory cap is reached
+
+        Args:
+            aCount (int, optional): Number of consoles to have ready, idle or starting, by default the pool size
+        """
+        if self._overMemory():
+            return
+
+        with self._cond:
+            lReady = len(self._idle) + self._starting
+            lFree = self.size - lReady - len(self._busy)
+            for _ in range(lFree if aCount is None else min(aCount - lReady, lFree)):
+                self._schedule()
+
+    # ------------------------------------------------------------------------------
+    def acquire(self, sid, aDir=None):
+        """
+        Hands out an idle console, waiting for one to be started or released if needed
+
+        Args:
+            sid (str): Session identifier
+            aDir (str, optional): Working directory of the console
+
+        Returns:
+            VivadoConsole: Console object
+        """
+        with self._cond:
+            while True:
+                if self._error is not None:
+                    lExc, self._error = self._error, None
+                    raise lExc
+
+                while self._idle:
+                    lConsole = self._idle.popleft()
+                    if lConsole.isAlive():
+                        break
+                    self._log.debug('Dropping dead pool console')
+                else:
+                    lConsole = None
+
+                if lConsole is not None:
+                    break
+
+                # Start a new console if none is on the way, unless others are about to be returned
+                lFull = len(self._busy) + self._starting >= self.size
+                if not self._starting and not lFull and (not self._busy or not self._overMemory()):
+                    self._schedule()
+                self._cond.wait()
+
+            self._busy.add(lConsole)
+
+        lConsole.sessionid = sid
+        if aDir is not None:
+            with VivadoSnoozer(lConsole):
+                lConsole('cd {{{}}}'.format(aDir))
+        return lConsole
+
+    # ------------------------------------------------------------------------------
+    def release(self, aConsole):
+        """
+        Returns a console to the pool, closing the current project
+
+        Args:
+            aConsole (VivadoConsole): Console obtained from acquire
+        """
+        lKeep = aConsole.isAlive()
+        if lKeep:
+            try:
+                with VivadoSnoozer(aConsole):
+                    aConsole('close_project -quiet')
+            except (VivadoConsoleError, pexpect.ExceptionPexpect, RuntimeError):
+                lKeep = False
+
+        if lKeep and self._overMemory():
+            self._log.debug('Pool memory cap exceeded, closing console')
+            lKeep = False
+
+        with self._cond:
+            self._busy.discard(aConsole)
+            if lKeep:
+                self._idle.append(aConsole)
+            self._cond.notify_all()
+
+        if not lKeep:
+            aConsole.close()
+
+    # ------------------------------------------------------------------------------
+    def close(self):
+        """
+        Closes all consoles, waiting for those being started
+        """
+        with self._cond:
+            while self._starting:
+                self._cond.wait()
+            lConsoles = list(self._idle) + list(self._busy)
+            self._idle.clear()
+            self._busy.clear()
+        for c in lConsoles:
+            c.close()
+        # Stop the threads only once the consoles are closed
+        self._executor.shutdown(wait=True)
@@ -2,6 +2,59 @@
 from os.path import join, dirname, splitext, abspath
 from collections import OrderedDict
 from .vivado_console import VivadoConsole
+from .vivado_common import kRunInfoMarker
+
+# Run properties read by default
+kRunInfoProps = (
+    'STATUS',
+    'NEEDS_REFRESH',
+    'PROGRESS',
+    # 'IS_IMPLEMENTATION',
+    # 'IS_SYNTHESIS',
+    'STATS.ELAPSED',
+    # 'STATS.ELAPSED',
+)
+
+
+# ------------------------------------------------------------------------------
+def runInfoCommand(aProps):
+    """
+    TCL command printing one marker line per run and property
+    """
+    return 'foreach r [get_runs] {{ foreach p {{{0}}} {{ puts "{1}\\t$r\\t$p\\t[get_property $p $r]" }} }}'.format(
+        ' '.join(aProps), kRunInfoMarker
+    )
+
+
+# ------------------------------------------------------------------------------
+def parseRunInfo(aOutput, aProps):
+    """
+    Parses the output of the runInfoCommand
+
+    Returns:
+        dict: Ordered dictionaries of property values, by run name, sorted
+    """
+    lValues = {}
+    for l in aOutput:
+        if l is None or not l.startswith(kRunInfoMarker + '\t'):
+            continue
+        _, lRun, lProp, lValue = l.split('\t', 3)
+        lValues.setdefault(lRun, {})[lProp] = lValue
+
+    return {
+        r: OrderedDict((p, lValues[r][p]) for p in aProps)
+        for r in sorted(lValues)
+    }
+
+
+# ------------------------------------------------------------------------------
+def isRunDone(aProps):
+    """
+    True if the run described by the properties is complete, failed or cancelled
+    """
+    lStatus = aProps['STATUS']
+    return aProps['PROGRESS'] == '100%' or 'ERROR' in lStatus or lStatus.endswith('Cancelled')
+
 
 # ------------------------------------------------------------------------------
 class VivadoProject(object):
@@ -103,37 +156,19 @@ class VivadoProject(object):
 
     # ------------------------------------------------------------------------------
     def readRunInfo(self, aProps=None):
-        """Reads 
-        
+        """
+        Reads the properties of all runs in a single console round trip
+
+        A TCL loop prints one marker line per run and property, parsed here.
+
         Args:
-            aProps (None, optional): Description
-        
+            aProps (list, optional): Run properties to read. Defaults to status, refresh flag, progress and elapsed time
+
         Returns:
-            TYPE: Description
+            dict: Ordered dictionaries of property values, by run name, sorted
         """
-        lInfos = {}
-        lProps = aProps if aProps is not None else (
-            'STATUS',
-            'NEEDS_REFRESH',
-            'PROGRESS',
-            # 'IS_IMPLEMENTATION',
-            # 'IS_SYNTHESIS',
-            'STATS.ELAPSED',
-            # 'STATS.ELAPSED',
-        )
-
-        # Gather data about existing runs
-        lRuns = self.console('get_runs')[0].split()
-
-        for lRun in sorted(lRuns):
-
-            lValues = (
-                    self.console('get_property {0} [get_runs {1}]'.format(p, lRun))[0]
-                    for p in lProps
-                )
-            lInfos[lRun] = OrderedDict(zip(lProps, lValues))
-
-        return lInfos
+        lProps = aProps if aProps is not None else kRunInfoProps
+        return parseRunInfo(self.console(runInfoCommand(lProps), None), lProps)
 
     # ------------------------------------------------------------------------------
     def listfiles(self):
@@ -0,0 +1,213 @@
+# Modules
+import json
+import logging
+import os
+import psutil
+import threading
+
+# Elements
+from os.path import abspath, exists, relpath
+
+from ..pstree import ProcessTreeAnalyzer
+
+
+# ------------------------------------------------------------------------------
+class RunMemoryHistory(object):
+    """
+    Peak memory of the Vivado runs of a project, as measured in previous builds
+
+    Attributes:
+        path (str): Path of the JSON history file, None to keep it in memory only
+        default (int): Estimate of the runs never measured, when no run was, in bytes
+    """
+
+    # Bump whenever the layout of the history file changes
+    kFormat = 1
+
+    # ------------------------------------------------------------------------------
+    def __init__(self, aPath=None, aDefault=2 * 2**30):
+        super().__init__()
+        self.path = aPath
+        self.default = aDefault
+        self._peaks = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    # ------------------------------------------------------------------------------
+    def _load(self):
+        if self.path is None or not exists(self.path):
+            return
+
+        try:
+            with open(self.path) as lFile:
+                lHistory = json.load(lFile)
+        except (OSError, ValueError):
+            # Unreadable history, start from scratch
+            return
+
+        if lHistory.get('format') == self.kFormat:
+            self._peaks = lHistory['peaks']
+
+    # ------------------------------------------------------------------------------
+    def save(self):
+        if self.path is None:
+            return
+
+        with self._lock:
+            lPeaks = dict(self._peaks)
+
+        lTmpPath = self.path + '.tmp'
+        with open(lTmpPath, 'w') as lFile:
+            json.dump({'format': self.kFormat, 'peaks': lPeaks}, lFile, indent=1)
+        os.replace(lTmpPath, self.path)
+
+    # ------------------------------------------------------------------------------
+    def record(self, aRun, aPeak):
+        """
+        Stores the peak memory of a run, replacing the previous measurement
+        """
+        with self._lock:
+            self._peaks[aRun] = aPeak
+
+    # ------------------------------------------------------------------------------
+    def estimate(self, aRun):
+        """
+        Expected peak memory of a run, in bytes
+
+        Runs never measured are expected to need as much as the largest run measured.
+        """
+        with self._lock:
+            if aRun in self._peaks:
+                return self._peaks[aRun]
+            return max(self._peaks.values()) if self._peaks else self.default
+
+
+# ------------------------------------------------------------------------------
+class RunMemorySampler(object):
+    """
+    Context manager sampling the memory of the runs launched by Vivado, in a background thread
+
+    Runs are told apart by the working directory of the processes, the run
+    directory. Their peaks are recorded in the history as they grow, the history
+    is saved when the context is left.
+
+    Attributes:
+        history (RunMemoryHistory): History the peaks are recorded into, None to record none
+        peaks (dict): Peak memory of the runs observed, in bytes, by run name
+    """
+
+    # ------------------------------------------------------------------------------
+    def __init__(self, aProcess, aRunsDir, aHistory=None, aInterval=1):
+        """
+        Constructor
+
+        Args:
+            aProcess (psutil.Process): Vivado process
+            aRunsDir (str): Runs directory of the project
+            aHistory (RunMemoryHistory, optional): History to record the peaks into
+            aInterval (float): Sampling interval, in seconds
+        """
+        super().__init__()
+        self._log = logging.getLogger('Vivado')
+        self._analyzer = ProcessTreeAnalyzer(aProcess, ['cwd', 'memory_info'])
+        self._runsdir = abspath(aRunsDir)
+        self.history = aHistory
+        self._interval = aInterval
+        self._stop = threading.Event()
+        self._thread = None
+        self.peaks = {}
+
+    # ------------------------------------------------------------------------------
+    def sample(self):
+        """
+        Measures the memory of the runs being executed
+
+        Returns:
+            dict: Resident memory of the runs, in bytes, by run name
+        """
+        try:
+            lData = self._analyzer.snapshot()
+        except psutil.Error:
+            return {}
+
+        lRuns = {}
+        for _, (lCwd, lMemory) in lData:
+            lPath = relpath(lCwd, self._runsdir)
+            if lPath.startswith(os.pardir) or lPath == os.curdir:
+                continue
+            lRun = lPath.split(os.sep)[0]
+            lRuns[lRun] = lRuns.get(lRun, 0) + lMemory.rss
+
+        for lRun, lRss in lRuns.items():
+            if lRss > self.peaks.get(lRun, 0):
+                self.peaks[lRun] = lRss
+                if self.history is not None:
+                    self.history.record(lRun, lRss)
+        return lRuns
+
+    # ------------------------------------------------------------------------------
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            self.sample()
+
+    # ------------------------------------------------------------------------------
+    def __enter__(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='vivado-runs-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    # ------------------------------------------------------------------------------
+    def __exit__(self, type, value, traceback):
+        self._stop.set()
+        self._thread.join()
+        if self.history is not None and self.peaks:
+            try:
+                self.history.save()
+            except OSError as lExc:
+                self._log.warning('Failed to save the run memory history: %s', lExc)
+
+
+# ------------------------------------------------------------------------------
+class RunScheduler(object):
+    """
+    Splits runs into waves that fit in the cores and memory available
+
+    Runs are placed, largest memory estimate first, in the first wave with a
+    free core and enough memory left, or in a new wave. A run larger than the
+    memory available runs alone.
+
+    Attributes:
+        history (RunMemoryHistory): Memory estimates of the runs
+        cpus (int): Maximum number of runs in a wave
+        memory (int): Memory available to a wave, in bytes
+    """
+
+    # ------------------------------------------------------------------------------
+    def __init__(self, aHistory, aCpus, aMemory):
+        super().__init__()
+        self.history = aHistory
+        self.cpus = max(1, aCpus)
+        self.memory = aMemory
+
+    # ------------------------------------------------------------------------------
+    def plan(self, aRuns):
+        """
+        Returns the waves of runs, as lists of run names
+
+        Args:
+            aRuns (list): Names of the runs to schedule
+        """
+        lWaves = []
+        lLoads = []
+        for lRun in sorted(aRuns, key=lambda r: (-self.history.estimate(r), r)):
+            lEstimate = self.history.estimate(lRun)
+            for lWave, lLoad in zip(lWaves, lLoads):
+                if len(lWave) < self.cpus and lLoad[0] + lEstimate <= self.memory:
+                    lWave.append(lRun)
+                    lLoad[0] += lEstimate
+                    break
+            else:
+                lWaves.append([lRun])
+                lLoads.append([lEstimate])
+        return lWaves
@@ -0,0 +1,330 @@
+import hashlib
+import json
+import os
+import psutil
+import socket
+import stat
+import sys
+import tempfile
+
+from os.path import join, abspath, exists
+
+from ..common import MessageIndex
+from .vivado_console import VivadoConsole, VivadoConsoleError
+
+
+# ------------------------------------------------------------------------------
+class VivadoDaemonBusyError(Exception):
+    """
+    Exception raised when the Vivado daemon does not answer, while serving another client
+    """
+
+
+# ------------------------------------------------------------------------------
+def daemonSocketPath(aProjPath):
+    """
+    Path of the Unix socket of the Vivado daemon serving a project area.
+
+    Sockets are created in a private directory, in the user runtime directory if
+    defined or else in the temporary one, rather than in the project area, which
+    may be too deep for a socket path or on a network filesystem.
+
+    Args:
+        aProjPath (str): Project area path
+    """
+    lRuntimeDir = os.environ.get('XDG_RUNTIME_DIR')
+    if lRuntimeDir:
+        lDir = join(lRuntimeDir, 'ipbb')
+    else:
+        lDir = join(tempfile.gettempdir(), 'ipbb-{}'.format(os.getuid()))
+    lHash = hashlib.sha1(abspath(aProjPath).encode()).hexdigest()[:16]
+    return join(lDir, 'vivado-{}.sock'.format(lHash))
+
+
+# ------------------------------------------------------------------------------
+def checkSocketDir(aDir):
+    """
+    Ensures that a socket directory is private: a directory, not a link, owned by
+    the user and accessible to the user only
+
+    Raises:
+        PermissionError: If the directory is not private
+    """
+    s = os.lstat(aDir)
+    if not stat.S_ISDIR(s.st_mode) or s.st_uid != os.getuid() or stat.S_IMODE(s.st_mode) != 0o700:
+        raise PermissionError(
+            'Vivado daemon directory {} is not private (owner {}, mode {:o}), refusing to use it'.format(
+                aDir, s.st_uid, stat.S_IMODE(s.st_mode)
+            )
+        )
+
+
+# ------------------------------------------------------------------------------
+class VivadoServer(object):
+    """
+    Long-lived Vivado console, serving ipbb clients over a Unix socket.
+
+    Clients are served one at a time. Requests and replies are JSON documents,
+    one per line. The messages of a session are counted from the first request of
+    the client, not accumulated across clients using the same session id. While a request is executed, the console output is forwarded to
+    the client as 'out' messages, preceding the reply.
+
+    Attributes:
+        path (str): Socket path
+    """
+
+    # ------------------------------------------------------------------------------
+    def __init__(self, aPath, aLogLabel='daemon'):
+        super().__init__()
+        self.path = aPath
+        self._loglabel = aLogLabel
+        self._console = None
+        self._client = None
+        self._sids = set()
+        self._running = False
+
+    # ------------------------------------------------------------------------------
+    def _send(self, aMsg):
+        self._client.sendall(json.dumps(aMsg).encode() + b'\n')
+
+    # ------------------------------------------------------------------------------
+    def _forward(self, aText):
+        if self._client is None:
+            sys.stdout.write(aText)
+            sys.stdout.flush()
+            return
+        try:
+            self._send({'out': aText})
+        except OSError:
+            # Client gone, keep executing its request
+            pass
+
+    # ------------------------------------------------------------------------------
+    def _dispatch(self, aRequest):
+        lOp = aRequest['op']
+        lConsole = self._console
+
+        if lOp == 'info':
+            return {'variant': lConsole.variant, 'version': lConsole.version, 'pid': lConsole.processinfo.pid}
+        elif lOp == 'quit':
+            self._running = False
+            return {}
+
+        lSid = aRequest.get('sid', None)
+        if lSid not in self._sids:
+            # The console outlives the clients, start their sessions with empty message indexes
+            lConsole._messages.pop(lSid, None)
+            self._sids.add(lSid)
+
+        lConsole.quiet = aRequest.get('quiet', False)
+        lConsole.sessionid = lSid
+        lConsole.stopOnCWarnings = aRequest.get('stopOnCWarnings', False)
+
+        if lOp == 'execute':
+            return {'output': lConsole.execute(aRequest['cmd'], aRequest.get('maxlen', 1))}
+        elif lOp == 'executeMany':
+            return {'output': lConsole.executeMany(aRequest['cmds'], aRequest.get('maxlen', 1))}
+        elif lOp == 'messages':
+            return {'messages': lConsole.messages.todict()}
+
+        raise ValueError('Unknown request ' + lOp)
+
+    # ------------------------------------------------------------------------------
+    def _serve(self, aClient):
+        self._client = aClient
+        self._sids = set()
+        lStream = aClient.makefile('rb')
+        try:
+            for lLine in lStream:
+                lRequest = json.loads(lLine)
+                try:
+                    lReply = self._dispatch(lRequest)
+                    lReply['status'] = 'ok'
+                except VivadoConsoleError as lExc:
+                    lReply = {
+                        'status': 'error',
+                        'command': lExc.command,
+                        'errors': lExc.errors,
+                        'criticalWarns': lExc.criticalWarns,
+                    }
+                except Exception as lExc:
+                    lReply = {'status': 'exception', 'message': '{}: {}'.format(type(lExc).__name__, lExc)}
+                self._send(lReply)
+
+                if not self._running or not self._console.isAlive():
+                    break
+        except OSError:
+            pass
+        finally:
+            lStream.close()
+            self._client = None
+
+    # ------------------------------------------------------------------------------
+    def run(self):
+        """
+        Starts Vivado and serves clients until a quit request is received or Vivado exits
+        """
+        lDir = os.path.dirname(self.path)
+        os.makedirs(lDir, mode=0o700, exist_ok=True)
+        checkSocketDir(lDir)
+        if exists(self.path):
+            os.remove(self.path)
+
+        self._console = VivadoConsole(sid='daemon', loglabel=self._loglabel)
+        self._console._out._write = self._forward
+        self._console._out._flush = lambda: None
+
+        lSocket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        lSocket.bind(self.path)
+        os.chmod(self.path, 0o600)
+        lSocket.listen()
+
+        self._running = True
+        try:
+            while self._running and self._console.isAlive():
+                lClient, _ = lSocket.accept()
+                with lClient:
+                    self._serve(lClient)
+        finally:
+            lSocket.close()
+            os.remove(self.path)
+            self._console.close()
+
+
+# ------------------------------------------------------------------------------
+class VivadoClient(object):
+    """
+    Console interface to a Vivado daemon, exposing the VivadoConsole methods used by ipbb.
+
+    Attributes:
+        path (str): Socket path
+        variant (str): Vivado variant
+        version (str): Vivado version
+    """
+
+    # Time to wait for the daemon to answer the connection, in seconds
+    kConnectTimeout = 5
+
+    # ------------------------------------------------------------------------------
+    @classmethod
+    def connect(cls, aPath, **kwargs):
+        """
+        Returns a client connected to the daemon listening on aPath, None if there is none
+
+        Raises:
+            PermissionError: If the socket directory is not private
+            VivadoDaemonBusyError: If the daemon is serving another client
+        """
+        if not exists(aPath):
+            return None
+        checkSocketDir(os.path.dirname(aPath))
+        try:
+            return cls(aPath, **kwargs)
+        except VivadoDaemonBusyError:
+            raise
+        except OSError:
+            return None
+
+    # ------------------------------------------------------------------------------
+    def __init__(self, aPath, sid=None, echo=True, stopOnCWarnings=False, loglabel=None):
+        super().__init__()
+        self.path = aPath
+        self.sessionid = sid
+        self.quiet = not echo
+        self.stopOnCWarnings = stopOnCWarnings
+
+        # The daemon accepts connections while serving another client, but only answers once done
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(self.kConnectTimeout)
+        self._stream = None
+        try:
+            self._socket.connect(aPath)
+            self._stream = self._socket.makefile('rb')
+            lInfo = self._request('info')
+        except socket.timeout:
+            self.close()
+            raise VivadoDaemonBusyError('Vivado daemon {} busy, serving another client'.format(aPath))
+        except Exception:
+            self.close()
+            raise
+        self._socket.settimeout(None)
+
+        self.variant = lInfo['variant']
+        self.version = lInfo['version']
+        self._processinfo = psutil.Process(lInfo['pid'])
+
+    # ------------------------------------------------------------------------------
+    @property
+    def processinfo(self):
+        return self._processinfo
+
+    # ------------------------------------------------------------------------------
+    @property
+    def messages(self):
+        """
+        Copy of the daemon console MessageIndex of the current session
+        """
+        return MessageIndex.fromdict(self._request('messages')['messages'])
+
+    # ------------------------------------------------------------------------------
+    def isAlive(self):
+        return self._processinfo.is_running()
+
+    # ------------------------------------------------------------------------------
+    def _request(self, aOp, **kwargs):
+        kwargs.update(op=aOp, sid=self.sessionid, quiet=self.quiet, stopOnCWarnings=self.stopOnCWarnings)
+        self._socket.sendall(json.dumps(kwargs).encode() + b'\n')
+
+        for lLine in self._stream:
+            lMsg = json.loads(lLine)
+            if 'out' in lMsg:
+                sys.stdout.write(lMsg['out'])
+                sys.stdout.flush()
+                continue
+
+            if lMsg['status'] == 'error':
+                raise VivadoConsoleError(lMsg['command'], lMsg['errors'], lMsg['criticalWarns'])
+            elif lMsg['status'] == 'exception':
+                raise RuntimeError('Vivado daemon: ' + lMsg['message'])
+            return lMsg
+
+        raise ConnectionError('Vivado daemon closed the connection')
+
+    # ------------------------------------------------------------------------------
+    def __call__(self, aCmd='', aMaxLen=1):
+        return self.execute(aCmd, aMaxLen)
+
+    # ------------------------------------------------------------------------------
+    def execute(self, aCmd, aMaxLen=1):
+        return tuple(self._request('execute', cmd=aCmd, maxlen=aMaxLen)['output'])
+
+    # ------------------------------------------------------------------------------
+    def executeMany(self, aCmds, aMaxLen=1):
+        return [tuple(o) for o in self._request('executeMany', cmds=aCmds, maxlen=aMaxLen)['output']]
+
+    # ------------------------------------------------------------------------------
+    def changeMsgSeverity(self, aIds, aSeverity):
+        lIds = aIds if isinstance(aIds, list) else [aIds]
+        self.executeMany(['set_msg_config -id {{{}}} -new_severity {{{}}}'.format(i, aSeverity) for i in lIds])
+
+    # ------------------------------------------------------------------------------
+    def quit(self):
+        """
+        Stops the daemon
+        """
+        self._request('quit')
+        self.close()
+
+    # ------------------------------------------------------------------------------
+    def close(self):
+        """
+        Disconnects from the daemon, leaving it running
+        """
+        if self._stream is not None:
+            self._stream.close()
+        self._socket.close()
+
+
+# ------------------------------------------------------------------------------
+if __name__ == '__main__':
+    VivadoServer(sys.argv[1]).run()
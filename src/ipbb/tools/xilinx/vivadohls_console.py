@@ -16,7 +16,7 @@ import psutil
 from os.path import join, split, exists, splitext, basename
 from click import style
 from ...utils import which, DEFAULT_ENCODING
-from ..common import OutputFormatter
+from ..common import ConsoleOutputFormatter
 from ..termui import *
 from ..tcl_console import consolectxmanager, TCLConsoleSnoozer
 
@@ -78,87 +78,26 @@ def autodetecthls(executable: str='vivado_hls') -> tuple:
 
 
 # -------------------------------------------------------------------------
-class VivadoHLSOutputFormatter(OutputFormatter):
+class VivadoHLSOutputFormatter(ConsoleOutputFormatter):
     """Formatter for Vivado command line output
     
     Arguments:
         prefix (string): String to prepend to each line of output
-    
-    Attributes:
-        pendingchars (str): Description
-        skiplines (list): Regexes which, if matched, will skip the writing of a line
     """
-    def __init__(self, prefix=None, sep=' | ', quiet=False):
-        super().__init__(prefix, sep, quiet)
-
-        self.pendingchars = ''
-        self.skiplines = [r'\r\x1b[12C\r']
+    kSeverities = (
+        ('INFO:', 'INFO', kBlue),
+        ('WARNING:', 'WARNING', kYellow),
+        ('CRITICAL WARNING:', 'CRITICAL WARNING', kOrange),
+        ('ERROR:', 'ERROR', kRed),
+    )
+    kSkipLines = frozenset([r'\r\x1b[12C\r'])
+    # e.g. 'WARNING: [HLS 200-40] ...'
+    kIdPattern = r'\s*\[([^\]]+)\]'
 
     def write(self, message):
-        """Writes formatted message
-        
-        Args:
-            message (string): Message to format
-        """
-        
-        # TODELETE
         if kHLSLogDebug:
             print(kCyan+'raw in  >> '+kReset+repr(message))
-            if self.pendingchars:
-                print(kCyan+'raw pen >> '+kReset+repr(self.pendingchars))
-
-        # put any pending character first
-        msg = self.pendingchars + message
-        # Flush pending chars
-        self.pendingchars = ''
-
-        # Splitting with regex, allows more flexibility
-        lReNewLines = re.compile('(\r?\n)')
-
-        # lines = msg.splitlines(True)
-        lines = lReNewLines.split(msg)
-
-        # TODELETE
-        if kHLSLogDebug:
-            print(kRed+'split   >> '+kReset+repr(lines))
-
-        if not lines[-1]:
-        # Drop the last entry if empty, i.e. the 
-            lines.pop()
-        else:
-        # Otherwise queue it for the next round
-            self.pendingchars = lines[-1]
-            del lines[-1]
-
-
-        assert (len(lines) % 2 == 0)
-        # TODELETE
-        if kHLSLogDebug:
-            print(kRed+'c split >> '+kReset+repr(lines))
-
-        # Iterate over pairs, line and newline match
-        for lLine,lRet in zip(lines[::2], lines[1::2]):
-            if lLine in self.skiplines:
-                continue
-
-            lColor = None
-            if lLine.startswith('INFO:'):
-                lColor = kBlue
-            elif lLine.startswith('WARNING:'):
-                lColor = kYellow
-            elif lLine.startswith('CRITICAL WARNING:'):
-                lColor = kOrange
-            elif lLine.startswith('ERROR:'):
-                lColor = kRed
-            elif self.quiet:
-                continue
-
-            if lColor is not None:
-                lLine = lColor + lLine + kReset
-
-            if kHLSLogDebug:
-                self._write(kBlue+"fmtxout >> "+kReset+repr(self._prefixstr + lLine + lRet) + '\n')
-            self._write(self._prefixstr + lLine + lRet)
+        super().write(message)
 # -------------------------------------------------------------------------
 
 
@@ -294,6 +233,7 @@ class VivadoHLSConsole(object):
         self._out.quiet = (not echo)
         self._log.debug('VivadoHLS up and running')
         self._out.write('\n' + '- Started {} {} -'.format(self.variant, self.version)+'-' * 40 + '\n')
+        self._out.flush(True)
 
         # Create a process descriptor
         self._processinfo = psutil.Process(self._process.pid)
@@ -391,9 +331,11 @@ class VivadoHLSConsole(object):
             if lIndex == 1:
                 if not lBuffer:
                     lBuffer.append(None)
+                self._out.flush(True)
                 break
             elif lIndex == 2:
                 lTimeoutCounts += 1
+                self._out.flush(True)
                 print ("VivadoHLSConsole >> Time since last command: {0}s".format(
                     lTimeoutCounts * self._process.timeout))
             # ----------------------------------------------------------
@@ -432,6 +374,7 @@ class VivadoHLSConsole(object):
 
         # Write one last newline
         self._out.write('- Terminating VivadoHLS (pid {}) -'.format(self._process.pid)+'-' * 40 + '\n')
+        self._out.flush(True)
         # Just in case
         self._process.terminate(True)
 
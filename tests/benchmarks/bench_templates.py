@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of the dep line variables substitution.
+
+Compares the per-line cost of building an AlienTemplate for every line with
+substituteTemplate, on the lines of a generated dep tree.
+"""
+
+import click
+import tempfile
+import time
+
+from glob import glob
+from os.path import join
+
+from ipbb.tools.alien import AlienTree, AlienTemplate, substituteTemplate
+from ipbb.tools.alien import _parseTemplate
+
+from deptree import generate, generatorOptions
+
+
+# ------------------------------------------------------------------------------
+def _loadLines(aSrcDir):
+    lSettings = AlienTree()
+    lLines = []
+    for lPath in glob(join(aSrcDir, '*', '*', 'firmware', 'cfg', '*.d*')):
+        with open(lPath) as f:
+            for l in f:
+                l = l.strip()
+                if not l or l[0] == '#':
+                    continue
+                if l[0] == '@':
+                    k, v = l[1:].split('=')
+                    lSettings[k.strip()] = eval(v)
+                    continue
+                if l[0] == '?':
+                    l = l.split('?', 2)[2].strip()
+                lLines.append(l)
+    lSettings.lock(True)
+    return lLines, lSettings
+
+
+# ------------------------------------------------------------------------------
+def _time(aFunc, aLines, aSettings, aRepeat):
+    lBest = None
+    for _ in range(aRepeat):
+        lStart = time.perf_counter()
+        for l in aLines:
+            aFunc(l, aSettings)
+        lElapsed = time.perf_counter() - lStart
+        lBest = lElapsed if lBest is None else min(lBest, lElapsed)
+    return lBest
+
+
+# ------------------------------------------------------------------------------
+@click.command()
+@generatorOptions
+@click.option('-r', '--repeat', default=5, help='Number of repetitions, the best one is reported')
+def cli(packages, components, fanout, lines, files, conditionals, d3, seed, repeat):
+    '''Compare the per-line cost of the dep variables substitution'''
+
+    with tempfile.TemporaryDirectory() as lTmpDir:
+        generate(lTmpDir, packages, components, fanout, lines, files, conditionals, d3, seed)
+        lLines, lSettings = _loadLines(lTmpDir)
+
+    lOld = _time(lambda l, s: AlienTemplate(l).substitute(s), lLines, lSettings, repeat)
+    _parseTemplate.cache_clear()
+    lNew = _time(substituteTemplate, lLines, lSettings, repeat)
+
+    click.echo('{} lines, {} with placeholders'.format(len(lLines), sum('$' in l for l in lLines)))
+    click.echo('AlienTemplate.substitute: {:8.1f} ns/line'.format(lOld / len(lLines) * 1e9))
+    click.echo('substituteTemplate:       {:8.1f} ns/line'.format(lNew / len(lLines) * 1e9))
+    click.echo('speedup:                  {:8.1f}x'.format(lOld / lNew))
+
+
+if __name__ == '__main__':
+    cli()
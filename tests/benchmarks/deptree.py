@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Generator of synthetic dep trees, used by the parser benchmarks.
+
+Every package holds a tree of components: component i includes components
+i*fanout+1 ... i*fanout+fanout, and the top-level dep file includes the root
+component of every package. Component dep files mix plain, library, wildcard,
+conditional and parametrised src lines over a small set of source files,
+so that the same directories are matched over and over.
+"""
+
+import click
+import random
+
+from os import makedirs
+from os.path import join, exists
+from shutil import rmtree
+
+kTopPackage = 'bench'
+kTopComponent = 'top'
+kTopDepFile = 'top.d3'
+
+# Settings required by the project generators
+kTopSettings = [
+    '@device_name = "xc7k325t"',
+    '@device_package = "ffg900"',
+    '@device_speed = "-2"',
+]
+
+
+# ------------------------------------------------------------------------------
+def _write(aPath, aContent):
+    with open(aPath, 'w') as f:
+        f.write(aContent)
+
+
+# ------------------------------------------------------------------------------
+def _componentLines(aRng, aPkgIdx, aCmpIdx, aLines, aFiles, aConditionals):
+    lVar = 'p{}c{}.suffix'.format(aPkgIdx, aCmpIdx)
+    lLines = [
+        '# Component {} of package {}'.format(aCmpIdx, aPkgIdx),
+        '@{} = "vhd"'.format(lVar),
+    ]
+    for i in range(aLines - len(lLines)):
+        f = i % aFiles
+        lKind = i % 4
+        if lKind == 0:
+            lLine = 'src src_{}.vhd'.format(f)
+        elif lKind == 1:
+            lLine = 'src -l lib{} src_{}.vhd'.format(aPkgIdx, f)
+        elif lKind == 2:
+            lLine = 'src src_{}.${{{}}}'.format(f, lVar)
+        else:
+            lLine = 'src src_{}*.vhd'.format(f)
+
+        if aRng.random() < aConditionals:
+            lLine = "? toolset == 'vivado' ? " + lLine
+        lLines.append(lLine)
+    return lLines
+
+
+# ------------------------------------------------------------------------------
+def generate(aDest, aPackages=10, aComponents=50, aFanout=4, aLines=100, aFiles=20, aConditionals=0.2, aD3=0.5, aSeed=0):
+    """
+    Creates a synthetic dep tree in aDest
+
+    Args:
+        aDest (str): Destination directory, replaced if existing
+        aPackages (int): Number of packages
+        aComponents (int): Number of components per package
+        aFanout (int): Number of components included by each component
+        aLines (int): Number of lines per component dep file
+        aFiles (int): Number of source files per component
+        aConditionals (float): Fraction of conditional lines
+        aD3 (float): Fraction of .d3 dep files, the others are .dep
+        aSeed (int): Random generator seed
+
+    Returns:
+        tuple: Top-level package, component and dep file
+    """
+    if exists(aDest):
+        rmtree(aDest)
+
+    lRng = random.Random(aSeed)
+
+    lTopLines = list(kTopSettings)
+    for p in range(aPackages):
+        lPkg = 'pkg{}'.format(p)
+        for c in range(aComponents):
+            lCmp = 'cmp{}'.format(c)
+            lCfgDir = join(aDest, lPkg, lCmp, 'firmware', 'cfg')
+            lHdlDir = join(aDest, lPkg, lCmp, 'firmware', 'hdl')
+            makedirs(lCfgDir)
+            makedirs(lHdlDir)
+            for f in range(aFiles):
+                _write(join(lHdlDir, 'src_{}.vhd'.format(f)), '-- {}:{} {}\n'.format(lPkg, lCmp, f))
+
+            lLines = _componentLines(lRng, p, c, aLines, aFiles, aConditionals)
+            lLines += [
+                'include -c {}:cmp{}'.format(lPkg, i)
+                for i in range(c * aFanout + 1, min((c + 1) * aFanout + 1, aComponents))
+            ]
+
+            lExt = '.d3' if lRng.random() < aD3 else '.dep'
+            _write(join(lCfgDir, lCmp + lExt), '\n'.join(lLines) + '\n')
+
+        lTopLines.append('include -c {}:cmp0'.format(lPkg))
+
+    lTopCfgDir = join(aDest, kTopPackage, kTopComponent, 'firmware', 'cfg')
+    makedirs(lTopCfgDir)
+    _write(join(lTopCfgDir, kTopDepFile), '\n'.join(lTopLines) + '\n')
+
+    return kTopPackage, kTopComponent, kTopDepFile
+
+
+# ------------------------------------------------------------------------------
+def generatorOptions(aFunc):
+    """
+    Decorator adding the generator parameters as command line options
+    """
+    lOptions = [
+        click.option('-p', '--packages', default=10, help='Number of packages'),
+        click.option('-c', '--components', default=50, help='Number of components per package'),
+        click.option('--fanout', default=4, help='Number of components included by each component'),
+        click.option('-l', '--lines', default=100, help='Number of lines per component dep file'),
+        click.option('-f', '--files', default=20, help='Number of source files per component'),
+        click.option('--conditionals', default=0.2, help='Fraction of conditional lines'),
+        click.option('--d3', default=0.5, help='Fraction of .d3 dep files'),
+        click.option('--seed', default=0, help='Random generator seed'),
+    ]
+    for lOption in reversed(lOptions):
+        aFunc = lOption(aFunc)
+    return aFunc
+
+
+# ------------------------------------------------------------------------------
+@click.command()
+@click.argument('dest', type=click.Path())
+@generatorOptions
+def cli(dest, packages, components, fanout, lines, files, conditionals, d3, seed):
+    '''Generate a synthetic dep tree in DEST'''
+    lTop = generate(dest, packages, components, fanout, lines, files, conditionals, d3, seed)
+    click.echo('Top-level dep file: {}:{} {}'.format(*lTop))
+
+
+if __name__ == '__main__':
+    cli()
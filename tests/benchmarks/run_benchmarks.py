@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Throughput and memory benchmarks of the dep tree processing.
+
+Generates a synthetic dep tree (see deptree.py) and times the steps a build
+goes through on it: dep file parsing, the dep report formatting, the source
+hashing and the Vivado and ModelSim project script generation. Results are
+stored as JSON and, when a baseline is given, compared against it to catch
+regressions.
+"""
+
+import click
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from io import StringIO
+from os.path import join
+from types import SimpleNamespace
+
+from rich.console import Console
+
+from ipbb import __version__
+from ipbb.depparser import DepFileParser, Pathmaker
+from ipbb.depparser._formatters import DepFormatter
+from ipbb.cmds.dep import hash as dep_hash
+from ipbb.generators.vivadoproject import VivadoProjectGenerator
+from ipbb.generators.modelsimproject import ModelSimGenerator
+
+from deptree import generate, generatorOptions
+
+# Bump whenever the layout of the results document changes
+kVersion = 1
+
+# DepFormatter methods rendered by the 'format' benchmark
+kFormatterDraws = (
+    'drawPackages',
+    'drawComponents',
+    'drawUnresolvedPackages',
+    'drawUnresolvedComponents',
+    'drawDeptreeCommandsSummary',
+    'drawUnresolvedSummary',
+    'drawUnresolvedFiles',
+    'drawParsingErrors',
+    'drawSummary',
+    'drawErrorsTable',
+)
+
+
+# ------------------------------------------------------------------------------
+def _best(aFunc, aRepeat):
+    """
+    Runs aFunc aRepeat times and returns the shortest elapsed time, in seconds
+    """
+    lBest = None
+    for _ in range(aRepeat):
+        gc.collect()
+        lStart = time.perf_counter()
+        aFunc()
+        lElapsed = time.perf_counter() - lStart
+        lBest = lElapsed if lBest is None else min(lBest, lElapsed)
+    return lBest
+
+
+# ------------------------------------------------------------------------------
+def _peakMemory(aFunc):
+    """
+    Returns the peak python memory allocated while running aFunc, in bytes
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        aFunc()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+# ------------------------------------------------------------------------------
+def _nullWriter(*aArgs):
+    pass
+
+
+# ------------------------------------------------------------------------------
+def runBenchmarks(aSrcDir, aTop, aRepeat, aThreads=0):
+    """
+    Runs the benchmarks on the dep tree in aSrcDir
+
+    Args:
+        aSrcDir (str): Source directory of the synthetic dep tree
+        aTop (tuple): Top-level package, component and dep file
+        aRepeat (int): Number of repetitions, the best one is reported
+        aThreads (int): Number of dep file prefetching threads
+
+    Returns:
+        tuple: Dep tree statistics and results by benchmark name
+    """
+
+    def parse():
+        lParser = DepFileParser('vivado', Pathmaker(aSrcDir), aThreads=aThreads)
+        lParser.parse(*aTop)
+        return lParser
+
+    lParser = parse()
+    if lParser.errors:
+        raise RuntimeError('Parsing the synthetic dep tree failed: {}'.format(lParser.errors[0]))
+
+    lStats = {
+        'depfiles': len(lParser._depregistry),
+        'entries': sum(len(f.entries) for f in lParser._depregistry.values()),
+        'commands': sum(len(c) for c in lParser.commands.values()),
+    }
+
+    def format():
+        lConsole = Console(file=StringIO(), width=200)
+        lFormatter = DepFormatter(lParser)
+        for lDraw in kFormatterDraws:
+            lConsole.print(getattr(lFormatter, lDraw)())
+
+    # No work area, hence no digest cache: every run reads all the files
+    lCtx = SimpleNamespace(depParser=lParser, currentproj=SimpleNamespace(name=aTop[0]), work=SimpleNamespace(path=None))
+
+    def hash():
+        dep_hash(lCtx, os.devnull, False)
+
+    lProjInfo = SimpleNamespace(name=aTop[0], path=tempfile.gettempdir())
+
+    def vivado():
+        VivadoProjectGenerator(lProjInfo, None, True).write(
+            _nullWriter, lParser.settings, lParser.packages, lParser.commands, lParser.libs
+        )
+
+    def modelsim():
+        ModelSimGenerator(lProjInfo, 'work', 'ip_proj', True).write(
+            _nullWriter, lParser.settings, lParser.packages, lParser.commands, lParser.libs
+        )
+
+    lResults = {}
+    for lName, lFunc in (('parse', parse), ('format', format), ('hash', hash), ('vivado', vivado), ('modelsim', modelsim)):
+        lElapsed = _best(lFunc, aRepeat)
+        lResults[lName] = {
+            'time': lElapsed,
+            'entries_per_s': lStats['entries'] / lElapsed,
+            'peak_memory': _peakMemory(lFunc),
+        }
+
+    return lStats, lResults
+
+
+# ------------------------------------------------------------------------------
+def compare(aResults, aBaseline, aTolerance):
+    """
+    Compares results with a baseline
+
+    Args:
+        aResults (dict): Results by benchmark name
+        aBaseline (dict): Baseline results by benchmark name
+        aTolerance (float): Relative slowdown or memory increase tolerated
+
+    Returns:
+        list: Regressions, as (benchmark, metric, baseline, current) tuples
+    """
+    lRegressions = []
+    for lName, lResult in aResults.items():
+        lBase = aBaseline.get(lName)
+        if lBase is None:
+            continue
+        for lMetric in ('time', 'peak_memory'):
+            if lResult[lMetric] > lBase[lMetric] * (1 + aTolerance):
+                lRegressions.append((lName, lMetric, lBase[lMetric], lResult[lMetric]))
+    return lRegressions
+
+
+# ------------------------------------------------------------------------------
+@click.command()
+@generatorOptions
+@click.option('-r', '--repeat', default=3, help='Number of repetitions, the best one is reported')
+@click.option('-j', '--jobs', default=0, help='Number of dep file prefetching threads')
+@click.option('-o', '--output', type=click.Path(), default=None, help='Results JSON file')
+@click.option('-b', '--baseline', type=click.File('r'), default=None, help='Baseline results JSON file to compare with')
+@click.option('-t', '--tolerance', default=0.2, help='Relative slowdown or memory increase tolerated w.r.t. the baseline')
+def cli(packages, components, fanout, lines, files, conditionals, d3, seed, repeat, jobs, output, baseline, tolerance):
+    '''Benchmark parsing, formatting, hashing and project generation on a synthetic dep tree'''
+
+    lParams = dict(
+        packages=packages, components=components, fanout=fanout, lines=lines, files=files,
+        conditionals=conditionals, d3=d3, seed=seed, repeat=repeat, jobs=jobs
+    )
+
+    with tempfile.TemporaryDirectory() as lTmpDir:
+        lSrcDir = join(lTmpDir, 'src')
+        lTop = generate(lSrcDir, packages, components, fanout, lines, files, conditionals, d3, seed)
+        lStats, lResults = runBenchmarks(lSrcDir, lTop, repeat, jobs)
+
+    click.echo('{depfiles} dep files, {entries} dep entries, {commands} commands'.format(**lStats))
+    click.echo('{:10} {:>10} {:>14} {:>12}'.format('benchmark', 'time [ms]', 'entries/s', 'peak [MiB]'))
+    for lName, lResult in lResults.items():
+        click.echo('{:10} {:10.1f} {:14.0f} {:12.2f}'.format(
+            lName, lResult['time'] * 1e3, lResult['entries_per_s'], lResult['peak_memory'] / 2**20
+        ))
+
+    lDocument = {
+        'version': kVersion,
+        'ipbb': __version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'params': lParams,
+        'stats': lStats,
+        'results': lResults,
+    }
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump(lDocument, f, indent=1)
+
+    if baseline is None:
+        return
+
+    lBaseline = json.load(baseline)
+    if lBaseline.get('params') != lParams:
+        click.secho('Warning: the baseline was produced with different parameters', fg='yellow')
+
+    lRegressions = compare(lResults, lBaseline['results'], tolerance)
+    for lName, lMetric, lBase, lCurrent in lRegressions:
+        click.secho('Regression in {} {}: {:.4g} -> {:.4g} ({:+.0%})'.format(
+            lName, lMetric, lBase, lCurrent, lCurrent / lBase - 1
+        ), fg='red')
+    if lRegressions:
+        sys.exit(1)
+    click.secho('No regressions w.r.t. the baseline (tolerance {:.0%})'.format(tolerance), fg='green')
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,26 @@
+import pytest
+
+from os.path import join, dirname
+from os import makedirs
+
+
+# -----------------------------------------------------------------------------
+@pytest.fixture
+def mkworkarea(tmp_path):
+    """
+    Factory fixture creating a source area populated with the given files
+
+    The returned function takes a dictionary of { relative path: content }
+    and returns the source directory.
+    """
+    lSrcDir = str(tmp_path / 'src')
+
+    def mkworkareaImpl(aFiles):
+        for lPath, lContent in aFiles.items():
+            lFullPath = join(lSrcDir, lPath)
+            makedirs(dirname(lFullPath), exist_ok=True)
+            with open(lFullPath, 'w') as f:
+                f.write(lContent)
+        return lSrcDir
+
+    return mkworkareaImpl
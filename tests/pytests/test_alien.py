@@ -1,6 +1,6 @@
 import pytest
 
-from ipbb.tools.alien import AlienDict, AlienTemplate, AlienBranch, AlienTree
+from ipbb.tools.alien import AlienDict, AlienTemplate, AlienBranch, AlienTree, substituteTemplate
 from ipbb.console import cprint
 
 # -----------------------------------------------------------------------------
@@ -123,3 +123,78 @@ def test_alientree_dict():
     assert tree.dict() == d
 
 
+
+
+# -----------------------------------------------------------------------------
+def test_alientree_index():
+    tree = AlienTree()
+    tree['a.b.c'] = 1
+    tree.trunk.x.y = 2
+    tree['a'].d = 3
+
+    # Autovivified and assigned keys are indexed, branches included
+    assert set(tree._index) == set(tree) == {'a', 'a.b', 'a.b.c', 'a.d', 'x', 'x.y'}
+    assert 'a.b.c' in tree and 'a.b.z' not in tree
+    assert tree['a.d'] == 3
+
+    # Replacing a branch drops its subtree from the index
+    old = tree['a.b']
+    tree['a.b'] = 'leaf'
+    assert set(tree._index) == {'a', 'a.b', 'a.d', 'x', 'x.y'}
+    old.e = 4
+    assert 'a.b.e' not in tree
+
+    # Grafted branches are indexed
+    branch = AlienBranch()
+    branch.f.g = 5
+    tree['x.z'] = branch
+    assert tree['x.z.f.g'] == 5
+    tree['x.z.f'].h = 6
+    assert 'x.z.f.h' in tree
+
+
+# -----------------------------------------------------------------------------
+def test_alientree_snapshot():
+    tree = AlienTree()
+    tree['a.b'] = 1
+
+    d = tree.dict()
+    assert tree.dict() is d
+    assert list(tree.keys()) == ['a.b']
+
+    tree['a.c'] = 2
+    assert tree.dict() == {'a': {'b': 1, 'c': 2}}
+    assert list(tree.keys()) == ['a.b', 'a.c']
+
+    tree.lock(True)
+    with pytest.raises(KeyError):
+        tree['a.d']
+    assert tree.get('a.d', 'default') == 'default'
+    assert 'a.d' not in tree
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize('text', [
+    'src a.vhd',
+    'src ${lvl1.var}.vhd',
+    'src $lvl1.var-$top $$ $$top',
+    'src ${top}_${lvl1.var}',
+])
+def test_substitute_template(text):
+    tree = AlienTree()
+    tree['lvl1.var'] = 'x'
+    tree['top'] = 3
+    tree.lock(True)
+
+    assert substituteTemplate(text, tree) == AlienTemplate(text).substitute(tree)
+
+
+# -----------------------------------------------------------------------------
+def test_substitute_template_errors():
+    tree = AlienTree()
+    tree.lock(True)
+
+    with pytest.raises(KeyError):
+        substituteTemplate('src ${missing}', tree)
+    with pytest.raises(ValueError):
+        substituteTemplate('src ${1bad}', tree)
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import sys
+import time
+
+from click.testing import CliRunner
+from ipbb.cli.build import build
+from ipbb.cmds.build import BuildJob, BuildScheduler
+
+# Fake ipbb, recording its arguments, printing the step markers and failing the synthesis of the 'bad' project
+_fakeipbb = '''
+import json, os, sys, time
+with open('steps.json', 'a') as f:
+    f.write(json.dumps(sys.argv[1:]) + '\\n')
+for a in sys.argv[2:]:
+    if a in ('generate-project', 'synth', 'impl'):
+        print('@ipbb@step ' + a, flush=True)
+        time.sleep(0.3)
+        if os.path.basename(os.getcwd()) == 'bad' and a == 'synth':
+            sys.exit(1)
+'''
+
+
+# -----------------------------------------------------------------------------
+def _jobs(tmp_path, aNames, aSteps):
+    lJobs = []
+    for n in aNames:
+        (tmp_path / n).mkdir()
+        lJobs.append(BuildJob(n, str(tmp_path / n), aSteps))
+    return lJobs
+
+
+# -----------------------------------------------------------------------------
+def test_budget(tmp_path):
+    GiB = 2**30
+    lJobs = _jobs(tmp_path, ['a', 'b', 'c'], ['synth'])
+    lScheduler = BuildScheduler(lJobs, 3, 4, 8, 10 * GiB, 4 * GiB)
+
+    assert lScheduler.canStart()
+    lJobs[0].status = 'running'
+    assert lScheduler.canStart()
+    lJobs[1].status = 'running'
+    # 3 x 4 jobs exceed the 8 cores
+    assert not lScheduler.canStart()
+
+    lScheduler.cpus = 16
+    # 3 x 4 GiB exceed the 10 GiB
+    assert not lScheduler.canStart()
+
+    # The estimate follows the completed builds
+    lJobs[0].status = 'done'
+    lJobs[0].peak = 2 * GiB
+    lJobs[2].status = 'running'
+    assert lScheduler.estimate == 2 * GiB
+    assert lScheduler.canStart()
+    lJobs[1].peak = 7 * GiB
+    assert not lScheduler.canStart()
+
+
+# -----------------------------------------------------------------------------
+def test_build(tmp_path):
+    lFake = tmp_path / 'fakeipbb.py'
+    lFake.write_text(_fakeipbb)
+
+    lSteps = ['generate-project', 'synth', 'impl']
+    lJobs = _jobs(tmp_path, ['p1', 'bad', 'p2'], lSteps)
+    lScheduler = BuildScheduler(lJobs, 3, 2, 8, 2**40, 2**30, aCommand=[sys.executable, str(lFake)], aInterval=0.05)
+
+    lStart = time.monotonic()
+    asyncio.run(lScheduler.run())
+    # Builds run concurrently
+    assert time.monotonic() - lStart < 0.3 * len(lSteps) * len(lJobs)
+
+    assert [j.status for j in lJobs] == ['done', 'failed', 'done']
+    with open(tmp_path / 'p1' / 'steps.json') as f:
+        # A single ipbb process per project
+        assert [json.loads(l) for l in f] == [
+            ['vivado', '--pool', 'generate-project', '--enable-ip-cache', 'synth', '-j', '2', 'impl', '-j', '2'],
+        ]
+    assert list(lJobs[0].times) == lSteps
+    assert all(t >= 0.25 for t in lJobs[0].times.values())
+
+    lBad = lScheduler.summary()['projects'][1]
+    assert lBad['step'] == 'synth' and lBad['returncode'] == 1
+    assert list(lBad['times']) == ['generate-project', 'synth']
+    assert '@ipbb@step synth' in (tmp_path / 'bad' / 'ipbb_build.log').read_text()
+
+
+# -----------------------------------------------------------------------------
+def test_cli_ranges():
+    # Rejected before any build is attempted
+    for lArgs in (['-j', '0'], ['-s', '0'], ['-c', '-1']):
+        lResult = CliRunner().invoke(build, lArgs, obj=None)
+        assert lResult.exit_code == 2 and 'Invalid value' in lResult.output
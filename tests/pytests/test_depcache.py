@@ -0,0 +1,113 @@
+import pytest
+import os
+import time
+
+from os.path import join
+
+from ipbb.depparser import DepFileParser, DepTreeCache, Pathmaker
+
+_files = {
+    'pkg/top/firmware/cfg/top.d3': 'src top.vhd\ninclude -c sub\nsrc *_pkg.vhd\n',
+    'pkg/top/firmware/hdl/top.vhd': '',
+    'pkg/top/firmware/hdl/a_pkg.vhd': '',
+    'pkg/sub/firmware/cfg/sub.dep': '@sub_var = 3\nsrc -l mylib sub_a.vhd sub_b.vhd\n',
+    'pkg/sub/firmware/hdl/sub_a.vhd': '',
+    'pkg/sub/firmware/hdl/sub_b.vhd': '',
+}
+
+
+# -----------------------------------------------------------------------------
+def _parse(aSrcDir):
+    lParser = DepFileParser('vivado', Pathmaker(aSrcDir))
+    lParser.parse('pkg', 'top', 'top.d3')
+    return lParser
+
+
+# -----------------------------------------------------------------------------
+def _bumpmtime(aPath):
+    # Make sure the new mtime differs, whatever the filesystem resolution
+    lStat = os.stat(aPath)
+    os.utime(aPath, ns=(lStat.st_atime_ns, lStat.st_mtime_ns + 10**9))
+
+
+# -----------------------------------------------------------------------------
+@pytest.fixture
+def cached(mkworkarea, tmp_path):
+    lSrcDir = mkworkarea(_files)
+    lCache = DepTreeCache(str(tmp_path / 'deptree.cache'))
+    assert lCache.save(_parse(lSrcDir), 'pkg', 'top', 'top.d3')
+    return lSrcDir, lCache
+
+
+# -----------------------------------------------------------------------------
+def test_cache_roundtrip(cached):
+    lSrcDir, lCache = cached
+
+    lRef = _parse(lSrcDir)
+    lParser = DepFileParser('vivado', Pathmaker(lSrcDir))
+    assert lCache.load(lParser, 'pkg', 'top', 'top.d3')
+
+    for c in lRef.commands:
+        assert [x.filepath for x in lParser.commands[c]] == [x.filepath for x in lRef.commands[c]]
+    assert lParser.libs == {'mylib'}
+    assert lParser.packages == lRef.packages
+    assert lParser.settings['sub_var'] == 3
+    assert lParser.settings.locked
+
+
+# -----------------------------------------------------------------------------
+def test_cache_settings_mismatch(cached):
+    lSrcDir, lCache = cached
+
+    assert not lCache.load(DepFileParser('sim', Pathmaker(lSrcDir)), 'pkg', 'top', 'top.d3')
+    assert not lCache.load(DepFileParser('vivado', Pathmaker(lSrcDir), ['x=1']), 'pkg', 'top', 'top.d3')
+
+
+# -----------------------------------------------------------------------------
+def test_cache_depfile_changed(cached):
+    lSrcDir, lCache = cached
+
+    lDepPath = join(lSrcDir, 'pkg/sub/firmware/cfg/sub.dep')
+    with open(lDepPath, 'a') as f:
+        f.write('src sub_c.vhd\n')
+    _bumpmtime(lDepPath)
+
+    lParser = DepFileParser('vivado', Pathmaker(lSrcDir))
+    assert lCache.load(lParser, 'pkg', 'top', 'top.d3')
+    assert [c.filepath for c in lParser.commands['src']] == [c.filepath for c in _parse(lSrcDir).commands['src']]
+    assert [e[0] for e in lParser.unresolved] == [join(lSrcDir, 'pkg/sub/firmware/hdl/sub_c.vhd')]
+
+
+# -----------------------------------------------------------------------------
+def test_cache_globdir_changed(cached):
+    lSrcDir, lCache = cached
+
+    lHdlDir = join(lSrcDir, 'pkg/top/firmware/hdl')
+    with open(join(lHdlDir, 'b_pkg.vhd'), 'w'):
+        pass
+    _bumpmtime(lHdlDir)
+
+    lParser = DepFileParser('vivado', Pathmaker(lSrcDir))
+    assert lCache.load(lParser, 'pkg', 'top', 'top.d3')
+    assert join(lHdlDir, 'b_pkg.vhd') in [c.filepath for c in lParser.commands['src']]
+
+
+# -----------------------------------------------------------------------------
+def test_cache_wildcard_dir_changed(mkworkarea, tmp_path):
+    lSrcDir = mkworkarea(dict(_files, **{
+        'pkg/top/firmware/cfg/top.d3': 'src top.vhd\nsrc */c.vhd\n',
+        'pkg/top/firmware/hdl/x/c.vhd': '',
+        'pkg/top/firmware/hdl/y/other.vhd': '',
+    }))
+    lCache = DepTreeCache(str(tmp_path / 'deptree.cache'))
+    assert lCache.save(_parse(lSrcDir), 'pkg', 'top', 'top.d3')
+
+    # A new match in a directory matched by the wildcard, without any match before
+    lYDir = join(lSrcDir, 'pkg/top/firmware/hdl/y')
+    with open(join(lYDir, 'c.vhd'), 'w'):
+        pass
+    _bumpmtime(lYDir)
+
+    lParser = DepFileParser('vivado', Pathmaker(lSrcDir))
+    assert lCache.load(lParser, 'pkg', 'top', 'top.d3')
+    assert join(lYDir, 'c.vhd') in [c.filepath for c in lParser.commands['src']]
@@ -1,6 +1,6 @@
 import pytest
 
-from ipbb.depparser._cmdparser import DepCmdParser
+from ipbb.depparser._cmdparser import DepCmdParser, DepCmdParserError, tokenize
 from ipbb.depparser._cmdtypes import IncludeCommand, SetupCommand
 
 # -----------------------------------------------------------------------------
@@ -29,3 +29,110 @@ def test_cmdparser_setup():
     assert args.package == 'a'
     assert args.component == 'b'
     assert args.filepath == ['afile.vhd']
+
+
+# -----------------------------------------------------------------------------
+_lines = [
+    "include",
+    "include -c a:b",
+    "include -c b a.dep b.dep",
+    "include --component=a: --cd ../x a.dep",
+    "setup -f",
+    "setup --finalise -c a:b s.tcl",
+    "util u.tcl",
+    "iprepo -c a:b --cd ../ repo",
+    "src a.vhd b.vhd",
+    "src -l mylib --vhdl2008 a.vhd",
+    "src a.vhd -l mylib -u sim",
+    "src --usein synth,sim --simflags=-novopt a.vhd",
+    "src -c a:b -c c:d a.vhd",
+    "hlssrc --tb --cflags=-O2 -i a:b -i c a.cpp",
+    "hlssrc -i a:b --include-comp c:d --csimflags x a.cpp",
+    "addrtab -t a.xml",
+    "addrtab --toplevel -c a:b",
+]
+
+# Valid lines handled by argparse only
+_fallbacks = [
+    "src --lib=mylib --vhdl a.vhd",
+    "setup -fc a:b s.tcl",
+]
+
+_errors = [
+    "src --simflags -novopt a.vhd",
+    "foo a.vhd",
+    "src",
+    "src -l mylib",
+    "src a.vhd -l mylib b.vhd",
+    "src --unknown a.vhd",
+    "include -c",
+    "setup --finalise=1",
+]
+
+
+# -----------------------------------------------------------------------------
+def _fields(aCmd):
+    return type(aCmd), aCmd.todict()
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize('aLine', _lines + _fallbacks)
+def test_cmdparser_fastpath(aLine):
+
+    cp = DepCmdParser()
+    lTokens = tokenize(aLine)
+
+    assert (cp._fastParse(lTokens) is None) == (aLine in _fallbacks)
+
+    lFast = cp.parseLine(lTokens)
+    lRef = cp.callbacks.get(lTokens[0], cp.callbacks['*'])(cp.parse_args(lTokens))
+    assert _fields(lFast) == _fields(lRef)
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize('aLine', _errors)
+def test_cmdparser_fastpath_errors(aLine):
+
+    cp = DepCmdParser()
+    lTokens = tokenize(aLine)
+
+    assert cp._fastParse(lTokens) is None
+    with pytest.raises(DepCmdParserError):
+        cp.parseLine(lTokens)
+
+
+# -----------------------------------------------------------------------------
+def test_tokenize():
+    assert tokenize("src  a.vhd\tb.vhd ") == ['src', 'a.vhd', 'b.vhd']
+    assert tokenize("src --simflags '-a -b' a.vhd") == ['src', '--simflags', '-a -b', 'a.vhd']
+
+
+# -----------------------------------------------------------------------------
+def test_cmd_hash():
+    cp = DepCmdParser()
+
+    lCmds = [cp.parseLine(tokenize(l)) for l in ("src a.vhd", "src -l lib a.vhd", "src a.vhd", "src --vhdl2008 a.vhd")]
+    for c in lCmds:
+        c.filepath = c.filepath[0]
+
+    # Equal commands hash equally, and the first occurrence is kept
+    assert [hash(c) == hash(lCmds[0]) for c in lCmds] == [c == lCmds[0] for c in lCmds]
+    lUnique = list(dict.fromkeys(lCmds))
+    assert len(lUnique) == 2
+    assert lUnique[0] is lCmds[0] and lUnique[1] is lCmds[1]
+
+
+# -----------------------------------------------------------------------------
+def test_cmd_replace():
+    cp = DepCmdParser()
+
+    lCmd = cp.parseLine(tokenize("src -l lib --vhdl2008 a.vhd"))
+    lCopy = lCmd.replace(filepath='/x/a.vhd', package='p')
+
+    assert not hasattr(lCmd, '__dict__')
+    assert type(lCopy) is type(lCmd)
+    assert lCopy.todict() == dict(lCmd.todict(), filepath='/x/a.vhd', package='p')
+    assert lCopy.flags() == lCmd.flags() == ['vhdl2008', 'synth', 'sim']
+    assert lCmd.filepath == ['a.vhd']
+    with pytest.raises(TypeError):
+        lCmd.replace(depfile=None)
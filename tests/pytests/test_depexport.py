@@ -0,0 +1,48 @@
+import pytest
+import io
+import json
+
+from os.path import join
+
+from ipbb.depparser import DepFileParser, DepTreeExporter, Pathmaker
+
+_files = {
+    'pkg/top/firmware/cfg/top.d3': 'src top.vhd\ninclude -c sub\nsrc missing.vhd\n',
+    'pkg/top/firmware/hdl/top.vhd': '',
+    'pkg/sub/firmware/cfg/sub.dep': '@sub_var = 3\nsrc -l mylib --vhdl2008 sub_a.vhd\n',
+    'pkg/sub/firmware/hdl/sub_a.vhd': '',
+}
+
+
+# -----------------------------------------------------------------------------
+@pytest.fixture
+def parser(mkworkarea):
+    lParser = DepFileParser('vivado', Pathmaker(mkworkarea(_files)))
+    lParser.parse('pkg', 'top', 'top.d3')
+    return lParser
+
+
+# -----------------------------------------------------------------------------
+def test_export_json(parser):
+    lStream = io.StringIO()
+    DepTreeExporter(parser).write(lStream)
+    lDoc = json.loads(lStream.getvalue())
+
+    lTopDep, lSubDep = parser._depregistry
+    assert lDoc['top'] == {'package': 'pkg', 'component': 'top', 'depfile': 'top.d3'}
+    assert lDoc['settings'] == {'toolset': 'vivado', 'sub_var': 3}
+    assert [f['includes'] for f in lDoc['depfiles']] == [[lSubDep], []]
+    assert [c['filepath'] for c in lDoc['commands']['src']] == [c.filepath for c in parser.commands['src']]
+    assert lDoc['commands']['src'][1]['flags'] == ['vhdl2008', 'synth', 'sim']
+    assert lDoc['libs'] == ['mylib']
+    assert lDoc['packages'] == {'pkg': ['top', 'sub']}
+    assert [u['expr'] for u in lDoc['unresolved']] == [join(parser.rootdir, 'pkg/top/firmware/hdl/missing.vhd')]
+
+
+# -----------------------------------------------------------------------------
+def test_export_msgpack(parser):
+    msgpack = pytest.importorskip('msgpack')
+
+    lStream = io.BytesIO()
+    DepTreeExporter(parser).write(lStream, 'msgpack')
+    assert msgpack.unpackb(lStream.getvalue())['libs'] == ['mylib']
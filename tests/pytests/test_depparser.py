@@ -1,6 +1,6 @@
 import pytest
 
-from ipbb.depparser._fileparser import DepFileParser, DepAssignmentError
+from ipbb.depparser._fileparser import DepFileParser, DepAssignmentError, DepLineError
 from ipbb.depparser._pathmaker import Pathmaker
 
 # Some test cases
@@ -69,3 +69,31 @@ def test_assign_invalid_value(dep_parser):
 
     dep_parser._lineProcessAssignments('@ a = print(3)')
 
+
+
+# -----------------------------------------------------------------------------
+def test_conditional(dep_parser):
+    assert dep_parser._lineProcessConditional("? toolset == 'sim' ? src a.vhd") == 'src a.vhd'
+    assert dep_parser._lineProcessConditional("? toolset == 'vivado' ? src a.vhd") is None
+    with pytest.raises(DepLineError):
+        dep_parser._lineProcessConditional("? 1 ? src a.vhd")
+
+
+# -----------------------------------------------------------------------------
+def test_expression_cache(dep_parser):
+    dep_parser._lineProcessConditional("? toolset == 'modelsim' ? src a.vhd")
+    lCompiled = dep_parser._exprstats['compiled']
+    dep_parser._lineProcessConditional("? toolset == 'modelsim' ? src b.vhd")
+    assert dep_parser._exprstats['compiled'] == lCompiled
+    assert dep_parser._exprstats['cached'] >= 1
+
+
+# -----------------------------------------------------------------------------
+def test_expression_namespace(dep_parser):
+    # Only a restricted set of builtins is visible to expressions
+    assert dep_parser._lineProcessAssignments('@ n = len("abc")') is None
+    assert dep_parser.settings['n'] == 3
+    with pytest.raises(DepLineError):
+        dep_parser._lineProcessAssignments('@ m = re.escape("x")')
+    with pytest.raises(DepLineError):
+        dep_parser._lineProcessAssignments('@ m = __import__("os")')
@@ -0,0 +1,212 @@
+import pytest
+
+from os.path import join
+
+from ipbb.depparser import DepFileParser, DepParserProfiler, Pathmaker
+from ipbb.depparser._fileparser import Prefetcher
+
+_files = {
+    'pkg/top/firmware/cfg/top.d3': 'src top.vhd\ninclude -c sub\ninclude -c common\nsrc *_pkg.vhd\n',
+    'pkg/top/firmware/hdl/top.vhd': '',
+    'pkg/top/firmware/hdl/a_pkg.vhd': '',
+    'pkg/sub/firmware/cfg/sub.dep': 'src -l mylib sub_a.vhd\ninclude -c common\n',
+    'pkg/sub/firmware/hdl/sub_a.vhd': '',
+    'pkg/sub/firmware/hdl/sub_b.vhd': '',
+    'pkg/common/firmware/cfg/common.dep': 'src common.vhd\n',
+    'pkg/common/firmware/hdl/common.vhd': '',
+}
+
+
+# -----------------------------------------------------------------------------
+def _parse(aSrcDir):
+    lParser = DepFileParser('vivado', Pathmaker(aSrcDir))
+    lParser.parse('pkg', 'top', 'top.d3')
+    return lParser
+
+
+# -----------------------------------------------------------------------------
+def _summary(aParser):
+    return (
+        {c: [x.filepath for x in l] for c, l in aParser.commands.items()},
+        aParser.libs,
+        aParser.packages,
+        list(aParser._depregistry),
+        [e[0] for e in aParser.unresolved],
+    )
+
+
+# -----------------------------------------------------------------------------
+def _write(aPath, aContent):
+    with open(aPath, 'w') as f:
+        f.write(aContent)
+
+
+# -----------------------------------------------------------------------------
+@pytest.fixture
+def srcdir(mkworkarea):
+    return mkworkarea(_files)
+
+
+# -----------------------------------------------------------------------------
+def test_reparse_nochange(srcdir):
+    lParser = _parse(srcdir)
+    lDepFile = lParser.depfile
+
+    assert lParser.reparse()
+    assert lParser.depfile is lDepFile
+
+
+# -----------------------------------------------------------------------------
+def test_reparse_depfile(srcdir):
+    lParser = _parse(srcdir)
+    lCommon = lParser._depregistry[join(srcdir, 'pkg/common/firmware/cfg/common.dep')]
+
+    lSubDep = join(srcdir, 'pkg/sub/firmware/cfg/sub.dep')
+    _write(lSubDep, 'src -l mylib sub_a.vhd sub_b.vhd\ninclude -c common\nsrc missing.vhd\n')
+
+    assert lParser.reparse([lSubDep])
+    assert _summary(lParser) == _summary(_parse(srcdir))
+
+    # Unchanged files are not parsed again
+    assert lParser._depregistry[lCommon.path] is lCommon
+    assert len(lCommon.parents) == 2
+
+
+# -----------------------------------------------------------------------------
+def test_reparse_globdir(srcdir):
+    lParser = _parse(srcdir)
+
+    lHdlDir = join(srcdir, 'pkg/top/firmware/hdl')
+    _write(join(lHdlDir, 'b_pkg.vhd'), '')
+
+    assert lParser.reparse(aChangedDirs=[lHdlDir])
+    assert _summary(lParser) == _summary(_parse(srcdir))
+
+
+# -----------------------------------------------------------------------------
+def test_reparse_assignment_fallback(srcdir):
+    lParser = _parse(srcdir)
+
+    lSubDep = join(srcdir, 'pkg/sub/firmware/cfg/sub.dep')
+    _write(lSubDep, '@use_b = True\nsrc -l mylib sub_a.vhd\n? use_b ? src sub_b.vhd\n')
+
+    # New assignments require the whole tree to be parsed again
+    assert not lParser.reparse([lSubDep])
+    assert _summary(lParser) == _summary(_parse(srcdir))
+    assert lParser.settings['use_b'] is True
+
+
+# -----------------------------------------------------------------------------
+def test_reparse_later_assignment(mkworkarea):
+    lSrcDir = mkworkarea(dict(_files, **{
+        'pkg/top/firmware/cfg/top.d3': 'src top.vhd\ninclude -c sub\n@name = "common"\ninclude -c common\n',
+        'pkg/common/firmware/cfg/common.dep': 'src ${name}.vhd\n',
+    }))
+    lParser = _parse(lSrcDir)
+
+    # Assignments applied after the file was parsed do not affect it
+    lSubDep = join(lSrcDir, 'pkg/sub/firmware/cfg/sub.dep')
+    _write(lSubDep, 'src -l mylib sub_a.vhd sub_b.vhd\ninclude -c common\n')
+    assert lParser.reparse([lSubDep])
+    assert _summary(lParser) == _summary(_parse(lSrcDir))
+
+    # Unless an unchanged file is now first included after them
+    _write(lSubDep, 'src -l mylib sub_a.vhd\n')
+    assert not lParser.reparse([lSubDep])
+    assert _summary(lParser) == _summary(_parse(lSrcDir))
+    assert not lParser.errors
+
+
+# -----------------------------------------------------------------------------
+def test_reparse_included_assignment(mkworkarea):
+    lSrcDir = mkworkarea(dict(_files, **{
+        'pkg/top/firmware/cfg/top.d3': 'src top.vhd\ninclude -c sub\n? x == 1 ? src *_pkg.vhd\n',
+        'pkg/common/firmware/cfg/common.dep': '@x = 1\nsrc common.vhd\n',
+    }))
+    lParser = _parse(lSrcDir)
+    lCommon = lParser._depregistry[join(lSrcDir, 'pkg/common/firmware/cfg/common.dep')]
+
+    # The assignments of unchanged files included by a re-parsed one are replayed
+    lSubDep = join(lSrcDir, 'pkg/sub/firmware/cfg/sub.dep')
+    _write(lSubDep, 'src -l mylib sub_a.vhd sub_b.vhd\ninclude -c common\n')
+    assert lParser.reparse([lSubDep])
+    assert _summary(lParser) == _summary(_parse(lSrcDir))
+    assert lParser._depregistry[lCommon.path] is lCommon
+    assert lParser.settings['x'] == 1
+
+
+# -----------------------------------------------------------------------------
+def test_prefetch(mkworkarea):
+    lSrcDir = mkworkarea(dict(_files, **{
+        'pkg/sub/firmware/cfg/sub.dep': '@use_b = True\nsrc -l mylib sub_a.vhd\n? use_b ? src sub_b.vhd\ninclude -c common\n',
+        'pkg/common/firmware/cfg/common.dep': '@use_b = False\nsrc common.vhd\n? toolset == "vivado" ? include -c ${toolset}\n',
+        'pkg/common/vivado/firmware/cfg/vivado.dep': 'src *.vhd\n',
+        'pkg/common/vivado/firmware/hdl/x.vhd': '',
+    }))
+
+    lParser = DepFileParser('vivado', Pathmaker(lSrcDir), aThreads=4)
+    lParser.parse('pkg', 'top', 'top.d3')
+
+    assert _summary(lParser) == _summary(_parse(lSrcDir))
+    assert lParser.settings['use_b'] is True
+
+
+# -----------------------------------------------------------------------------
+def test_prefetcher_shutdown(srcdir):
+    lParser = DepFileParser('vivado', Pathmaker(srcdir))
+    lPrefetcher = Prefetcher(lParser._pathMaker, lParser.parseLine, 2)
+    lPrefetcher.submit('pkg', 'top', 'top.d3')
+    lTop = join(srcdir, 'pkg/top/firmware/cfg/top.d3')
+    assert lPrefetcher.lines(lTop) is not None
+    assert lPrefetcher.command('include -c sub').cmd == 'include'
+
+    # Scans completing after the parser is done are dropped quietly
+    lPrefetcher.shutdown()
+    lPrefetcher._scan('include -c common\n', 'pkg', 'top')
+    assert lPrefetcher.lines(lTop) is None
+
+
+# -----------------------------------------------------------------------------
+def test_profile(srcdir):
+    lParser = DepFileParser('vivado', Pathmaker(srcdir), aThreads=4)
+    lProfiler = DepParserProfiler()
+    lProfiler.attach(lParser)
+    lParser.parse('pkg', 'top', 'top.d3')
+
+    assert _summary(lParser) == _summary(_parse(srcdir))
+    assert list(lProfiler.files) == list(lParser._depregistry)
+
+    lTop = lProfiler.files[lParser.depfile.path]
+    assert (lTop['lines'], lTop['globs'], lTop['matches']) == (4, 4, 4)
+
+    # Exclusive step times are bounded by the inclusive time of the top dep file
+    lTotals = lProfiler.totals()
+    assert 0 < sum(lTotals[s] for s in DepParserProfiler.kSteps.values()) + lTotals['other'] <= lTop['total']
+
+
+# -----------------------------------------------------------------------------
+def test_lazy(mkworkarea):
+    lSrcDir = mkworkarea(dict(_files, **{
+        'pkg/sub/firmware/cfg/sub.dep': 'src -l mylib sub_*.vhd\naddrtab -t sub.xml\nsrc missing.vhd\ninclude -c common\n',
+        'pkg/sub/addr_table/sub.xml': '',
+    }))
+    lEager = _parse(lSrcDir)
+
+    lParser = DepFileParser('vivado', Pathmaker(lSrcDir), aLazy=True)
+    lParser.parse('pkg', 'top', 'top.d3')
+    assert lParser.pending
+
+    # Only the requested group is resolved
+    assert lParser.commands['addrtab'] == lEager.commands['addrtab']
+    assert all(not f.unresolved for f in lParser._depregistry.values())
+    assert lParser.pending
+
+    assert _summary(lParser) == _summary(lEager)
+    assert not lParser.pending
+    assert [f.entries for f in lParser._depregistry.values()] == [f.entries for f in lEager._depregistry.values()]
+
+    # Re-parsing is eager
+    _write(join(lSrcDir, 'pkg/common/firmware/cfg/common.dep'), 'src common.vhd\nsrc top.vhd\n')
+    assert lParser.reparse([join(lSrcDir, 'pkg/common/firmware/cfg/common.dep')])
+    assert not lParser.pending
+    assert _summary(lParser) == _summary(_parse(lSrcDir))
@@ -0,0 +1,76 @@
+import hashlib
+import os
+
+from os.path import join
+
+from ipbb.tools.hashing import ContentHasher
+
+_files = {
+    'a.vhd': 'entity a',
+    'ip/x.xci': 'x',
+    'ip/sub/y.xci': 'y',
+}
+
+
+# -----------------------------------------------------------------------------
+def _age(aSrcDir):
+    # Files modified in the last second are not cached
+    for p in _files:
+        os.utime(join(aSrcDir, p), (1e9, 1e9))
+
+
+# -----------------------------------------------------------------------------
+def test_hash_files_and_dirs(mkworkarea):
+    lSrcDir = mkworkarea(_files)
+    lHasher = ContentHasher()
+
+    lFile, lDir = lHasher.hashmany([join(lSrcDir, 'a.vhd'), join(lSrcDir, 'ip')])
+    assert lFile == hashlib.sha1(b'entity a').hexdigest()
+
+    # Directories are hashed recursively
+    lExpected = hashlib.sha1()
+    for p, c in (('x.xci', b'x'), ('sub/y.xci', b'y')):
+        lExpected.update(p.encode())
+        lExpected.update(hashlib.sha1(c).digest())
+    assert lDir == lExpected.hexdigest()
+
+    assert lHasher.combine([lFile, lDir]).hexdigest() == hashlib.sha1(bytes.fromhex(lFile + lDir)).hexdigest()
+
+
+# -----------------------------------------------------------------------------
+def test_hash_cache(mkworkarea, tmp_path, monkeypatch):
+    lSrcDir = mkworkarea(_files)
+    _age(lSrcDir)
+    lCachePath = str(tmp_path / 'var' / 'hashes.json')
+    lPaths = [join(lSrcDir, 'a.vhd'), join(lSrcDir, 'ip')]
+
+    lHasher = ContentHasher(aCachePath=lCachePath)
+    lDigests = lHasher.hashmany(lPaths)
+    lHasher.save()
+
+    # Unchanged files are not read again
+    lReads = []
+    lHasher = ContentHasher(aCachePath=lCachePath)
+    lRead = lHasher._read
+    monkeypatch.setattr(lHasher, '_read', lambda p: lReads.append(p) or lRead(p))
+    assert lHasher.hashmany(lPaths) == lDigests
+    assert lReads == []
+
+    # Modified ones are
+    with open(join(lSrcDir, 'ip', 'x.xci'), 'w') as f:
+        f.write('xx')
+    assert lHasher.hashmany(lPaths)[0] == lDigests[0]
+    assert lReads == [join(lSrcDir, 'ip', 'x.xci')]
+
+
+# -----------------------------------------------------------------------------
+def test_hash_missing(mkworkarea):
+    lSrcDir = mkworkarea(_files)
+    os.symlink(join(lSrcDir, 'nowhere.xci'), join(lSrcDir, 'ip', 'dangling.xci'))
+    lHasher = ContentHasher()
+
+    # Missing files hash as empty
+    lEmpty = hashlib.sha1().hexdigest()
+    assert lHasher.hashmany([join(lSrcDir, 'missing.vhd')]) == [lEmpty]
+    lHasher.hashmany([join(lSrcDir, 'ip')])
+    assert join(lSrcDir, 'ip', 'dangling.xci') not in lHasher._digests
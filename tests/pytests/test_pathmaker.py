@@ -0,0 +1,59 @@
+import pytest
+import glob
+import os
+
+from os.path import join
+
+from ipbb.depparser import Pathmaker
+
+_files = {
+    'pkg/top/firmware/hdl/top.vhd': '',
+    'pkg/top/firmware/hdl/a_pkg.vhd': '',
+    'pkg/top/firmware/hdl/b_pkg.vhd': '',
+    'pkg/top/firmware/hdl/.hidden.vhd': '',
+    'pkg/top/firmware/hdl/sub/c.vhd': '',
+    'pkg/top/firmware/cfg/top.dep': '',
+}
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize('aExpr', [
+    'top.vhd',
+    'missing.vhd',
+    '*_pkg.vhd',
+    '*.vhd',
+    '.*.vhd',
+    '[ab]_pkg.vhd',
+    'sub/*.vhd',
+    '*/c.vhd',
+    '../cfg/top.d?p',
+    'nodir/*.vhd',
+])
+def test_pathmaker_glob(mkworkarea, aExpr):
+    lSrcDir = mkworkarea(_files)
+    lPathmaker = Pathmaker(lSrcDir)
+
+    lPathExpr, lFileList = lPathmaker.glob('pkg', 'top', 'src', aExpr)
+    assert sorted(p for _, p in lFileList) == sorted(glob.glob(lPathExpr))
+
+
+# -----------------------------------------------------------------------------
+def test_pathmaker_listing_cache(mkworkarea, monkeypatch):
+    lSrcDir = mkworkarea(_files)
+    lPathmaker = Pathmaker(lSrcDir)
+
+    lCalls = []
+    lScandir = os.scandir
+    monkeypatch.setattr(os, 'scandir', lambda p: lCalls.append(p) or lScandir(p))
+
+    lFiles, lUnmatched = lPathmaker.globall('pkg', 'top', 'src', ['top.vhd', '*_pkg.vhd', 'x.vhd'])
+    assert [len(l) for l in lFiles] == [1, 2]
+    assert lUnmatched == [join(lSrcDir, 'pkg/top/firmware/hdl/x.vhd')]
+    assert lCalls == [join(lSrcDir, 'pkg/top/firmware/hdl')]
+
+    # New files are seen only once the cache is cleared
+    with open(join(lSrcDir, 'pkg/top/firmware/hdl/x.vhd'), 'w'):
+        pass
+    assert lPathmaker.globall('pkg', 'top', 'src', ['x.vhd'])[0] == []
+    lPathmaker.clearCache()
+    assert lPathmaker.globall('pkg', 'top', 'src', ['x.vhd'])[0] != []
@@ -0,0 +1,404 @@
+import asyncio
+import json
+import os
+import pytest
+import stat
+import subprocess
+import sys
+import threading
+import time
+
+import ipbb
+from ipbb.tools.xilinx import VivadoConsole, VivadoConsoleError, VivadoCommandBatch, VivadoProject, VivadoSessionManager, VivadoConsolePool
+from ipbb.tools.xilinx import AsyncVivadoSession, VivadoSnoozer
+from ipbb.tools.xilinx.vivado_server import VivadoClient, VivadoDaemonBusyError
+from ipbb.tools.xilinx.vivado_common import VivadoOutputFormatter, kBatchMarker
+from ipbb.tools.termui import kYellow, kReset
+from ipbb.tools.common import MessageIndex
+from ipbb.context import Context
+from ipbb.scripts.builder import climain, _compose_cli
+from click.testing import CliRunner
+
+# Minimal stand-in for the Vivado TCL console
+_fakevivado = '''#!{python}
+import shlex
+import signal
+import sys
+import time
+
+class Interrupted(Exception):
+    pass
+
+def interrupt(*args):
+    raise Interrupted()
+
+signal.signal(signal.SIGINT, interrupt)
+
+polls = 0
+result = ''
+
+def run(l):
+    global polls, result
+    result = ''
+    l = l.strip()
+    if l.startswith('set ipbb_batch_result ['):
+        # Batch command, printing its result
+        ok = run(l[len('set ipbb_batch_result ['):l.index(']; if ')])
+        if ok and result:
+            print(result)
+        return ok
+    elif l.startswith('ret '):
+        result = l[4:]
+    elif l.startswith('sleep '):
+        time.sleep(float(l.split()[1]))
+        print('out ' + l)
+    elif l.startswith('puts '):
+        print(shlex.split(l[5:])[0])
+    elif l.startswith('source'):
+        return all(run(x) for x in open(l.split()[-1].strip('{{}}')))
+    elif l.startswith('fail'):
+        print('ERROR: [Common 17-1] ' + l)
+        return False
+    elif l.startswith('bogus'):
+        print('invalid command name "bogus"')
+        return False
+    elif l.startswith('foreach r [get_runs]'):
+        # synth_1 completes at the third poll
+        polls += 1
+        for p, v in (('STATUS', 'running'), ('NEEDS_REFRESH', '0'), ('PROGRESS', '100%' if polls >= 3 else '50%'), ('STATS.ELAPSED', '0')):
+            print('@ipbb@run\\tsynth_1\\t' + p + '\\t' + v)
+    elif l == 'quit':
+        sys.exit(0)
+    elif l and not l.startswith('#'):
+        print('out ' + l)
+    return True
+
+with open(__file__ + '.argv', 'a') as f:
+    f.write(' '.join(sys.argv[1:]) + '\\n')
+
+print('Vivado v2020.2 (64-bit)')
+while True:
+    sys.stdout.write('Vivado% ')
+    sys.stdout.flush()
+    l = sys.stdin.readline()
+    if not l:
+        break
+    try:
+        run(l)
+        # Results are printed by the interactive console only
+        if result:
+            print(result)
+    except Interrupted:
+        print('interrupted')
+    sys.stdout.flush()
+'''
+
+
+# -----------------------------------------------------------------------------
+@pytest.fixture
+def fakevivado(tmp_path, monkeypatch):
+    lExe = tmp_path / 'vivado'
+    lExe.write_text(_fakevivado.format(python=sys.executable))
+    lExe.chmod(0o755)
+    monkeypatch.setenv('PATH', str(tmp_path), prepend=':')
+    monkeypatch.chdir(tmp_path)
+    return lExe
+
+
+# -----------------------------------------------------------------------------
+@pytest.fixture
+def console(fakevivado):
+    lConsole = VivadoConsole()
+    lConsole.quiet = True
+    yield lConsole
+    lConsole.close()
+
+
+# -----------------------------------------------------------------------------
+def test_execute_many(console):
+    assert console.executeMany(['a', 'puts "b c"', 'd']) == [('out a',), ('b c',), ('out d',)]
+    # Results are returned as by execute, comments are left alone
+    assert console('ret x') == ('x',)
+    assert console.executeMany(['ret x', '# ret y', 'a']) == [('x',), (None,), ('out a',)]
+    assert console.executeMany([]) == []
+
+    with pytest.raises(VivadoConsoleError) as lExc:
+        console.executeMany(['a', 'fail here', 'd'])
+    assert lExc.value.command == 'fail here'
+
+    # TCL errors stop the script too
+    with pytest.raises(VivadoConsoleError) as lExc:
+        console.executeMany(['a', 'bogus', 'd'])
+    assert lExc.value.command == 'bogus'
+
+    # Including when the last command fails
+    with pytest.raises(VivadoConsoleError) as lExc:
+        console.executeMany(['a', 'bogus'])
+    assert lExc.value.command == 'bogus'
+    assert lExc.value.errors == ['invalid command name "bogus"']
+
+    # The console is still usable
+    assert console('e') == ('out e',)
+
+
+# -----------------------------------------------------------------------------
+def test_command_batch(console):
+    lBatch = VivadoCommandBatch(console)
+    for c in ('# comment', '', 'a', 'b'):
+        lBatch(c)
+    assert lBatch.flush() == [('out a',), ('out b',)]
+    assert lBatch.flush() == []
+
+
+# -----------------------------------------------------------------------------
+def test_read_run_info():
+    lCmds = []
+
+    def console(aCmd, aMaxLen=1):
+        lCmds.append(aCmd)
+        return (
+            '@ipbb@run\tsynth_1\tSTATUS\tRunning synth_design',
+            '@ipbb@run\tsynth_1\tPROGRESS\t50%',
+            '@ipbb@run\tip_synth_1\tSTATUS\tsynth_design Complete!',
+            '@ipbb@run\tip_synth_1\tPROGRESS\t100%',
+        )
+
+    lInfos = VivadoProject(console).readRunInfo(['STATUS', 'PROGRESS'])
+
+    # A single round trip
+    assert len(lCmds) == 1
+    assert list(lInfos) == ['ip_synth_1', 'synth_1']
+    assert lInfos['synth_1'] == {'STATUS': 'Running synth_design', 'PROGRESS': '50%'}
+    assert list(lInfos['ip_synth_1']) == ['STATUS', 'PROGRESS']
+
+
+# -----------------------------------------------------------------------------
+def test_daemon(fakevivado, tmp_path, monkeypatch):
+    (tmp_path / 'run').mkdir(mode=0o700)
+    lSocket = str(tmp_path / 'run' / 'vivado.sock')
+    lEnv = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(ipbb.__file__)))
+    lServer = subprocess.Popen(
+        [sys.executable, '-m', 'ipbb.tools.xilinx.vivado_server', lSocket], env=lEnv, stdout=subprocess.DEVNULL
+    )
+
+    try:
+        lClient = None
+        for _ in range(100):
+            lClient = VivadoClient.connect(lSocket, sid='test', echo=False)
+            if lClient is not None:
+                break
+            time.sleep(0.1)
+        assert lClient is not None
+        assert lClient.version == '2020.2'
+        assert stat.S_IMODE(os.stat(lSocket).st_mode) == 0o600
+
+        # One client at a time
+        monkeypatch.setattr(VivadoClient, 'kConnectTimeout', 0.5)
+        with pytest.raises(VivadoDaemonBusyError):
+            VivadoClient.connect(lSocket)
+        # Sessions start Vivado instead of waiting for a busy daemon
+        with VivadoSessionManager(socket=lSocket, echo=False).getctx('other') as lConsole:
+            assert isinstance(lConsole, VivadoConsole)
+
+        assert lClient('a') == ('out a',)
+        assert lClient.executeMany(['b', 'puts "c d"']) == [('out b',), ('c d',)]
+        with pytest.raises(VivadoConsoleError) as lExc:
+            lClient.executeMany(['e', 'fail f'])
+        assert lExc.value.command == 'fail f'
+        assert lClient.messages.count('ERROR') == 1
+        lClient.close()
+
+        # The next client of the same session starts with an empty message index
+        lClient = VivadoClient.connect(lSocket, sid='test', echo=False)
+        assert lClient('h') == ('out h',)
+        assert lClient.messages.count('ERROR') == 0
+        lClient.close()
+
+        # Sessions go to the daemon while it runs, and survive the client
+        lSessions = VivadoSessionManager(socket=lSocket, echo=False)
+        with lSessions.getctx('synth') as lConsole:
+            assert isinstance(lConsole, VivadoClient)
+            assert lConsole('g') == ('out g',)
+
+        # Sockets in directories others can access are not trusted
+        os.chmod(tmp_path / 'run', 0o755)
+        with pytest.raises(PermissionError):
+            VivadoClient.connect(lSocket)
+        with VivadoSessionManager(socket=lSocket, echo=False).getctx('other') as lConsole:
+            assert isinstance(lConsole, VivadoConsole)
+        os.chmod(tmp_path / 'run', 0o700)
+
+        VivadoClient.connect(lSocket).quit()
+        assert lServer.wait(10) == 0
+        assert VivadoClient.connect(lSocket) is None
+    finally:
+        lServer.kill()
+
+
+# -----------------------------------------------------------------------------
+def test_pool(fakevivado, tmp_path):
+    with VivadoConsolePool(2) as lPool:
+        lPool.warm()
+        lFirst = lPool.acquire('a', str(tmp_path))
+        lSecond = lPool.acquire('b')
+        assert lFirst is not lSecond
+        assert lFirst.sessionid == 'a'
+        assert lPool.memory() > 0
+
+        # The pool is full: wait for a console to be returned
+        lAcquired = []
+        lThread = threading.Thread(target=lambda: lAcquired.append(lPool.acquire('c')))
+        lThread.start()
+        time.sleep(0.2)
+        assert not lAcquired
+        lPool.release(lFirst)
+        lThread.join(10)
+        assert lAcquired == [lFirst]
+
+        # Sessions are taken from the pool and returned on exit
+        lPool.release(lFirst)
+        lSessions = VivadoSessionManager(pool=lPool)
+        with lSessions.getctx('d') as lConsole:
+            assert lConsole is lFirst
+        assert list(lPool._idle) == [lFirst]
+
+        # Consoles exceeding the memory cap are not kept
+        lPool.maxmemory = 1
+        lPool.release(lSecond)
+        assert not lSecond.isAlive()
+
+
+# -----------------------------------------------------------------------------
+def test_formatter():
+    lOut = []
+    lFormatter = VivadoOutputFormatter('s')
+    lFormatter._write = lOut.append
+    lFormatter._flush = lambda: None
+
+    lFormatter.write('plain\r\nWARNING: [Synth 8-327] la')
+    lFormatter.write('tch\n' + kBatchMarker + ' 0\nINFO: [Common 17-1] info\nERROR: no id\nWARNING: [Synth 8-327] again\n')
+    lFormatter.flush(True)
+    assert ''.join(lOut).split('\n')[:2] == ['s | plain\r', 's | ' + kYellow + 'WARNING: [Synth 8-327] latch' + kReset]
+    assert len(lOut) == 1
+    assert lFormatter.counts == {('WARNING', 'Synth 8-327'): 2, ('INFO', 'Common 17-1'): 1, ('ERROR', None): 1}
+
+    # Quiet mode only writes messages, silent mode nothing, both count
+    lOut.clear()
+    lFormatter.quiet = True
+    lFormatter.write('plain\nERROR: [X 1-1] e\n')
+    lFormatter.silent = True
+    lFormatter.write('ERROR: [X 1-1] e\n')
+    lFormatter.flush(True)
+    assert ''.join(lOut).count('\n') == 1
+    assert lFormatter.counts['ERROR', 'X 1-1'] == 2
+
+    # Output held in the buffer is written even if no flush comes
+    lOut.clear()
+    lFormatter.quiet = lFormatter.silent = False
+    lFormatter.flush()
+    lFormatter.write('held\n')
+    assert not lOut
+    time.sleep(lFormatter.kFlushInterval * 3)
+    assert lOut == ['s | held\n']
+
+
+# -----------------------------------------------------------------------------
+def test_message_index(console, tmp_path):
+    console.sessionid = 'synth'
+    with pytest.raises(VivadoConsoleError):
+        console.executeMany(['a', 'fail b', 'c'])
+    with pytest.raises(VivadoConsoleError):
+        console('fail d')
+
+    lIndex = console.messages
+    assert lIndex.session == 'synth'
+    assert lIndex.count('ERROR') == 2
+    lCount, _, _, lFirst, lLast, lText = lIndex.entries['ERROR', 'Common 17-1']
+    assert lCount == 2
+    assert lIndex.commands[lFirst] == 'fail b'
+    assert lIndex.commands[lLast] == 'fail d'
+    assert lText == 'ERROR: [Common 17-1] fail b'
+
+    # Messages of other sessions are kept apart
+    console.sessionid = 'impl'
+    assert len(console.messages) == 0
+
+    lIndex.scan(['WARNING: [Synth 8-327] latch\n', 'plain\n'], VivadoOutputFormatter.classify, 'runme.log')
+    lIndex.dump(str(tmp_path / 'messages.json'))
+    with open(tmp_path / 'messages.json') as f:
+        lLoaded = MessageIndex.fromdict(json.load(f))
+    assert lLoaded.entries == lIndex.entries
+    assert lLoaded.commands == lIndex.commands
+
+
+# -----------------------------------------------------------------------------
+def test_async_console(fakevivado):
+
+    async def main():
+        async with AsyncVivadoSession(sid='a') as a, AsyncVivadoSession(sid='b') as b:
+            assert a.version == '2020.2'
+            async with VivadoSnoozer(a):
+                assert a.quiet
+
+            # Both consoles execute at the same time
+            lStart = time.monotonic()
+            assert await asyncio.gather(a('sleep 0.5'), b('sleep 0.5')) == [('out sleep 0.5',), ('out sleep 0.5',)]
+            assert time.monotonic() - lStart < 0.9
+
+            assert await a.executeMany(['c', 'puts "d"']) == [('out c',), ('d',)]
+            with pytest.raises(VivadoConsoleError):
+                await b('fail e')
+
+            # Timed out commands are interrupted, the console is usable again afterwards
+            with pytest.raises(asyncio.TimeoutError):
+                await a.execute('sleep 10', aTimeout=0.2)
+            assert await a('f') == ('out f',)
+            assert a.usage()['rss'] > 0
+
+    asyncio.run(main())
+
+
+# -----------------------------------------------------------------------------
+def test_monitor_run(console, monkeypatch):
+    from ipbb.cmds import vivado
+    monkeypatch.setattr(vivado, 'kRunPollInterval', 0.05)
+
+    lReports = []
+    vivado.monitorRun(console, VivadoProject(console), 'synth_1', 1, lambda p, u: lReports.append((p, u)))
+
+    # Polled three times, reported at the first poll and when done
+    assert [p['synth_1']['PROGRESS'] for p, _ in lReports] == ['50%', '100%']
+    assert lReports[-1][1]['rss'] > 0
+    # The synchronous console is usable again
+    assert console('a') == ('out a',)
+
+
+# -----------------------------------------------------------------------------
+def test_cli_pool(fakevivado, mkworkarea, tmp_path, monkeypatch):
+    lSrcDir = mkworkarea({
+        'pkg/top/firmware/cfg/top.d3': '@device_name = "xc7k325t"\n@device_package = "ffg900"\n@device_speed = "-2"\nsrc top.vhd\n',
+        'pkg/top/firmware/hdl/top.vhd': '',
+    })
+    lWorkArea = os.path.dirname(lSrcDir)
+    lProjDir = os.path.join(lWorkArea, 'proj', 'p1')
+    os.makedirs(os.path.join(lProjDir, 'p1'))
+    for lPath, lContent in (
+        (os.path.join(lWorkArea, '.ipbb_work.yml'), ''),
+        (os.path.join(lProjDir, '.ipbb_proj.yml'), 'name: p1\ntoolset: vivado\ntopPkg: pkg\ntopCmp: top\ntopDep: top.d3\n'),
+        (os.path.join(lProjDir, 'p1', 'p1.xpr'), ''),
+    ):
+        with open(lPath, 'w') as f:
+            f.write(lContent)
+
+    _compose_cli()
+    lContext = Context(lProjDir)
+    monkeypatch.setenv('IPBB_STEP_MARKERS', '1')
+    lResult = CliRunner().invoke(climain, ['vivado', '--pool', 'status'], obj=lContext)
+    assert lResult.exit_code == 0, lResult.output
+    # Followed by ipbb build
+    assert '@ipbb@step status\n' in lResult.output
+
+    # The command ran in the console started by the pool, closed on exit
+    with open(str(fakevivado) + '.argv') as f:
+        assert [l.split()[3] for l in f] == ['vivado_status_pool1.log']
+    assert lContext.vivadoPool is None
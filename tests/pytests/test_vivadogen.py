@@ -0,0 +1,60 @@
+import pytest
+
+from types import SimpleNamespace
+
+from ipbb.depparser import DepFileParser, Pathmaker
+from ipbb.generators.vivadoproject import VivadoProjectGenerator
+
+_files = {
+    'pkg/top/firmware/cfg/top.d3': (
+        '@device_name = "xc7k325t"\n@device_package = "ffg900"\n@device_speed = "-2"\n'
+        'setup setup.tcl\nsrc top.vhd\nsrc -l mylib a.vhd\nsrc top.xdc\n'
+    ),
+    'pkg/top/firmware/cfg/setup.tcl': '',
+    'pkg/top/firmware/hdl/top.vhd': '',
+    'pkg/top/firmware/hdl/a.vhd': '',
+    'pkg/top/firmware/hdl/b.vhd': '',
+    'pkg/top/firmware/hdl/top.xdc': '',
+}
+
+
+# -----------------------------------------------------------------------------
+def _fingerprint(aSrcDir, aDepFile):
+    with open(aSrcDir + '/pkg/top/firmware/cfg/top.d3', 'w') as f:
+        f.write(aDepFile)
+    lParser = DepFileParser('vivado', Pathmaker(aSrcDir))
+    lParser.parse('pkg', 'top', 'top.d3')
+
+    lGen = VivadoProjectGenerator(SimpleNamespace(name='p', path='/proj'))
+    lDigests = {}
+    lFingerprint = lGen.fingerprint(lParser.settings, lParser.commands, lambda l: [lDigests.setdefault(p, p) for p in l])
+    return lGen, lParser, lFingerprint
+
+
+# -----------------------------------------------------------------------------
+def test_fingerprint_delta(mkworkarea):
+    lSrcDir = mkworkarea(_files)
+    lDepFile = _files['pkg/top/firmware/cfg/top.d3']
+
+    _, _, lOld = _fingerprint(lSrcDir, lDepFile)
+    _, _, lSame = _fingerprint(lSrcDir, lDepFile)
+    assert lSame == lOld
+
+    # Changing a library and adding a file only touches the sources
+    lGen, lParser, lNew = _fingerprint(lSrcDir, lDepFile.replace('-l mylib a.vhd', '-l otherlib a.vhd\nsrc b.vhd'))
+    assert lNew['project'] == lOld['project']
+
+    lScript = []
+    lGen.writeDelta(lambda *a: lScript.append(' '.join(a)), lOld, lNew, lParser.commands)
+    lA, lB = (lSrcDir + '/pkg/top/firmware/hdl/' + f for f in ('a.vhd', 'b.vhd'))
+    assert lScript[3:] == [
+        'open_project /proj/p/p.xpr',
+        'remove_files [get_files {{{}}}]'.format(lA),
+        'add_files -norecurse -fileset sources_1 {} {}'.format(lA, lB),
+        'set_property library otherlib [ get_files {{{}}} ]'.format(lA),
+        'close_project',
+    ]
+
+    # Constraints changes require the project to be created again
+    _, _, lNew = _fingerprint(lSrcDir, lDepFile.replace('src top.xdc\n', ''))
+    assert lNew['project'] != lOld['project']
@@ -0,0 +1,107 @@
+import os
+import psutil
+import subprocess
+import sys
+import time
+
+from ipbb.tools.xilinx import RunMemoryHistory, RunMemorySampler, RunScheduler
+
+GiB = 2**30
+
+
+# -----------------------------------------------------------------------------
+def test_plan():
+    lHistory = RunMemoryHistory(aDefault=1 * GiB)
+    # Nothing measured yet, all runs fit by number of cores only
+    assert RunScheduler(lHistory, 2, 8 * GiB).plan(['c', 'a', 'b']) == [['a', 'b'], ['c']]
+
+    for lRun, lPeak in (('a', 3), ('b', 1), ('c', 2), ('d', 6)):
+        lHistory.record(lRun, lPeak * GiB)
+    # Never measured runs are expected as large as the largest run
+    assert lHistory.estimate('e') == 6 * GiB
+
+    # Largest first, each in the first wave with room left
+    assert RunScheduler(lHistory, 4, 8 * GiB).plan(['a', 'b', 'c', 'd', 'e']) == [['d', 'c'], ['e', 'b'], ['a']]
+    # Runs larger than the memory available run alone
+    assert RunScheduler(lHistory, 4, 2 * GiB).plan(['a', 'b', 'd']) == [['d'], ['a'], ['b']]
+
+
+# -----------------------------------------------------------------------------
+def test_history(tmp_path):
+    lPath = str(tmp_path / 'runs.json')
+    lHistory = RunMemoryHistory(lPath)
+    lHistory.record('x_synth_1', 5)
+    lHistory.save()
+
+    assert RunMemoryHistory(lPath).estimate('x_synth_1') == 5
+
+    # Unreadable histories are ignored
+    with open(lPath, 'w') as f:
+        f.write('{')
+    assert RunMemoryHistory(lPath, 7).estimate('x_synth_1') == 7
+
+
+# -----------------------------------------------------------------------------
+def test_sampler(tmp_path, monkeypatch):
+    lRunsDir = tmp_path / 'p.runs'
+    (lRunsDir / 'x_synth_1').mkdir(parents=True)
+
+    lHistory = RunMemoryHistory(str(tmp_path / 'runs.json'))
+    lChild = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(10)'], cwd=str(lRunsDir / 'x_synth_1'))
+    lDenied = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(10)'], cwd=str(lRunsDir / 'x_synth_1'))
+
+    # Processes that cannot be inspected are skipped, not the whole sample
+    lCwd = psutil.Process.cwd
+    def cwd(self):
+        if self.pid == lDenied.pid:
+            raise psutil.AccessDenied(self.pid)
+        return lCwd(self)
+    monkeypatch.setattr(psutil.Process, 'cwd', cwd)
+
+    try:
+        with RunMemorySampler(psutil.Process(), str(lRunsDir), lHistory, 0.05) as lSampler:
+            time.sleep(0.3)
+            lRuns = lSampler.sample()
+    finally:
+        for p in (lChild, lDenied):
+            p.kill()
+            p.wait()
+
+    # Only the run processes are accounted for, not this one
+    assert list(lRuns) == ['x_synth_1']
+    assert lSampler.peaks['x_synth_1'] >= lRuns['x_synth_1'] > 0
+    assert RunMemoryHistory(str(tmp_path / 'runs.json')).estimate('x_synth_1') == lSampler.peaks['x_synth_1']
+
+
+# -----------------------------------------------------------------------------
+def test_ooc_waves():
+    from ipbb.cmds.vivado import launchOOCWaves
+    from ipbb.tools.xilinx import VivadoProject
+
+    lCmds = []
+    lRuns = {
+        'a_synth_1': ('synth_design Complete!', '1'),
+        'b_synth_1': ('Not started', '0'),
+        'c_synth_1': ('synth_design Complete!', '0'),
+    }
+
+    def console(aCmd, aMaxLen=1):
+        lCmds.append(aCmd)
+        return tuple(
+            '@ipbb@run\t{}\t{}\t{}'.format(r, p, v)
+            for r, (lStatus, lRefresh) in lRuns.items()
+            for p, v in (('STATUS', lStatus), ('NEEDS_REFRESH', lRefresh), ('PROGRESS', '0%'), ('STATS.ELAPSED', '0'))
+        )
+    console.quiet = False
+
+    class Sampler:
+        history = RunMemoryHistory(aDefault=1)
+
+    assert launchOOCWaves(None, console, VivadoProject(console), Sampler, 2) == min(2, os.cpu_count())
+
+    # Out-of-date complete runs are reset before being launched again, up-to-date ones are left alone
+    lCmds = [c for c in lCmds if not c.startswith('foreach')]
+    assert lCmds[0] == 'reset_run a_synth_1'
+    assert lCmds[1].startswith('launch_runs a_synth_1 ')
+    assert 'reset_run b_synth_1' not in lCmds
+    assert not any('c_synth_1' in c for c in lCmds)